@@ -0,0 +1,152 @@
+"""
+AST parser benchmark - single-pass visitor vs. the previous per-symbol parser
+
+Generates large Python files (many classes and methods, each making calls),
+parses them with both implementations and reports timings and symbol counts.
+The previous implementation is kept here verbatim as the baseline: it runs
+ast.get_source_segment (which re-splits the file) and a separate ast.walk per
+symbol.
+
+Usage (from the backend directory):
+    python -m benchmarks.ast_parser [--sizes 250,500,1000] [--repeats 3]
+
+The baseline is quadratic in file size, so keep the sizes modest: at 1000
+symbols (about 8500 lines) it already takes over a minute.
+"""
+import argparse
+import ast
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from services.ast_parser import ASTParser
+
+
+class LegacyASTParser:
+    """The parser as it was before the single-pass visitor (top-level symbols and methods only)"""
+
+    def extract_calls(self, node: ast.AST):
+        calls = set()
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call):
+                func = child.func
+                if isinstance(func, ast.Name):
+                    calls.add(func.id)
+                elif isinstance(func, ast.Attribute):
+                    calls.add(func.attr)
+        return calls
+
+    def parse_file(self, file_path: str) -> List[Dict]:
+        symbols = []
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        tree = ast.parse(content, filename=file_path)
+        for node in ast.iter_child_nodes(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                symbols.append({
+                    "name": node.name,
+                    "line_start": node.lineno,
+                    "line_end": node.end_lineno or node.lineno,
+                    "code": ast.get_source_segment(content, node) or "",
+                    "calls": list(self.extract_calls(node)),
+                })
+            elif isinstance(node, ast.ClassDef):
+                symbols.append({
+                    "name": node.name,
+                    "line_start": node.lineno,
+                    "line_end": node.end_lineno or node.lineno,
+                    "code": ast.get_source_segment(content, node) or "",
+                    "calls": [],
+                })
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        symbols.append({
+                            "name": f"{node.name}.{item.name}",
+                            "line_start": item.lineno,
+                            "line_end": item.end_lineno or item.lineno,
+                            "code": ast.get_source_segment(content, item) or "",
+                            "calls": list(self.extract_calls(item)),
+                        })
+        return symbols
+
+
+def generate_source(symbol_count: int, methods_per_class: int = 10) -> str:
+    """Generate a Python module with roughly symbol_count functions and methods"""
+    lines = ['"""Generated module"""', ""]
+    classes = max(symbol_count // (methods_per_class + 1), 1)
+    for c in range(classes):
+        lines.append(f"class Generated{c}(object):")
+        lines.append(f'    """Generated class {c}"""')
+        lines.append("")
+        for m in range(methods_per_class):
+            lines.append(f"    def method_{m}(self, value, *args, **kwargs):")
+            lines.append(f"        result = helper_{(c + m) % 50}(value)")
+            lines.append(f"        self.method_{(m + 1) % methods_per_class}(result)")
+            lines.append("        for item in args:")
+            lines.append("            result += len(str(item))")
+            lines.append("        def inner(x):")
+            lines.append("            return transform(x) * 2")
+            lines.append("        return inner(result)")
+            lines.append("")
+    for h in range(50):
+        lines.append(f"def helper_{h}(value):")
+        lines.append("    return transform(value) + 1")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def _best_time(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="250,500,1000",
+                        help="Comma-separated approximate symbol counts per generated file")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    current = ASTParser()
+    legacy = LegacyASTParser()
+
+    print(f"{'symbols':>8} {'lines':>8} {'legacy (s)':>11} {'visitor (s)':>12} {'speedup':>8} {'legacy syms':>12} {'visitor syms':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            path = os.path.join(tmp, f"generated_{size}.py")
+            source = generate_source(size)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(source)
+
+            legacy_symbols = legacy.parse_file(path)
+            current_symbols = current.parse_file(path, "python")
+            legacy_time = _best_time(lambda: legacy.parse_file(path), args.repeats)
+            current_time = _best_time(lambda: current.parse_file(path, "python"), args.repeats)
+
+            # Every symbol the old parser found must come out identical, calls included (the
+            # visitor adds nested ones; calls are compared as sets since the old order was arbitrary)
+            by_name = {s["name"]: s for s in current_symbols}
+            for old in legacy_symbols:
+                new = by_name.get(old["name"])
+                if (
+                    new is None
+                    or new["code"] != old["code"]
+                    or new["line_end"] != old["line_end"]
+                    or set(new["calls"]) != set(old["calls"])
+                ):
+                    print(f"Mismatch for symbol {old['name']}")
+                    return 1
+
+            print(f"{size:>8} {source.count(chr(10)):>8} {legacy_time:>11.3f} {current_time:>12.3f} "
+                  f"{legacy_time / current_time:>7.1f}x {len(legacy_symbols):>12} {len(current_symbols):>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Embedding backend parity check and throughput benchmark
+
+Encodes the symbols of a source tree with the default sentence-transformers
+backend and the ONNX backend, reports the cosine agreement between the two and
+the encode throughput of each.
+
+Usage (from the backend directory):
+    python -m benchmarks.embedding_backends [--source DIR] [--export] [--min-cosine 0.98]
+
+Exits with status 1 when the parity check fails.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from config import EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, EMBEDDING_ONNX_DIR
+from embeddings.factory import create_backend
+from services.ast_parser import ASTParser
+
+
+def collect_texts(source_dir: Path, limit: int) -> List[str]:
+    """Build embedding texts for the Python symbols under source_dir"""
+    parser = ASTParser()
+    texts = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if d not in {'.git', '__pycache__', 'node_modules', '.venv', 'data'}]
+        for file in sorted(files):
+            if not file.endswith(".py"):
+                continue
+            file_path = os.path.join(root, file)
+            rel_path = os.path.relpath(file_path, source_dir)
+            for symbol in parser.parse_file(file_path, "python"):
+                texts.append(
+                    f"File: {rel_path}\n"
+                    f"Symbol: {symbol.get('name', 'unknown')}\n"
+                    f"Type: {symbol.get('type', 'unknown')}\n"
+                    f"Code:\n{symbol.get('code', '')}"
+                )
+                if len(texts) >= limit:
+                    return texts
+    return texts
+
+
+def measure_throughput(backend, texts: List[str], batch_size: int, repeats: int) -> Dict:
+    """Encode texts `repeats` times and return the best run"""
+    backend.encode(texts[:batch_size], batch_size=batch_size)  # warmup
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.encode(texts, batch_size=batch_size)
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": best, "texts_per_second": len(texts) / best if best else 0.0}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, default=Path(__file__).resolve().parent.parent,
+                        help="Source tree to take sample symbols from (default: the backend itself)")
+    parser.add_argument("--limit", type=int, default=512, help="Maximum number of texts to encode")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.98,
+                        help="Minimum per-text cosine similarity required to pass the parity check")
+    parser.add_argument("--export", action="store_true",
+                        help="(Re)export and quantize the ONNX model before benchmarking")
+    args = parser.parse_args()
+
+    if args.export or not EMBEDDING_ONNX_DIR.exists():
+        from embeddings.onnx_backend import export_quantized_model
+        print(f"Exporting {EMBEDDING_MODEL} to {EMBEDDING_ONNX_DIR} ...")
+        export_quantized_model(EMBEDDING_MODEL, EMBEDDING_ONNX_DIR)
+
+    texts = collect_texts(args.source, args.limit)
+    if not texts:
+        print(f"No Python symbols found under {args.source}")
+        return 1
+    print(f"Encoding {len(texts)} symbol texts from {args.source}")
+
+    reference = create_backend("sentence-transformers", use_server=False)
+    candidate = create_backend("onnx", use_server=False)
+
+    # Parity: cosine similarity between the two backends for every text
+    ref_vectors = reference.encode(texts, batch_size=args.batch_size)
+    cand_vectors = candidate.encode(texts, batch_size=args.batch_size)
+    ref_norm = ref_vectors / np.linalg.norm(ref_vectors, axis=1, keepdims=True)
+    cand_norm = cand_vectors / np.linalg.norm(cand_vectors, axis=1, keepdims=True)
+    cosines = (ref_norm * cand_norm).sum(axis=1)
+    print(f"Cosine agreement: mean={cosines.mean():.4f} min={cosines.min():.4f} "
+          f"p01={np.percentile(cosines, 1):.4f}")
+
+    # Throughput
+    for backend in (reference, candidate):
+        result = measure_throughput(backend, texts, args.batch_size, args.repeats)
+        print(f"{backend.name:>22}: {result['texts_per_second']:8.1f} texts/s ({result['seconds']:.2f}s)")
+
+    if cosines.min() < args.min_cosine:
+        print(f"Parity check FAILED: min cosine {cosines.min():.4f} < {args.min_cosine}")
+        return 1
+    print("Parity check passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
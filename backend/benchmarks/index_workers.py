@@ -0,0 +1,172 @@
+"""
+Multi-process index serving benchmark
+
+Builds a synthetic project index in a temporary FAISS_DATA_DIR, then runs the
+search path (memory-mapped index + metadata lookups) in 1..N worker processes
+and reports aggregate searches/second and the private memory each worker adds.
+With --writer, a separate process keeps replacing vectors during the run and
+every search result is checked for consistent metadata.
+
+Usage (from the backend directory):
+    python -m benchmarks.index_workers [--vectors 50000] [--workers 1,2,4] [--seconds 5] [--writer]
+
+Exits with status 1 when a reader saw inconsistent results.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+PROJECT_ID = "bench"
+DIMENSION = 384
+
+
+def _private_mb() -> Optional[float]:
+    """Private (unshared) memory of this process in MB (Linux only)"""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    kb = sum(int(fields[name].split()[0]) for name in ("Private_Clean", "Private_Dirty") if name in fields)
+    return kb / 1024
+
+
+def _metadata(vector_id: int) -> Dict:
+    return {
+        "file_path": f"pkg/module_{vector_id // 20}.py",
+        "symbol_name": f"function_{vector_id}",
+        "symbol_type": "function",
+        "line_start": vector_id,
+        "line_end": vector_id + 10,
+        "code": f"def function_{vector_id}(a, b):\n" + "    return a + b\n" * 20,
+    }
+
+
+def build_index(vectors: int):
+    from services import embedding_service
+    rng = np.random.default_rng(0)
+    data = rng.random((vectors, DIMENSION), dtype=np.float32)
+    asyncio.run(embedding_service.reset_embeddings(PROJECT_ID))
+    asyncio.run(embedding_service.replace_embeddings(
+        PROJECT_ID, list(data), [_metadata(i) for i in range(vectors)], file_paths=[]
+    ))
+
+
+def reader(seconds: float, start_at: float, results):
+    from services import embedding_service
+    rng = np.random.default_rng(os.getpid())
+    embedding_service._faiss()  # count the index, not the faiss import
+    before = _private_mb()
+    embedding_service.search_vector(PROJECT_ID, rng.random(DIMENSION, dtype=np.float32))
+    loaded = _private_mb()
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    searches = errors = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        hits = embedding_service.search_vector(PROJECT_ID, rng.random(DIMENSION, dtype=np.float32), k=5)
+        # Every result must carry the metadata written with its vector
+        if len(hits) != 5 or any(hit["symbol_name"] != f"function_{hit['line_start']}" for hit in hits):
+            errors += 1
+        searches += 1
+    results.put({
+        "searches": searches,
+        "errors": errors,
+        "private_mb": None if before is None else round(loaded - before, 1),
+    })
+
+
+def writer(stop, vectors: int, results):
+    """Keep replacing the vectors of one file until stopped"""
+    from services import embedding_service
+    rng = np.random.default_rng(1)
+    file_path = _metadata(0)["file_path"]
+    ids = [i for i in range(vectors) if _metadata(i)["file_path"] == file_path]
+    commits = 0
+    while not stop.is_set():
+        asyncio.run(embedding_service.replace_embeddings(
+            PROJECT_ID,
+            list(rng.random((len(ids), DIMENSION), dtype=np.float32)),
+            [_metadata(i) for i in ids],
+            file_paths=[file_path],
+        ))
+        commits += 1
+    results.put({"commits": commits})
+
+
+def run(workers: int, seconds: float, vectors: int, with_writer: bool) -> Dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    stop = ctx.Event()
+    start_at = time.time() + 5.0  # leave time for every worker to start and load the index
+    readers = [ctx.Process(target=reader, args=(seconds, start_at, results)) for _ in range(workers)]
+    for process in readers:
+        process.start()
+    writer_process = None
+    if with_writer:
+        writer_process = ctx.Process(target=writer, args=(stop, vectors, results))
+        writer_process.start()
+
+    reader_results: List[Dict] = [results.get() for _ in readers]
+    for process in readers:
+        process.join()
+    commits = None
+    if writer_process is not None:
+        stop.set()
+        commits = results.get()["commits"]
+        writer_process.join()
+
+    private = [r["private_mb"] for r in reader_results if r["private_mb"] is not None]
+    return {
+        "workers": workers,
+        "searches_per_second": sum(r["searches"] for r in reader_results) / seconds,
+        "errors": sum(r["errors"] for r in reader_results),
+        "private_mb_per_worker": round(sum(private) / len(private), 1) if private else None,
+        "writer_commits": commits,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Search time per worker count")
+    parser.add_argument("--writer", action="store_true", help="Run a concurrent writer process")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="index-workers-")
+    # Child processes inherit the environment, so every worker uses the temporary index
+    os.environ["FAISS_DATA_DIR"] = data_dir
+    print(f"Building a {args.vectors}-vector index in {data_dir} ...")
+    build_index(args.vectors)
+
+    failed = False
+    try:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            result = run(workers, args.seconds, args.vectors, args.writer)
+            line = (f"{result['workers']:>2} workers: {result['searches_per_second']:9.1f} searches/s, "
+                    f"{result['private_mb_per_worker']} MB private per worker")
+            if args.writer:
+                line += f", {result['writer_commits']} writer commits, {result['errors']} inconsistent results"
+            print(line)
+            failed = failed or result["errors"] > 0
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if failed:
+        print("Readers saw inconsistent index/metadata")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Benchmark suite - indexing and query latency at several repository scales
+
+For each scale a synthetic repository is generated (benchmarks.synthetic_repo)
+and the suite times:
+
+- IndexingService.index_project (cold: empty parse/embedding caches)
+- embedding_service.search
+- usage_service.get_usage (hub symbol and random symbols)
+- impact_service.analyze_impact with the LLM stubbed out, i.e. its graph work
+- impact_service.analyze_impact_batch for 20 random targets (LLM stubbed out)
+- the call graph part of a single-file re-index (decode, patch, re-encode and
+  save the whole graph, plus outlines and graph stats)
+
+All data is written to a temporary directory, so runs don't touch data/ and
+always start cold. Results are written as JSON; pass --compare with an earlier
+result file to print the change per metric.
+
+Usage (from the backend directory):
+    python -m benchmarks.suite [--scales 50x10,200x20] [--call-density 3] [--output results.json]
+    python -m benchmarks.suite --compare old.json --output new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic_repo import RepoSpec, generate
+
+_QUERIES = [
+    "parse the configuration options",
+    "raise an error when the value is invalid",
+    "combine the results of helper functions",
+    "service method that processes values",
+    "strict mode validation",
+]
+
+
+def _isolate_data_dirs(root: Path):
+    """Point every data directory at root before the services (and config) are imported"""
+    for name in ("FAISS_DATA_DIR", "BLOB_DATA_DIR", "INDEX_CACHE_DIR", "GRAPH_DATA_DIR"):
+        os.environ[name] = str(root / name.lower())
+    os.environ["REGISTRY_DB_PATH"] = str(root / "registry.sqlite3")
+
+
+def _latency_stats(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _time_calls(fn: Callable[[int], object], repeats: int) -> Dict:
+    samples = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    return _latency_stats(samples)
+
+
+async def _stub_llm(system_prompt: str, user_prompt: str) -> str:
+    return "stubbed analysis"
+
+
+def run_scale(spec: RepoSpec, work_dir: Path, project_id: int, repeats: int) -> Dict:
+    from services import embedding_service, graph_store, impact_service, usage_service
+    from services.indexing_service import IndexingService
+
+    source = work_dir / f"repo-{project_id}"
+    repo = generate(source, spec)
+
+    started = time.perf_counter()
+    indexed = asyncio.run(IndexingService().index_project(project_id, str(source)))
+    index_seconds = time.perf_counter() - started
+
+    graph = graph_store.load_graph(str(project_id))
+    rng = random.Random(spec.seed)
+    sample = rng.sample(graph["symbols"], min(repeats, len(graph["symbols"])))
+    hub = next(s for s in graph["symbols"] if s["name"] == repo["hub"] and s["file_path"] == repo["hub_file"])
+
+    embedding_service.search(str(project_id), _QUERIES[0])  # first query loads the index
+    search = _time_calls(lambda i: embedding_service.search(str(project_id), _QUERIES[i % len(_QUERIES)]), repeats)
+
+    usage_hub = _time_calls(lambda i: usage_service.get_usage(str(project_id), hub["name"], hub["file_path"]), repeats)
+    usage_random = _time_calls(
+        lambda i: usage_service.get_usage(str(project_id), sample[i % len(sample)]["name"], sample[i % len(sample)]["file_path"]),
+        repeats
+    )
+
+    # Stub the LLM so only the graph traversal and context building are measured
+    original_llm = impact_service.generate_response
+    impact_service.generate_response = _stub_llm
+    try:
+        impact_hub = _time_calls(
+            lambda i: asyncio.run(impact_service.analyze_impact(str(project_id), hub["name"], hub["file_path"])),
+            repeats
+        )
+        hub_impact = asyncio.run(impact_service.analyze_impact(str(project_id), hub["name"], hub["file_path"]))
+        batch_targets = [(s["name"], s["file_path"]) for s in sample[:20]]
+        impact_batch = _time_calls(
+            lambda i: asyncio.run(impact_service.analyze_impact_batch(str(project_id), batch_targets)),
+            repeats
+        )
+    finally:
+        impact_service.generate_response = original_llm
+
+    # Last, since every patch gives the file's symbols new IDs
+    indexer = IndexingService()
+    patched_file = sample[0]["file_path"]
+    patched_symbols = [s for s in graph["symbols"] if s["file_path"] == patched_file]
+    reindex_graph = _time_calls(
+        lambda i: indexer._patch_graph(str(project_id), patched_file, patched_symbols), min(repeats, 10)
+    )
+
+    return {
+        "scale": {
+            "files": spec.files,
+            "symbols_per_file": spec.symbols_per_file,
+            "call_density": spec.call_density,
+            "symbols": repo["symbols"],
+            "calls": repo["calls"],
+            "graph_edges": indexed["graph_edges"],
+            "hub_callers": hub_impact["affected_count"],
+        },
+        "index_project": {
+            "seconds": round(index_seconds, 4),
+            "symbols_per_second": round(indexed["symbols_extracted"] / index_seconds, 1) if index_seconds else None,
+            "chunks": indexed["embedding"]["chunks"],
+        },
+        "search": search,
+        "usage_hub": usage_hub,
+        "usage_random": usage_random,
+        "impact_graph_hub": impact_hub,
+        "impact_graph_batch20": impact_batch,
+        "reindex_graph": reindex_graph,
+    }
+
+
+def _environment() -> Dict:
+    from config import EMBEDDING_BACKEND, EMBEDDING_MODEL
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "embedding_backend": EMBEDDING_BACKEND,
+        "embedding_model": EMBEDDING_MODEL,
+    }
+
+
+def _flatten(results: List[Dict]) -> Dict[str, float]:
+    """Comparable metrics keyed like "200x20/search/p50_ms" """
+    metrics = {}
+    for result in results:
+        scale = f"{result['scale']['files']}x{result['scale']['symbols_per_file']}"
+        metrics[f"{scale}/index_project/seconds"] = result["index_project"]["seconds"]
+        for name in ("search", "usage_hub", "usage_random", "impact_graph_hub", "impact_graph_batch20", "reindex_graph"):
+            if name not in result:
+                continue
+            for stat in ("p50_ms", "p95_ms"):
+                metrics[f"{scale}/{name}/{stat}"] = result[name][stat]
+    return metrics
+
+
+def compare(previous: Dict, current: Dict) -> List[str]:
+    """Lines describing the relative change of every metric present in both runs"""
+    before, after = _flatten(previous["results"]), _flatten(current["results"])
+    lines = []
+    for key in sorted(before.keys() & after.keys()):
+        if before[key]:
+            change = (after[key] - before[key]) / before[key] * 100
+            lines.append(f"{key:<45} {before[key]:>10.3f} -> {after[key]:>10.3f}  ({change:+.1f}%)")
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="50x10,200x20",
+                        help="Comma-separated FILESxSYMBOLS_PER_FILE repository sizes")
+    parser.add_argument("--call-density", type=int, default=RepoSpec.call_density)
+    parser.add_argument("--repeats", type=int, default=50, help="Timed calls per query benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary data directory")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="intelliforge-bench-"))
+    _isolate_data_dirs(work_dir)
+
+    results = []
+    try:
+        # Load the model up front so the first scale's indexing time doesn't include it
+        from services import embedding_service
+        started = time.perf_counter()
+        embedding_service.warm_model()
+        model_load_seconds = round(time.perf_counter() - started, 4)
+
+        for project_id, scale in enumerate(args.scales.split(","), start=1):
+            files, symbols_per_file = (int(part) for part in scale.lower().split("x"))
+            spec = RepoSpec(files=files, symbols_per_file=symbols_per_file,
+                            call_density=args.call_density, seed=args.seed)
+            print(f"Scale {scale}: generating and indexing ...", flush=True)
+            result = run_scale(spec, work_dir, project_id, args.repeats)
+            results.append(result)
+            print(
+                f"  index {result['index_project']['seconds']:.2f}s, "
+                f"search p50 {result['search']['p50_ms']:.2f}ms, "
+                f"usage(hub) p50 {result['usage_hub']['p50_ms']:.2f}ms, "
+                f"impact graph(hub) p50 {result['impact_graph_hub']['p50_ms']:.2f}ms, "
+                f"re-index graph p50 {result['reindex_graph']['p50_ms']:.2f}ms"
+            )
+    finally:
+        if args.keep:
+            print(f"Data kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "environment": _environment(),
+        "parameters": {"call_density": args.call_density, "repeats": args.repeats, "seed": args.seed},
+        "model_load_seconds": model_load_seconds,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text())
+        print(f"Compared with {args.compare} ({previous['environment'].get('git_commit')}):")
+        for line in compare(previous, report):
+            print(f"  {line}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
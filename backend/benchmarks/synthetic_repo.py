@@ -0,0 +1,130 @@
+"""
+Synthetic Python repository generator for benchmarks
+
+Generates a deterministic package tree of modules with top-level functions and
+classes with methods. Every function calls `call_density` others; callees are
+drawn from a skewed distribution so a few "hub" helpers end up with many
+callers, like utility functions in real code.
+
+Usage (from the backend directory):
+    python -m benchmarks.synthetic_repo OUTPUT_DIR [--files 100] [--symbols-per-file 20] [--call-density 3]
+"""
+import argparse
+import itertools
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+
+@dataclass
+class RepoSpec:
+    files: int = 100
+    symbols_per_file: int = 20
+    call_density: int = 3
+    # Fraction of a file's symbols that are methods of a class rather than top-level functions
+    method_ratio: float = 0.5
+    # Modules per package directory
+    files_per_package: int = 10
+    seed: int = 0
+
+
+def _module_path(index: int, spec: RepoSpec) -> str:
+    return f"pkg_{index // spec.files_per_package:03d}/module_{index:04d}.py"
+
+
+def _function_body(name: str, callees: List[str], rng: random.Random, indent: str) -> List[str]:
+    lines = [
+        f"{indent}def {name}(self, value, options=None):" if indent else f"def {name}(value, options=None):",
+        f'{indent}    """Process value for {name} and combine the results of its helpers"""',
+        f"{indent}    result = value",
+    ]
+    for callee in callees:
+        receiver = "self." if indent and callee.startswith("_m") else ""
+        lines.append(f"{indent}    result = {receiver}{callee}(result)")
+    for _ in range(rng.randint(2, 8)):
+        op = rng.choice(["+", "*", "-"])
+        lines.append(f"{indent}    result = result {op} {rng.randint(1, 9)}")
+    lines.append(f"{indent}    if options and options.get('strict'):")
+    lines.append(f"{indent}        raise ValueError('{name} failed for ' + str(value))")
+    lines.append(f"{indent}    return result")
+    return lines
+
+
+def generate(output_dir: Path, spec: RepoSpec) -> Dict:
+    """
+    Write a synthetic repository to output_dir
+
+    Returns:
+        Summary with file, symbol and call counts
+    """
+    rng = random.Random(spec.seed)
+    output_dir = Path(output_dir)
+
+    # Decide every symbol name up front so calls can point anywhere in the repo
+    functions: List[str] = []
+    plan = []
+    for file_index in range(spec.files):
+        methods = int(spec.symbols_per_file * spec.method_ratio)
+        top_level = [f"func_{file_index}_{i}" for i in range(spec.symbols_per_file - methods)]
+        class_methods = [f"_m{file_index}_{i}" for i in range(methods)]
+        functions.extend(top_level)
+        plan.append((file_index, top_level, class_methods))
+
+    # Skewed callee choice: weight ~ 1/rank gives a few heavily called hubs
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(functions))))
+    calls = symbols = 0
+
+    for file_index, top_level, class_methods in plan:
+        lines = [f'"""Synthetic module {file_index}"""', "import os", ""]
+        for name in top_level:
+            callees = rng.choices(functions, cum_weights=cum_weights, k=spec.call_density) if functions else []
+            callees = [callee for callee in callees if callee != name]
+            calls += len(callees)
+            lines += _function_body(name, callees, rng, "") + ["", ""]
+        if class_methods:
+            lines += [f"class Service{file_index}:", f'    """Synthetic service {file_index}"""', ""]
+            for position, name in enumerate(class_methods):
+                # Methods call top-level functions and the next method of their own class
+                callees = rng.choices(functions, cum_weights=cum_weights, k=max(spec.call_density - 1, 0))
+                if position + 1 < len(class_methods):
+                    callees.append(class_methods[position + 1])
+                calls += len(callees)
+                lines += _function_body(name, callees, rng, "    ") + [""]
+
+        symbols += len(top_level) + len(class_methods) + (1 if class_methods else 0)
+        path = output_dir / _module_path(file_index, spec)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n")
+
+    for package in sorted({p.parent for p in output_dir.glob("pkg_*/module_*.py")}):
+        (package / "__init__.py").touch()
+
+    return {
+        "files": spec.files,
+        "symbols": symbols,
+        "calls": calls,
+        "hub": functions[0] if functions else None,
+        "hub_file": _module_path(0, spec) if functions else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--files", type=int, default=RepoSpec.files)
+    parser.add_argument("--symbols-per-file", type=int, default=RepoSpec.symbols_per_file)
+    parser.add_argument("--call-density", type=int, default=RepoSpec.call_density)
+    parser.add_argument("--seed", type=int, default=RepoSpec.seed)
+    args = parser.parse_args()
+    summary = generate(args.output, RepoSpec(
+        files=args.files,
+        symbols_per_file=args.symbols_per_file,
+        call_density=args.call_density,
+        seed=args.seed,
+    ))
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
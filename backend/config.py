@@ -8,12 +8,124 @@ from pathlib import Path
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+# Get the backend directory (parent of this config file)
+BACKEND_DIR = Path(__file__).parent
+
 # Embedding Configuration
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Embedding backend: "sentence-transformers" (PyTorch, default) or "onnx" (int8-quantized ONNX Runtime)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Directory holding the exported/quantized ONNX model for the "onnx" backend
+EMBEDDING_ONNX_DIR = Path(os.getenv(
+    "EMBEDDING_ONNX_DIR",
+    str(BACKEND_DIR / "data" / "onnx" / EMBEDDING_MODEL.replace("/", "__"))
+))
+# Number of intra-op threads for ONNX Runtime (0 lets the runtime decide)
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+# Optional shared embedding server (python -m embeddings.server): when set, API workers send
+# encode requests to this Unix socket instead of loading the model themselves
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+# Dynamic batching in the server: encode once this many texts are queued or the oldest waited this long
+EMBEDDING_SERVER_MAX_BATCH = int(os.getenv("EMBEDDING_SERVER_MAX_BATCH", "64"))
+EMBEDDING_SERVER_MAX_WAIT_MS = float(os.getenv("EMBEDDING_SERVER_MAX_WAIT_MS", "5"))
+# Client request timeout, and how long to use the in-process fallback before retrying the server
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "60"))
+EMBEDDING_SERVER_RETRY_SECONDS = float(os.getenv("EMBEDDING_SERVER_RETRY_SECONDS", "30"))
+# Token budget per embedded chunk, measured with the encoder's tokenizer; 0 uses the encoder's
+# max sequence length (longer input would be truncated), and larger values are capped at it
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "0"))
+# Lines shared between consecutive windows when a long function is split
+CHUNK_OVERLAP_LINES = int(os.getenv("CHUNK_OVERLAP_LINES", "5"))
 
 # FAISS Data Directory
-# Get the backend directory (parent of this config file)
-BACKEND_DIR = Path(__file__).parent
 FAISS_DATA_DIR = Path(os.getenv("FAISS_DATA_DIR", str(BACKEND_DIR / "data" / "faiss")))
 FAISS_DATA_DIR.mkdir(parents=True, exist_ok=True)
+# FAISS indexes kept loaded per worker; the least recently searched project is released first
+INDEX_RESIDENT_PROJECTS = int(os.getenv("INDEX_RESIDENT_PROJECTS", "32"))
+
+# Project registry (SQLite in WAL mode; survives restarts)
+REGISTRY_DB_PATH = Path(os.getenv("REGISTRY_DB_PATH", str(BACKEND_DIR / "data" / "registry.sqlite3")))
+REGISTRY_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+# Maximum number of idle connections kept open
+REGISTRY_POOL_SIZE = int(os.getenv("REGISTRY_POOL_SIZE", "4"))
+# Seconds an indexing run stays owned by its worker without a heartbeat; at startup, runs whose
+# owner process is gone or whose lease expired are marked failed
+INDEXING_LEASE_SECONDS = int(os.getenv("INDEXING_LEASE_SECONDS", "300"))
+
+# Call graphs (one binary, memory-mapped file per project)
+GRAPH_DATA_DIR = Path(os.getenv("GRAPH_DATA_DIR", str(BACKEND_DIR / "data" / "graph")))
+GRAPH_DATA_DIR.mkdir(parents=True, exist_ok=True)
+# Call graphs kept memory-mapped per worker; the least recently queried project is unmapped first
+GRAPH_RESIDENT_PROJECTS = int(os.getenv("GRAPH_RESIDENT_PROJECTS", "32"))
+# Also write each graph as <project_id>.json when it is saved, for debugging
+GRAPH_JSON_EXPORT = os.getenv("GRAPH_JSON_EXPORT", "false").lower() in ("1", "true", "yes")
+
+# Startup prewarm (runs in the background after the API starts accepting requests)
+PREWARM_MODEL = os.getenv("PREWARM_MODEL", "true").lower() in ("1", "true", "yes")
+# Comma-separated project IDs whose FAISS indexes are loaded at startup, or "*" for every index on disk
+PREWARM_PROJECTS = os.getenv("PREWARM_PROJECTS", "")
+
+# Zip entries larger than this are not extracted on upload (projects can override it in their ingest rules)
+INGEST_MAX_FILE_BYTES = int(os.getenv("INGEST_MAX_FILE_BYTES", str(1024 * 1024)))
+
+# Content-addressed storage for extracted project files (shared across projects)
+BLOB_DATA_DIR = Path(os.getenv("BLOB_DATA_DIR", str(BACKEND_DIR / "data" / "blobs")))
+BLOB_DATA_DIR.mkdir(parents=True, exist_ok=True)
+# Parse results and embeddings keyed by content hash, reused across projects and re-uploads
+INDEX_CACHE_DIR = Path(os.getenv("INDEX_CACHE_DIR", str(BACKEND_DIR / "data" / "cache")))
+INDEX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+# Size bound of the parse, embedding and summary caches in INDEX_CACHE_DIR; the least recently used
+# entries are removed first (0 = unbounded)
+INDEX_CACHE_MAX_BYTES = int(os.getenv("INDEX_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Response compression
+# Responses larger than this many bytes are compressed (brotli or gzip) when the client accepts it
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+# Brotli quality 0-11; low levels compress about as well as gzip at a fraction of the CPU cost
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# File content responses
+# Files larger than this many bytes are streamed instead of buffered
+FILE_STREAM_THRESHOLD = int(os.getenv("FILE_STREAM_THRESHOLD", str(8 * 1024 * 1024)))
+
+# Symbol summaries (LLM-generated, cached by content hash and reused by explain and chat)
+# Start the summary job automatically after every upload or file re-index
+SUMMARIES_AFTER_INDEX = os.getenv("SUMMARIES_AFTER_INDEX", "false").lower() in ("1", "true", "yes")
+# Concurrent LLM requests of one summary job
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+# Symbol code longer than this many characters is truncated in the summary prompt
+SUMMARY_MAX_CODE_CHARS = int(os.getenv("SUMMARY_MAX_CODE_CHARS", "6000"))
+
+# Semantic answer cache for chat (per worker process): a question this similar (cosine similarity of the
+# question embeddings, 0-1) to an earlier one on the same index generation gets the earlier answer
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CHAT_CACHE_THRESHOLD = float(os.getenv("CHAT_CACHE_THRESHOLD", "0.9"))
+# Answers kept per project; the least recently used are evicted first
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "256"))
+# Projects with cached answers; the least recently asked project's answers are dropped first
+CHAT_CACHE_MAX_PROJECTS = int(os.getenv("CHAT_CACHE_MAX_PROJECTS", "32"))
+
+# Admission control for expensive endpoints (upload, file save, chat, explain, impact), as "<class>=<concurrent>:<queued>"
+# per endpoint class; requests beyond both get 429 with Retry-After. Other endpoints are never limited.
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_LIMITS = os.getenv("ADMISSION_LIMITS", "upload=2:4,save=4:16,chat=8:32,explain=8:32,impact=4:16")
+# Share of each class one project may use: concurrent requests and queued requests (0 turns per-project limits off)
+ADMISSION_PROJECT_CONCURRENCY = int(os.getenv("ADMISSION_PROJECT_CONCURRENCY", "2"))
+ADMISSION_PROJECT_QUEUE = int(os.getenv("ADMISSION_PROJECT_QUEUE", "4"))
+# Longest a queued request waits for a slot before it is rejected
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+
+# Metrics
+# Record stage latencies and counters and serve them at /metrics (Prometheus text format)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
 
+# Request profiling (debug only)
+# Requests sending "X-Profile: sample" or "X-Profile: cprofile" with "X-Admin-Token: <PROFILING_TOKEN>"
+# are profiled; profiling is off entirely (no middleware installed) while the token is empty
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(BACKEND_DIR / "data" / "profiles")))
+# Newest profiles kept on disk
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+# Stack sampling interval of the "sample" profiler
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
@@ -0,0 +1,240 @@
+"""
+Project registry - durable project metadata, indexing status and index generation
+
+Rows outlive the API process, so after a restart projects are reattached to
+their on-disk artifacts (source tree, manifest, FAISS index, call graph)
+instead of being re-uploaded and re-indexed.
+
+A running index is owned by the worker process that started it: the row
+records its PID and a heartbeat, so a worker starting up only reclaims runs
+whose owner has exited or stopped renewing its lease.
+"""
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from db.database import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Indexing status of a project
+STATUS_CREATED = "created"
+STATUS_INDEXING = "indexing"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+_SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    project_path TEXT NOT NULL,
+    file_count INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'created',
+    index_generation INTEGER NOT NULL DEFAULT 0,
+    indexed_at TEXT,
+    error TEXT,
+    ingest_rules TEXT,
+    owner_pid INTEGER,
+    heartbeat_at TEXT
+)
+"""
+
+# Columns added after version 1, applied to older databases on open: version -> [(column, definition)]
+_MIGRATIONS = {
+    2: [("ingest_rules", "TEXT")],
+    3: [("owner_pid", "INTEGER"), ("heartbeat_at", "TEXT")],
+}
+
+_DATETIME_FIELDS = ("created_at", "updated_at", "indexed_at", "heartbeat_at")
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _pid_alive(pid: int) -> bool:
+    """True if a process with this PID exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _row_to_dict(row) -> Dict:
+    project = dict(row)
+    for field in _DATETIME_FIELDS:
+        if project.get(field):
+            project[field] = datetime.fromisoformat(project[field])
+    return project
+
+
+class ProjectRegistry:
+    def __init__(self, db_path: Path, pool_size: int = 4):
+        self.pool = ConnectionPool(db_path, size=pool_size)
+        with self.pool.connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(projects)")}
+            conn.execute(_SCHEMA)
+            for migration_version in range(max(version, 1) + 1, _SCHEMA_VERSION + 1):
+                for column, definition in _MIGRATIONS[migration_version]:
+                    if columns and column not in columns:
+                        conn.execute(f"ALTER TABLE projects ADD COLUMN {column} {definition}")
+            conn.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+
+    def create(self, name: str, description: Optional[str], projects_dir: Path) -> Dict:
+        """Register a new project; its directory is projects_dir/<id>"""
+        now = _now()
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO projects (name, description, created_at, updated_at, project_path) "
+                "VALUES (?, ?, ?, ?, '')",
+                (name, description, now, now)
+            )
+            project_id = cursor.lastrowid
+            conn.execute(
+                "UPDATE projects SET project_path = ? WHERE id = ?",
+                (str(Path(projects_dir) / str(project_id)), project_id)
+            )
+            row = conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return _row_to_dict(row)
+
+    def get(self, project_id: int) -> Optional[Dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def list(self) -> List[Dict]:
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT * FROM projects ORDER BY id").fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def mark_indexing(self, project_id: int):
+        """Record that a full (re-)index has started, owned by this process"""
+        now = _now()
+        with self.pool.connection() as conn:
+            conn.execute(
+                "UPDATE projects SET status = ?, error = NULL, owner_pid = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (STATUS_INDEXING, os.getpid(), now, now, project_id)
+            )
+
+    def heartbeat(self, project_id: int):
+        """Renew this process's lease on a running index"""
+        with self.pool.connection() as conn:
+            conn.execute(
+                "UPDATE projects SET heartbeat_at = ? WHERE id = ? AND status = ? AND owner_pid = ?",
+                (_now(), project_id, STATUS_INDEXING, os.getpid())
+            )
+
+    def mark_ready(self, project_id: int, file_count: Optional[int] = None) -> int:
+        """
+        Record a completed (full or incremental) index and bump the index generation
+
+        Returns:
+            The new index generation
+        """
+        now = _now()
+        with self.pool.connection() as conn:
+            conn.execute(
+                "UPDATE projects SET status = ?, error = NULL, file_count = COALESCE(?, file_count), "
+                "index_generation = index_generation + 1, indexed_at = ?, updated_at = ?, "
+                "owner_pid = NULL, heartbeat_at = NULL WHERE id = ?",
+                (STATUS_READY, file_count, now, now, project_id)
+            )
+            row = conn.execute("SELECT index_generation FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return row["index_generation"] if row else 0
+
+    def get_ingest_rules(self, project_id: int) -> Optional[Dict]:
+        """Stored ingest rules of a project (None if never set)"""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT ingest_rules FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return json.loads(row["ingest_rules"]) if row and row["ingest_rules"] else None
+
+    def set_ingest_rules(self, project_id: int, rules: Optional[Dict]):
+        with self.pool.connection() as conn:
+            conn.execute(
+                "UPDATE projects SET ingest_rules = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(rules) if rules is not None else None, _now(), project_id)
+            )
+
+    def mark_failed(self, project_id: int, error: str):
+        with self.pool.connection() as conn:
+            conn.execute(
+                "UPDATE projects SET status = ?, error = ?, owner_pid = NULL, heartbeat_at = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (STATUS_FAILED, error, _now(), project_id)
+            )
+
+    def reattach(self, projects_dir: Path, inspect_project, lease_seconds: float) -> Dict[str, int]:
+        """
+        Reconcile the registry with the project directories on disk (no re-indexing)
+
+        Projects left in "indexing" by a crashed or restarted process are marked failed:
+        those whose owner process is gone (or is this one, which has started nothing yet)
+        or whose heartbeat is older than lease_seconds. Runs of other live workers are
+        left alone. Project directories without a row (created before the registry
+        existed) are registered from what inspect_project(project_id, project_dir)
+        reports as (indexed, file_count) - ready when their artifacts are present.
+
+        Returns:
+            Counts of registered, interrupted and adopted projects
+        """
+        now = _now()
+        expired = datetime.now() - timedelta(seconds=lease_seconds)
+        projects_dir = Path(projects_dir)
+        with self.pool.connection() as conn:
+            running = conn.execute(
+                "SELECT id, owner_pid, heartbeat_at FROM projects WHERE status = ?", (STATUS_INDEXING,)
+            ).fetchall()
+            orphaned = [
+                (row["id"], row["owner_pid"]) for row in running
+                if row["owner_pid"] is None
+                or row["owner_pid"] == os.getpid()
+                or not _pid_alive(row["owner_pid"])
+                or not row["heartbeat_at"]
+                or datetime.fromisoformat(row["heartbeat_at"]) < expired
+            ]
+            interrupted = 0
+            for project_id, owner_pid in orphaned:
+                # Re-check the owner, so a run that was restarted meanwhile is kept
+                interrupted += conn.execute(
+                    "UPDATE projects SET status = ?, error = ?, owner_pid = NULL, heartbeat_at = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = ? AND owner_pid IS ?",
+                    (STATUS_FAILED, "Indexing was interrupted by a restart", now, project_id, STATUS_INDEXING, owner_pid)
+                ).rowcount
+
+            known = {row["id"] for row in conn.execute("SELECT id FROM projects")}
+            adopted = 0
+            if projects_dir.exists():
+                for project_dir in sorted(projects_dir.iterdir()):
+                    if not project_dir.is_dir() or not project_dir.name.isdigit():
+                        continue
+                    project_id = int(project_dir.name)
+                    if project_id in known:
+                        continue
+                    indexed, file_count = inspect_project(project_id, project_dir)
+                    created_at = datetime.fromtimestamp(project_dir.stat().st_mtime).isoformat()
+                    conn.execute(
+                        "INSERT INTO projects (id, name, description, created_at, updated_at, project_path, "
+                        "file_count, status, index_generation, indexed_at) VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            project_id, f"Project {project_id}", created_at, now, str(project_dir), file_count,
+                            STATUS_READY if indexed else STATUS_CREATED,
+                            1 if indexed else 0,
+                            created_at if indexed else None,
+                        )
+                    )
+                    adopted += 1
+            total = conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+        return {"registered": total, "interrupted": interrupted, "adopted": adopted}
@@ -0,0 +1,46 @@
+"""
+Embedding backend interface
+"""
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+
+class EmbeddingBackend(ABC):
+    """Turns text into fixed-size float32 vectors"""
+
+    # Short identifier used in config and logs (e.g. "sentence-transformers", "onnx")
+    name: str = ""
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Size of the produced embedding vectors"""
+
+    @property
+    @abstractmethod
+    def max_seq_length(self) -> int:
+        """Maximum number of tokens the encoder looks at (longer input is truncated)"""
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode a batch of texts
+
+        Args:
+            texts: Input texts to embed
+            batch_size: Number of texts sent to the encoder at once
+
+        Returns:
+            float32 matrix of shape (len(texts), dimension)
+        """
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """Number of tokens of each text, special tokens included and before truncation"""
+        # Rough whitespace estimate; backends with a tokenizer override this
+        return [len(text.split()) for text in texts]
+
+    def count_tokens(self, texts: List[str]) -> int:
+        """Number of tokens the encoder would consume for texts (after truncation)"""
+        return sum(min(length, self.max_seq_length) for length in self.token_lengths(texts))
@@ -0,0 +1,52 @@
+"""
+Embedding backend factory - picks the backend configured by EMBEDDING_BACKEND
+"""
+from config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL,
+    EMBEDDING_ONNX_DIR,
+    EMBEDDING_ONNX_THREADS,
+    EMBEDDING_SERVER_RETRY_SECONDS,
+    EMBEDDING_SERVER_SOCKET,
+    EMBEDDING_SERVER_TIMEOUT,
+)
+from embeddings.base import EmbeddingBackend
+
+BACKEND_NAMES = ("sentence-transformers", "onnx")
+
+
+def create_backend(name: str = EMBEDDING_BACKEND, use_server: bool = True) -> EmbeddingBackend:
+    """
+    Instantiate an embedding backend by name
+
+    When EMBEDDING_SERVER_SOCKET is set (and use_server is True) this returns a
+    client of the shared embedding server, which falls back to the named
+    backend in-process while the server is unavailable.
+
+    Args:
+        name: "sentence-transformers" or "onnx"
+        use_server: Whether to go through the embedding server when one is configured
+
+    Returns:
+        Loaded embedding backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if use_server and EMBEDDING_SERVER_SOCKET:
+        if name not in BACKEND_NAMES:
+            raise ValueError(f"Unknown embedding backend '{name}'. Expected one of: {', '.join(BACKEND_NAMES)}")
+        from embeddings.remote_backend import RemoteEmbeddingBackend
+        return RemoteEmbeddingBackend(
+            EMBEDDING_SERVER_SOCKET,
+            fallback_factory=lambda: create_backend(name, use_server=False),
+            timeout=EMBEDDING_SERVER_TIMEOUT,
+            retry_seconds=EMBEDDING_SERVER_RETRY_SECONDS,
+        )
+    if name == "sentence-transformers":
+        from embeddings.sentence_transformer_backend import SentenceTransformerBackend
+        return SentenceTransformerBackend(EMBEDDING_MODEL)
+    if name == "onnx":
+        from embeddings.onnx_backend import OnnxEmbeddingBackend
+        return OnnxEmbeddingBackend(EMBEDDING_ONNX_DIR, num_threads=EMBEDDING_ONNX_THREADS)
+    raise ValueError(f"Unknown embedding backend '{name}'. Expected one of: {', '.join(BACKEND_NAMES)}")
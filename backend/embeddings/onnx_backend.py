@@ -0,0 +1,194 @@
+"""
+ONNX Runtime embedding backend - runs an exported, int8-quantized copy of the
+sentence-transformers model on CPU
+
+The model directory is produced by `export_quantized_model` and contains:
+    model.onnx            FP32 export of the transformer
+    model.int8.onnx       dynamically quantized (int8 weights) copy used for inference
+    tokenizer.json        fast tokenizer
+    embedding_config.json pooling/normalization settings copied from the source model
+
+Export once with:
+    python -m embeddings.onnx_backend export
+"""
+import json
+import logging
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from embeddings.base import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedding_config.json"
+
+
+def export_quantized_model(model_name: str, output_dir: Path) -> Path:
+    """
+    Export a sentence-transformers model to ONNX and quantize it to int8
+
+    Args:
+        model_name: sentence-transformers model name (e.g. "all-MiniLM-L6-v2")
+        output_dir: Directory to write the exported model into
+
+    Returns:
+        Path of the quantized model file
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    # Replicate the pooling/normalization stages of the sentence-transformers pipeline
+    pooling = "mean"
+    normalize = False
+    for module in st_model:
+        module_name = type(module).__name__
+        if module_name == "Pooling":
+            if getattr(module, "pooling_mode_cls_token", False):
+                pooling = "cls"
+        elif module_name == "Normalize":
+            normalize = True
+
+    sample = tokenizer(["def example(): pass"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    onnx_path = output_dir / ONNX_MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            tuple(sample[name] for name in input_names),
+            str(onnx_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    logger.info(f"Exported {model_name} to {onnx_path}")
+
+    quantized_path = output_dir / QUANTIZED_MODEL_FILE
+    quantize_dynamic(str(onnx_path), str(quantized_path), weight_type=QuantType.QInt8)
+    logger.info(f"Quantized model written to {quantized_path}")
+
+    tokenizer.backend_tokenizer.save(str(output_dir / TOKENIZER_FILE))
+    with open(output_dir / CONFIG_FILE, "w") as f:
+        json.dump({
+            "model_name": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+            "pooling": pooling,
+            "normalize": normalize,
+            "pad_token_id": tokenizer.pad_token_id or 0,
+        }, f, indent=2)
+
+    return quantized_path
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    name = "onnx"
+
+    def __init__(self, model_dir: Path, quantized: bool = True, num_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        model_file = model_dir / (QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        if not model_file.exists():
+            raise FileNotFoundError(
+                f"ONNX embedding model not found at {model_file}. "
+                f"Run `python -m embeddings.onnx_backend export` first."
+            )
+
+        with open(model_dir / CONFIG_FILE, "r") as f:
+            self._config = json.load(f)
+
+        self._tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        # Token lengths are measured before truncation, with a tokenizer that neither truncates nor pads
+        self._length_tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self._length_tokenizer.no_truncation()
+        self._length_tokenizer.no_padding()
+        self._tokenizer.enable_truncation(max_length=self._config["max_seq_length"])
+        self._tokenizer.enable_padding(pad_id=self._config.get("pad_token_id", 0))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self._session = ort.InferenceSession(
+            str(model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {inp.name for inp in self._session.get_inputs()}
+        logger.info(f"Loaded ONNX embedding model from {model_file}")
+
+    @property
+    def dimension(self) -> int:
+        return self._config["dimension"]
+
+    @property
+    def max_seq_length(self) -> int:
+        return self._config["max_seq_length"]
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype="float32")
+
+        # Sort by length so each batch pads to a similar size, then restore input order
+        order = np.argsort([len(text) for text in texts])
+        output = np.zeros((len(texts), self.dimension), dtype="float32")
+
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encodings = self._tokenizer.encode_batch([texts[i] for i in batch_idx])
+            input_ids = np.array([e.ids for e in encodings], dtype="int64")
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype="int64")
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype="int64")
+
+            hidden = self._session.run(None, feeds)[0]
+            output[batch_idx] = self._pool(hidden, attention_mask)
+
+        return output
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        return [len(e.ids) for e in self._length_tokenizer.encode_batch(texts)]
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Apply the pooling and normalization stages of the source model"""
+        if self._config.get("pooling") == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype("float32")
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self._config.get("normalize"):
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled = pooled / np.clip(norms, 1e-12, None)
+
+        return pooled.astype("float32")
+
+
+if __name__ == "__main__":
+    import sys
+    from config import EMBEDDING_MODEL, EMBEDDING_ONNX_DIR
+
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2 or sys.argv[1] != "export":
+        print("Usage: python -m embeddings.onnx_backend export")
+        sys.exit(1)
+    print(export_quantized_model(EMBEDDING_MODEL, EMBEDDING_ONNX_DIR))
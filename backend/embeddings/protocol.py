@@ -0,0 +1,55 @@
+"""
+Wire format between the embedding server and its clients
+
+Every message is one frame: two big-endian uint32 lengths (header, body), a
+JSON header and a binary body. Encode responses carry the float32 matrix in
+the body, so vectors are never round-tripped through JSON.
+"""
+import asyncio
+import json
+import socket
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+_PREFIX = struct.Struct("!II")
+
+
+def pack(header: Dict, body: bytes = b"") -> bytes:
+    encoded = json.dumps(header).encode("utf-8")
+    return _PREFIX.pack(len(encoded), len(body)) + encoded + body
+
+
+def pack_vectors(vectors: np.ndarray) -> bytes:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return pack({"shape": list(vectors.shape)}, vectors.tobytes())
+
+
+def unpack_vectors(header: Dict, body: bytes) -> np.ndarray:
+    return np.frombuffer(body, dtype=np.float32).reshape(header["shape"]).copy()
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv(sock: socket.socket) -> Tuple[Dict, bytes]:
+    """Read one frame from a blocking socket"""
+    header_size, body_size = _PREFIX.unpack(_recv_exactly(sock, _PREFIX.size))
+    header = json.loads(_recv_exactly(sock, header_size))
+    return header, _recv_exactly(sock, body_size)
+
+
+async def recv_async(reader: asyncio.StreamReader) -> Tuple[Dict, bytes]:
+    """Read one frame from an asyncio stream"""
+    header_size, body_size = _PREFIX.unpack(await reader.readexactly(_PREFIX.size))
+    header = json.loads(await reader.readexactly(header_size))
+    return header, await reader.readexactly(body_size)
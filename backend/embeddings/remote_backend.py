@@ -0,0 +1,127 @@
+"""
+Embedding server client - encodes through the shared embedding server
+
+Used when EMBEDDING_SERVER_SOCKET is set. If the server can't be reached the
+client falls back to an in-process backend (loaded on first need) and retries
+the server after EMBEDDING_SERVER_RETRY_SECONDS, so a restarting server never
+fails requests.
+"""
+import logging
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import protocol
+from embeddings.base import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteEmbeddingBackend(EmbeddingBackend):
+    name = "remote"
+
+    def __init__(
+        self,
+        socket_path: str,
+        fallback_factory: Callable[[], EmbeddingBackend],
+        timeout: float = 60.0,
+        retry_seconds: float = 30.0,
+    ):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._fallback_factory = fallback_factory
+        self._fallback: Optional[EmbeddingBackend] = None
+        self._fallback_lock = threading.Lock()
+        self._info: Optional[Dict] = None
+        # One connection per thread; requests on a connection are strictly sequential
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _disconnect(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            self._local.sock = None
+            sock.close()
+
+    def _request(self, header: Dict) -> Optional[Tuple[Dict, bytes]]:
+        """Send one request; None when the server is unavailable (caller falls back)"""
+        if time.monotonic() < self._down_until:
+            return None
+        # A pooled connection may have been closed by a server restart: retry once on a fresh one
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(protocol.pack(header))
+                response, body = protocol.recv(sock)
+                break
+            except OSError as e:
+                self._disconnect()
+                if attempt == 1:
+                    logger.warning(
+                        f"Embedding server at {self.socket_path} unavailable ({e}); "
+                        f"encoding in-process for {self.retry_seconds:.0f}s"
+                    )
+                    self._down_until = time.monotonic() + self.retry_seconds
+                    return None
+        if response.get("error"):
+            raise RuntimeError(f"Embedding server error: {response['error']}")
+        return response, body
+
+    def _local_backend(self) -> EmbeddingBackend:
+        if self._fallback is None:
+            with self._fallback_lock:
+                if self._fallback is None:
+                    self._fallback = self._fallback_factory()
+        return self._fallback
+
+    def _server_info(self) -> Optional[Dict]:
+        if self._info is None:
+            result = self._request({"op": "info"})
+            if result is not None:
+                self._info = result[0]
+        return self._info
+
+    @property
+    def dimension(self) -> int:
+        info = self._server_info()
+        return info["dimension"] if info else self._local_backend().dimension
+
+    @property
+    def max_seq_length(self) -> int:
+        info = self._server_info()
+        return info["max_seq_length"] if info else self._local_backend().max_seq_length
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        # batch_size is decided by the server, which batches across all clients
+        result = self._request({"op": "encode", "texts": list(texts)})
+        if result is None:
+            return self._local_backend().encode(texts, batch_size=batch_size)
+        return protocol.unpack_vectors(*result)
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        result = self._request({"op": "token_lengths", "texts": list(texts)})
+        if result is None:
+            return self._local_backend().token_lengths(texts)
+        return result[0]["lengths"]
+
+    def server_stats(self) -> Optional[Dict]:
+        """Batching statistics reported by the server (None if it is unavailable)"""
+        result = self._request({"op": "info"})
+        return result[0]["stats"] if result else None
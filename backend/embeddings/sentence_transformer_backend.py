@@ -0,0 +1,48 @@
+"""
+Sentence-transformers embedding backend (PyTorch) - the default backend
+"""
+import copy
+import logging
+from typing import List
+
+import numpy as np
+
+from embeddings.base import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str):
+        # Imported here so that torch is only loaded when this backend is used
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Loading embedding model: {model_name}")
+        self.model_name = model_name
+        self._model = SentenceTransformer(model_name, device="cpu")
+        # Token lengths use their own copy of the tokenizer: they are measured while other threads encode,
+        # and encode changes the shared tokenizer's truncation settings on every call
+        self._length_tokenizer = copy.deepcopy(self._model.tokenizer)
+        logger.info("Embedding model loaded successfully")
+
+    @property
+    def dimension(self) -> int:
+        return self._model.get_sentence_embedding_dimension()
+
+    @property
+    def max_seq_length(self) -> int:
+        return self._model.max_seq_length
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype="float32")
+        embeddings = self._model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return embeddings.astype("float32")
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = self._length_tokenizer(texts, add_special_tokens=True, truncation=False, verbose=False)
+        return [len(ids) for ids in encoded["input_ids"]]
@@ -0,0 +1,205 @@
+"""
+Shared embedding server - one model process serving every API worker
+
+Loads the configured embedding backend once and serves encode requests over
+a Unix socket. Requests from all connections are queued and encoded together:
+a batch is sent to the model as soon as EMBEDDING_SERVER_MAX_BATCH texts are
+waiting or the oldest request has waited EMBEDDING_SERVER_MAX_WAIT_MS, and
+requests keep queueing while the model is busy, so batches grow with load.
+
+Usage (from the backend directory):
+    python -m embeddings.server [--socket PATH]
+
+Then start the API with the same EMBEDDING_SERVER_SOCKET.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from config import (
+    BACKEND_DIR,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_SERVER_MAX_BATCH,
+    EMBEDDING_SERVER_MAX_WAIT_MS,
+    EMBEDDING_SERVER_SOCKET,
+)
+from embeddings import protocol
+from embeddings.base import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = BACKEND_DIR / "data" / "embedding.sock"
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class EmbeddingServer:
+    def __init__(
+        self,
+        backend: EmbeddingBackend,
+        socket_path: Path,
+        max_batch: int = EMBEDDING_SERVER_MAX_BATCH,
+        max_wait_ms: float = EMBEDDING_SERVER_MAX_WAIT_MS,
+    ):
+        self.backend = backend
+        self.socket_path = Path(socket_path)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "asyncio.Queue[_Request]" = None
+        # The model runs on one thread; batching, not parallel calls, provides the throughput
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+        # Tokenizing for chunking is cheap and must not queue behind encode batches
+        self._tokenize_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tokenize")
+        self.stats = {"requests": 0, "texts": 0, "batches": 0, "max_batch_texts": 0, "encode_seconds": 0.0}
+
+    async def serve(self):
+        """Listen on the socket until SIGINT/SIGTERM"""
+        self._queue = asyncio.Queue()
+        self._remove_stale_socket()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        server = await asyncio.start_unix_server(self._handle_connection, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        batcher = asyncio.create_task(self._batch_loop())
+        logger.info(f"Embedding server ({self.backend.name}) listening on {self.socket_path}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+            logger.info("Embedding server stopped")
+        finally:
+            batcher.cancel()
+            self.socket_path.unlink(missing_ok=True)
+
+    def _remove_stale_socket(self):
+        """Remove a socket file left by a dead server; refuse to start if a server is still running"""
+        if not self.socket_path.exists():
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.socket_path))
+        except OSError:
+            self.socket_path.unlink()
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"An embedding server is already listening on {self.socket_path}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    header, _ = await protocol.recv_async(reader)
+                except asyncio.IncompleteReadError:
+                    return
+                writer.write(await self._dispatch(header))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logger.error(f"Embedding server connection failed: {e}", exc_info=True)
+        finally:
+            writer.close()
+
+    async def _dispatch(self, header: Dict) -> bytes:
+        op = header.get("op")
+        try:
+            if op == "encode":
+                request = _Request(list(header.get("texts", [])), asyncio.get_running_loop().create_future())
+                self.stats["requests"] += 1
+                self.stats["texts"] += len(request.texts)
+                await self._queue.put(request)
+                return protocol.pack_vectors(await request.future)
+            if op == "token_lengths":
+                loop = asyncio.get_running_loop()
+                lengths = await loop.run_in_executor(
+                    self._tokenize_executor, self.backend.token_lengths, header.get("texts", []))
+                return protocol.pack({"lengths": lengths})
+            if op == "info":
+                return protocol.pack({
+                    "name": self.backend.name,
+                    "dimension": self.backend.dimension,
+                    "max_seq_length": self.backend.max_seq_length,
+                    "stats": self.stats,
+                })
+            return protocol.pack({"error": f"Unknown op '{op}'"})
+        except Exception as e:
+            logger.error(f"Embedding server request failed: {e}")
+            return protocol.pack({"error": str(e)})
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0].texts)
+            deadline = batch[0].queued_at + self.max_wait
+            # Collect more requests until the batch is full or the oldest one has waited long enough
+            while size < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    # Deadline passed (e.g. while the model was busy): take only what is already queued
+                    if self._queue.empty():
+                        break
+                    request = self._queue.get_nowait()
+                else:
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                batch.append(request)
+                size += len(request.texts)
+
+            texts = [text for request in batch for text in request.texts]
+            started = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.backend.encode, texts, EMBEDDING_BATCH_SIZE)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            self.stats["batches"] += 1
+            self.stats["max_batch_texts"] = max(self.stats["max_batch_texts"], len(texts))
+            self.stats["encode_seconds"] = round(self.stats["encode_seconds"] + time.perf_counter() - started, 4)
+
+            offset = 0
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_result(vectors[offset:offset + len(request.texts)])
+                offset += len(request.texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", type=Path, default=Path(EMBEDDING_SERVER_SOCKET or DEFAULT_SOCKET))
+    parser.add_argument("--max-batch", type=int, default=EMBEDDING_SERVER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=EMBEDDING_SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    from embeddings.factory import create_backend
+    backend = create_backend(use_server=False)
+    backend.encode(["warmup"])
+
+    server = EmbeddingServer(backend, args.socket, args.max_batch, args.max_wait_ms)
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    main()
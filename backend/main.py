@@ -1,11 +1,51 @@
 """
 IntelliForge Backend - FastAPI Entry Point
 """
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import projects, chat, explain, usage, impact, files
+from fastapi.responses import PlainTextResponse
+from config import (
+    ADMISSION_CONTROL_ENABLED, BROTLI_QUALITY, COMPRESSION_MINIMUM_SIZE, METRICS_ENABLED, PROFILING_TOKEN
+)
+from middleware.admission import AdmissionMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.timing import ServerTimingMiddleware
+# Routers and services import heavy ML dependencies (torch, faiss, openai) lazily, on first use
+from routers import projects, chat, explain, usage, impact, files, debug
+from services import admission, answer_cache, metrics, project_service, serialization, summary_service, warmup_service
+from services.serialization import FastJSONResponse
+
+warmup_service.record_import_time(time.perf_counter() - _import_started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reattach registered projects to their indexes on disk (no re-indexing)
+    project_service.reattach_projects()
+    # Prewarm in the background so the API starts serving immediately
+    warmup_task = asyncio.create_task(warmup_service.prewarm())
+    # Continue summary jobs cut short by the last shutdown
+    summary_service.resume_interrupted()
+    yield
+    if not warmup_task.done():
+        warmup_task.cancel()
+    summary_service.cancel_all()
 
-app = FastAPI(title="IntelliForge API", version="0.1.0")
+
+app = FastAPI(title="IntelliForge API", version="0.1.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
+
+# Concurrency limits for expensive endpoints (innermost, so 429s still get CORS headers and metrics)
+if ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
 
 # CORS middleware for frontend integration
 app.add_middleware(
@@ -16,6 +56,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing headers and per-endpoint serialization stats (sees uncompressed sizes)
+app.add_middleware(ServerTimingMiddleware)
+
+# Request latency per endpoint for /metrics
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# On-demand request profiling (not installed at all unless PROFILING_TOKEN is set)
+if PROFILING_TOKEN:
+    app.add_middleware(ProfilingMiddleware, token=PROFILING_TOKEN)
+
+# Compress large responses (file contents, listings, graph queries)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE, brotli_quality=BROTLI_QUALITY)
+
 # Include routers
 app.include_router(projects.router, prefix="/api", tags=["projects"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
@@ -23,6 +77,8 @@ app.include_router(explain.router, prefix="/api", tags=["explain"])
 app.include_router(usage.router, prefix="/api", tags=["usage"])
 app.include_router(impact.router, prefix="/api", tags=["impact"])
 app.include_router(files.router, prefix="/api", tags=["files"])
+if PROFILING_TOKEN:
+    app.include_router(debug.router, prefix="/api", tags=["debug"])
 
 
 @app.get("/")
@@ -35,7 +91,37 @@ def health():
     return {"status": "healthy"}
 
 
+@app.get("/health/startup")
+def startup_timings():
+    """Import and warmup timings for this process"""
+    return warmup_service.get_timings()
+
+
+@app.get("/health/serialization")
+def serialization_timings():
+    """Response serialization time and size per endpoint"""
+    return serialization.get_timings()
+
+
+@app.get("/health/admission")
+def admission_stats():
+    """Concurrency limits, current load and admitted/queued/rejected counts per endpoint class"""
+    return admission.get_stats() if ADMISSION_CONTROL_ENABLED else {}
+
+
+@app.get("/health/chat-cache")
+def chat_cache_stats():
+    """Answer cache hits, misses and refreshes, and cached answers per project (this worker)"""
+    return answer_cache.get_stats()
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def prometheus_metrics():
+        """Stage latency histograms and counters in the Prometheus text format"""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
-
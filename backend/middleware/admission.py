@@ -0,0 +1,65 @@
+"""
+Admission middleware - applies the admission control limits before a request is routed
+
+Requests are classified by method and path, so an over-limit upload is turned
+away before its body is read. Unclassified requests pass straight through.
+"""
+import re
+from typing import List, Optional, Pattern, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from services import admission
+from services.serialization import FastJSONResponse
+
+# (method, path pattern with an optional project_id group, endpoint class)
+_ROUTES: List[Tuple[str, Pattern, str]] = [
+    ("POST", re.compile(r"^/api/projects/(?P<project_id>\d+)/upload$"), "upload"),
+    ("PUT", re.compile(r"^/api/projects/(?P<project_id>\d+)/file$"), "save"),
+    ("POST", re.compile(r"^/api/projects/(?P<project_id>\d+)/chat$"), "chat"),
+    ("POST", re.compile(r"^/api/projects/(?P<project_id>\d+)/explain$"), "explain"),
+    ("POST", re.compile(r"^/api/explain$"), "explain"),
+    ("POST", re.compile(r"^/api/projects/(?P<project_id>\d+)/impact(?:/batch|/diff)?$"), "impact"),
+]
+
+
+def classify(method: str, path: str) -> Tuple[Optional[str], Optional[str]]:
+    """(endpoint class, project_id) of a request, or (None, None) for unlimited endpoints"""
+    for route_method, pattern, endpoint_class in _ROUTES:
+        if method != route_method:
+            continue
+        match = pattern.match(path)
+        if match:
+            return endpoint_class, match.groupdict().get("project_id")
+    return None, None
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint_class, project_id = classify(scope["method"], scope["path"])
+        if endpoint_class is None or not admission.is_limited(endpoint_class):
+            await self.app(scope, receive, send)
+            return
+
+        slot = admission.Admission(endpoint_class, project_id)
+        try:
+            await slot.acquire()
+        except admission.Rejected as e:
+            response = FastJSONResponse(
+                {"detail": f"Too many {endpoint_class} requests ({e.reason}), retry later"},
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            slot.release()
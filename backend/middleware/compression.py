@@ -0,0 +1,118 @@
+"""
+Response compression middleware - brotli when available, gzip otherwise
+
+Brotli needs the optional `brotli` package; without it (or when the client
+doesn't accept it) responses fall back to Starlette's gzip implementation.
+Responses that already carry a Content-Encoding are passed through untouched.
+"""
+import logging
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Codings listed in an Accept-Encoding header, minus those refused with q=0"""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if coding and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, brotli_quality: int = 4, gzip_level: int = 6) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+        if brotli is None:
+            logger.info("brotli is not installed; compressing responses with gzip only")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            accepted = _accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+            if brotli is not None and "br" in accepted:
+                await BrotliResponder(self.app, self.minimum_size, self.brotli_quality)(scope, receive, send)
+                return
+            if "gzip" in accepted:
+                await GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class BrotliResponder:
+    """Brotli counterpart of Starlette's GZipResponder (handles streamed bodies too)"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.send: Optional[Send] = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.content_encoding_set = False
+        self.compressor = brotli.Compressor(quality=quality)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_brotli)
+
+    async def send_with_brotli(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the headers back until we know whether the body gets compressed
+            self.initial_message = message
+            self.content_encoding_set = "content-encoding" in Headers(raw=message["headers"])
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.content_encoding_set:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if not self.started:
+            self.started = True
+            if len(body) < self.minimum_size and not more_body:
+                # Not worth compressing
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = "br"
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.compressor.process(body) + self.compressor.flush()
+            else:
+                message["body"] = self.compressor.process(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        # Remaining chunks of a streamed response
+        if more_body:
+            message["body"] = self.compressor.process(body) + self.compressor.flush()
+        else:
+            message["body"] = self.compressor.process(body) + self.compressor.finish()
+        await self.send(message)
@@ -0,0 +1,40 @@
+"""
+Metrics middleware - request latency per endpoint and status
+
+Also makes the request's scope available to services (metrics.current_endpoint),
+so stage metrics recorded deep in a request, like LLM latency, carry the endpoint.
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services import metrics
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # The router fills in scope["endpoint"] on this same dict, so the label resolves lazily
+        token = metrics.set_request_scope(scope)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.reset_request_scope(token)
+            metrics.HTTP_REQUEST_SECONDS.labels(metrics.endpoint_name(scope), status).observe(
+                time.perf_counter() - started
+            )
@@ -0,0 +1,59 @@
+"""
+Profiling middleware - profiles requests that ask for it with the admin token
+
+Only installed when PROFILING_TOKEN is set. A request sending
+"X-Profile: sample|cprofile" and "X-Admin-Token: <PROFILING_TOKEN>" is profiled
+and its response carries X-Profile-Id; download the profile from
+/api/debug/profiles/{profile_id}. X-Profile-Status explains skipped profiles.
+"""
+import hmac
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services import metrics, profiling
+
+
+def is_admin(headers: Headers, token: str) -> bool:
+    """Check the X-Admin-Token header in constant time"""
+    return hmac.compare_digest(headers.get("x-admin-token", ""), token)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, token: str) -> None:
+        self.app = app
+        self.token = token
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        mode = headers.get("x-profile")
+        if not mode or not is_admin(headers, self.token):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            profile = profiling.start(mode.strip().lower())
+            status_note = None if profile else "busy"
+        except ValueError:
+            profile, status_note = None, "invalid-mode"
+        status = 500
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = MutableHeaders(raw=message["headers"])
+                if profile is not None:
+                    response_headers["x-profile-id"] = profile.id
+                else:
+                    response_headers["x-profile-status"] = status_note
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            if profile is not None:
+                profile.finish(metrics.endpoint_name(scope), status)
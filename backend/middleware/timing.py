@@ -0,0 +1,46 @@
+"""
+Server-Timing middleware - per-endpoint handler and serialization timings
+
+Adds an "app" entry (time until the response headers were ready) to each
+response's Server-Timing header and records the "serialize" entry written by
+FastJSONResponse in the per-endpoint stats of services.serialization.
+"""
+import re
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services import metrics, serialization
+
+_SERIALIZE_RE = re.compile(r"serialize;dur=([0-9.]+)")
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(raw=message["headers"])
+                server_timing = headers.get("server-timing")
+                match = _SERIALIZE_RE.search(server_timing or "")
+                if match:
+                    serialization.record_timing(
+                        metrics.endpoint_name(scope),
+                        float(match.group(1)),
+                        int(headers.get("content-length", 0))
+                    )
+                app_timing = f"app;dur={app_ms:.3f}"
+                headers["server-timing"] = f"{server_timing}, {app_timing}" if server_timing else app_timing
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
@@ -8,6 +8,12 @@ from typing import List, Optional
 class ChatRequest(BaseModel):
     message: str
     context: Optional[List[str]] = None  # Optional file paths for context
+    use_summaries: bool = False  # Send precomputed symbol summaries instead of full code where available
+    # Restrict retrieval to files under a path prefix, to symbol types and/or to a language
+    path_prefix: Optional[str] = None  # e.g. "backend/services/"
+    types: Optional[List[str]] = None  # e.g. ["class"]
+    language: Optional[str] = None  # e.g. "python"
+    refresh: bool = False  # Skip the answer cache and answer afresh (the new answer replaces the cached one)
 
 
 class Reference(BaseModel):
@@ -20,4 +26,6 @@ class Reference(BaseModel):
 class ChatResponse(BaseModel):
     answer: str
     references: List[Reference] = []
+    cached: bool = False  # True when answered from the answer cache
+    cached_question: Optional[str] = None  # The earlier question whose answer was reused
 
@@ -2,7 +2,7 @@
 Explain models
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class ExplainRequest(BaseModel):
@@ -16,4 +16,5 @@ class ExplainResponse(BaseModel):
     explanation: str
     complexity: Optional[str] = None
     issues: Optional[List[str]] = []
+    cached: bool = False  # True when answered from a precomputed symbol summary
 
@@ -1,14 +1,23 @@
 """
 Impact analysis models
 """
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 
-class ImpactRequest(BaseModel):
+class ImpactPages(BaseModel):
+    """Separate pages of affected_symbols and dependencies (the full lists when the limits are None)"""
+    affected_offset: int = Field(0, ge=0)
+    affected_limit: Optional[int] = Field(None, ge=1, le=10000)
+    dependencies_offset: int = Field(0, ge=0)
+    dependencies_limit: Optional[int] = Field(None, ge=1, le=10000)
+
+
+class ImpactRequest(ImpactPages):
     symbol_name: str
     file_path: str
     change_description: Optional[str] = None
+    fields: Optional[List[str]] = None  # Symbol fields to return in the lists (all if None)
 
 
 class ImpactResponse(BaseModel):
@@ -20,3 +29,35 @@ class ImpactResponse(BaseModel):
     analysis: str
     risk_level: str
 
+
+class ImpactTarget(BaseModel):
+    symbol_name: str
+    file_path: str
+
+
+class BatchImpactRequest(ImpactPages):
+    targets: List[ImpactTarget] = Field(..., min_length=1, max_length=500)
+    change_description: Optional[str] = None
+    fields: Optional[List[str]] = None  # Symbol fields to return in the lists (all if None)
+
+
+class BatchImpactResponse(BaseModel):
+    targets: list  # Per target: symbol, affected_count, dependency_count, risk_level
+    unresolved: list  # Targets not found in the call graph
+    affected_symbols: list
+    affected_count: int
+    dependencies: list
+    dependency_count: int
+    analysis: str
+    risk_level: str
+
+
+class DiffImpactRequest(ImpactPages):
+    diff: str = Field(..., min_length=1)  # Unified diff, e.g. `git diff` output
+    side: Literal["old", "new"] = "old"  # Side of the diff the index matches ("old": indexed before the change)
+    change_description: Optional[str] = None
+    fields: Optional[List[str]] = None  # Symbol fields to return in the lists (all if None)
+
+
+class DiffImpactResponse(BatchImpactResponse):
+    files: list  # Per file: file_path, status, changed_lines, symbols, unmapped_lines
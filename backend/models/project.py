@@ -1,7 +1,7 @@
 """
 Project models (Pydantic schemas + DB models)
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -17,7 +17,24 @@ class ProjectResponse(BaseModel):
     description: Optional[str]
     created_at: datetime
     file_count: Optional[int] = 0
+    status: Optional[str] = None  # created, indexing, ready or failed
+    index_generation: int = 0  # Incremented on every completed full or single-file index
+    indexed_at: Optional[datetime] = None
+    error: Optional[str] = None  # Why the last indexing run failed
 
     class Config:
         from_attributes = True
 
+
+class IngestRulesModel(BaseModel):
+    """Zip entries extracted on upload (.gitignore-style globs, matched against paths inside the zip)"""
+    include: List[str] = []  # When set, only matching files are extracted
+    exclude: List[str] = []
+    max_file_bytes: Optional[int] = Field(None, gt=0)  # Defaults to INGEST_MAX_FILE_BYTES
+    use_gitignore: bool = True  # Honor .gitignore files found in the zip
+    skip_generated: bool = True  # Skip minified bundles, lockfiles and files marked as generated
+
+
+class FileUpdate(BaseModel):
+    file_path: str
+    content: str
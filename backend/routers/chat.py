@@ -5,21 +5,30 @@ import logging
 from fastapi import APIRouter, HTTPException
 from models.chat import ChatRequest, ChatResponse
 from services.chat_service import ChatService
+from services.project_service import ProjectService
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 chat_service = ChatService()
+project_service = ProjectService()
 
 
 @router.post("/projects/{project_id}/chat", response_model=ChatResponse)
 async def chat_with_project(project_id: int, request: ChatRequest):
-    """Chat with AI about the project"""
+    """
+    Chat with AI about the project
+
+    Questions close enough to one already answered on the same index generation are
+    answered from the answer cache (`cached` is true); set `refresh` to bypass it.
+    """
     if not request.message or not request.message.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty")
     
     try:
-        return await chat_service.process_chat(project_id, request)
+        project = project_service.get_project(project_id)
+        index_generation = project.index_generation if project else None
+        return await chat_service.process_chat(project_id, request, index_generation)
     except HTTPException:
         # Re-raise HTTP exceptions (from LLM service, etc.)
         raise
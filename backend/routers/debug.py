@@ -0,0 +1,39 @@
+"""
+Debug router - lists and downloads request profiles (admin token required)
+"""
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from config import PROFILING_TOKEN
+from middleware.profiling import is_admin
+from services import profiling
+
+logger = logging.getLogger(__name__)
+
+
+def require_admin(request: Request):
+    """Reject requests without the profiling admin token"""
+    if not PROFILING_TOKEN or not is_admin(request.headers, PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/debug/profiles")
+def list_profiles():
+    """Stored request profiles, newest first"""
+    return profiling.list_profiles()
+
+
+@router.get("/debug/profiles/{profile_id}")
+def download_profile(profile_id: str):
+    """Download a profile: collapsed stacks (sample) or a pstats file (cprofile)"""
+    try:
+        path = profiling.profile_path(profile_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    media_type = "text/plain" if path.suffix == ".collapsed" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=path.name)
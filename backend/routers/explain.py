@@ -4,12 +4,15 @@ Explain router - handles code explanation requests
 import logging
 from fastapi import APIRouter, HTTPException
 from models.explain import ExplainRequest, ExplainResponse
+from services import summary_service
 from services.explain_service import ExplainService
+from services.project_service import ProjectService
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 explain_service = ExplainService()
+project_service = ProjectService()
 
 
 @router.post("/projects/{project_id}/explain", response_model=ExplainResponse)
@@ -49,3 +52,30 @@ async def explain_code_standalone(request: ExplainRequest):
         logger.error(f"Unexpected error explaining code: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error explaining code: {str(e)}")
 
+
+@router.post("/projects/{project_id}/summaries")
+async def start_summaries(project_id: int):
+    """
+    Start the background job that summarizes every function and class of the project
+
+    Already summarized code is skipped, so the job can be re-run after changes or
+    interruptions. Returns the job progress; a running job is left alone.
+    """
+    try:
+        return project_service.start_summaries(project_id)
+    except ValueError as e:
+        logger.error(f"Cannot start summaries for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error starting summaries for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error starting summaries: {str(e)}")
+
+
+@router.get("/projects/{project_id}/summaries")
+async def get_summaries_status(project_id: int):
+    """Progress of the project's current or last summary job"""
+    try:
+        return summary_service.get_status(str(project_id))
+    except FileNotFoundError as e:
+        logger.error(f"Summaries not found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,8 +1,15 @@
 """
 Files router - handles file listing and content retrieval
 """
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from config import FILE_STREAM_THRESHOLD
+from models.project import FileUpdate
+from services import file_content_service
+from services.serialization import FastJSONResponse
 from services.project_service import ProjectService
 
 logger = logging.getLogger(__name__)
@@ -16,7 +23,7 @@ async def list_project_files(project_id: int):
     """List all files in a project"""
     try:
         files = await project_service.list_files(project_id)
-        return files
+        return FastJSONResponse(files)
     except ValueError as e:
         logger.error(f"Project not found for file listing: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -25,28 +32,111 @@ async def list_project_files(project_id: int):
         raise HTTPException(status_code=500, detail=f"Error listing files: {str(e)}")
 
 
+@router.get("/projects/{project_id}/tree")
+async def list_project_directory(
+    project_id: int,
+    path: str = Query("", description="Directory path relative to the project root (empty for the root)"),
+    offset: int = Query(0, ge=0, description="Index of the first entry to return"),
+    limit: int = Query(200, ge=1, le=1000, description="Maximum number of entries to return")
+):
+    """List one directory of a project (subdirectories first, then files), paginated"""
+    try:
+        return FastJSONResponse(await project_service.list_directory(project_id, path, offset, limit))
+    except FileNotFoundError as e:
+        logger.error(f"Directory not found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Project not found for directory listing: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error listing directory for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error listing directory: {str(e)}")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
 @router.get("/projects/{project_id}/file")
 async def get_project_file(
     project_id: int,
-    file_path: str = Query(..., description="Relative file path within the project")
+    request: Request,
+    file_path: str = Query(..., description="Relative file path within the project"),
+    start_line: Optional[int] = Query(None, ge=1, description="First line to return (1-based)"),
+    end_line: Optional[int] = Query(None, ge=1, description="Last line to return (inclusive)")
 ):
-    """Get the content of a file in a project"""
+    """
+    Get the content of a file in a project
+    
+    Supports line-range reads, conditional requests (ETag / If-None-Match -> 304)
+    and streams files larger than FILE_STREAM_THRESHOLD.
+    """
     if not file_path or not file_path.strip():
         raise HTTPException(status_code=400, detail="file_path cannot be empty")
     
     try:
+        full_path, digest = project_service.resolve_file(project_id, file_path.strip())
+        
+        # The ETag is the content hash, so an unchanged file is never sent twice
+        etag = f'"{digest}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        
+        if start_line is not None or end_line is not None:
+            content, last_line, total_lines = await asyncio.to_thread(
+                file_content_service.read_lines, full_path, start_line or 1, end_line
+            )
+            return FastJSONResponse({
+                "file_path": file_path,
+                "content": content,
+                "start_line": start_line or 1,
+                "end_line": last_line,
+                "total_lines": total_lines
+            }, headers=headers)
+        
+        if full_path.stat().st_size > FILE_STREAM_THRESHOLD:
+            return StreamingResponse(
+                file_content_service.stream_json(full_path, file_path),
+                media_type="application/json",
+                headers=headers
+            )
+        
         content = await project_service.get_file_content(project_id, file_path.strip())
-        return {
+        return FastJSONResponse({
             "file_path": file_path,
             "content": content
-        }
+        }, headers=headers)
     except FileNotFoundError as e:
         logger.error(f"File not found for project {project_id}: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
-        logger.error(f"Invalid file path for project {project_id}: {str(e)}")
+        logger.error(f"Invalid file request for project {project_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error getting file content for project {project_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error getting file content: {str(e)}")
 
+
+@router.put("/projects/{project_id}/file")
+async def update_project_file(project_id: int, update: FileUpdate):
+    """Save a file in a project and re-index just that file"""
+    if not update.file_path or not update.file_path.strip():
+        raise HTTPException(status_code=400, detail="file_path cannot be empty")
+    
+    if not project_service.get_project(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    try:
+        result = await project_service.update_file(project_id, update.file_path.strip(), update.content)
+        return {"message": "File saved and re-indexed", "details": result}
+    except ValueError as e:
+        logger.error(f"Invalid file path for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error updating file for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error updating file: {str(e)}")
@@ -3,8 +3,16 @@ Impact router - handles impact analysis requests
 """
 import logging
 from fastapi import APIRouter, HTTPException
-from models.impact import ImpactRequest, ImpactResponse
-from services.impact_service import analyze_impact
+from models.impact import (
+    BatchImpactRequest,
+    BatchImpactResponse,
+    DiffImpactRequest,
+    DiffImpactResponse,
+    ImpactRequest,
+    ImpactResponse,
+)
+from services.impact_service import analyze_diff_impact, analyze_impact, analyze_impact_batch
+from services.serialization import FastJSONResponse, Page
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +33,13 @@ async def analyze_symbol_impact(project_id: int, request: ImpactRequest):
             str(project_id),
             request.symbol_name.strip(),
             request.file_path.strip(),
-            request.change_description or ""
+            request.change_description or "",
+            fields=request.fields or None,
+            affected_page=Page(request.affected_offset, request.affected_limit),
+            dependencies_page=Page(request.dependencies_offset, request.dependencies_limit)
         )
-        return ImpactResponse(**result)
+        # Validate against the schema, then render with orjson (skips FastAPI's jsonable_encoder)
+        return FastJSONResponse(ImpactResponse(**result).model_dump())
     except FileNotFoundError as e:
         logger.error(f"Graph not found for project {project_id}: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -41,3 +53,61 @@ async def analyze_symbol_impact(project_id: int, request: ImpactRequest):
         logger.error(f"Unexpected error analyzing impact for project {project_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error analyzing impact: {str(e)}")
 
+
+@router.post("/projects/{project_id}/impact/batch", response_model=BatchImpactResponse)
+async def analyze_batch_impact(project_id: int, request: BatchImpactRequest):
+    """Analyze the combined impact of changing several symbols, with one consolidated analysis"""
+    targets = []
+    for target in request.targets:
+        if not target.symbol_name.strip() or not target.file_path.strip():
+            raise HTTPException(status_code=400, detail="symbol_name and file_path cannot be empty")
+        targets.append((target.symbol_name.strip(), target.file_path.strip()))
+    
+    try:
+        result = await analyze_impact_batch(
+            str(project_id),
+            targets,
+            request.change_description or "",
+            fields=request.fields or None,
+            affected_page=Page(request.affected_offset, request.affected_limit),
+            dependencies_page=Page(request.dependencies_offset, request.dependencies_limit)
+        )
+        return FastJSONResponse(BatchImpactResponse(**result).model_dump())
+    except FileNotFoundError as e:
+        logger.error(f"Graph not found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        logger.error(f"No batch impact targets found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error analyzing batch impact for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error analyzing impact: {str(e)}")
+
+
+@router.post("/projects/{project_id}/impact/diff", response_model=DiffImpactResponse)
+async def analyze_diff(project_id: int, request: DiffImpactRequest):
+    """Analyze the impact of a unified diff: changed lines are mapped to their enclosing symbols"""
+    try:
+        result = await analyze_diff_impact(
+            str(project_id),
+            request.diff,
+            request.side,
+            request.change_description or "",
+            fields=request.fields or None,
+            affected_page=Page(request.affected_offset, request.affected_limit),
+            dependencies_page=Page(request.dependencies_offset, request.dependencies_limit)
+        )
+        return FastJSONResponse(DiffImpactResponse(**result).model_dump())
+    except FileNotFoundError as e:
+        logger.error(f"Graph not found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Invalid diff for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error analyzing diff impact for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error analyzing impact: {str(e)}")
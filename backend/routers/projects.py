@@ -3,7 +3,9 @@ Projects router - handles project creation and file uploads
 """
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from typing import List
-from models.project import ProjectCreate, ProjectResponse
+from dataclasses import asdict
+from models.project import IngestRulesModel, ProjectCreate, ProjectResponse
+from services.ingest_filter import IngestRules
 from services.project_service import ProjectService
 
 router = APIRouter()
@@ -48,3 +50,24 @@ async def upload_project(project_id: int, file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error indexing project: {str(e)}")
 
+
+
+@router.get("/projects/{project_id}/ingest-rules", response_model=IngestRulesModel)
+def get_ingest_rules(project_id: int):
+    """Rules deciding which zip entries are extracted on upload"""
+    try:
+        return IngestRulesModel(**asdict(project_service.get_ingest_rules(project_id)))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.put("/projects/{project_id}/ingest-rules", response_model=IngestRulesModel)
+def set_ingest_rules(project_id: int, rules: IngestRulesModel):
+    """Set the rules applied to the project's next uploads"""
+    if not project_service.get_project(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        stored = project_service.set_ingest_rules(project_id, IngestRules(**rules.model_dump()))
+        return IngestRulesModel(**asdict(stored))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
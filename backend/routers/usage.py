@@ -2,7 +2,10 @@
 Usage router - handles symbol usage and call graph queries
 """
 import logging
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
+from services import graph_analytics, graph_store, outline_service
+from services.serialization import FastJSONResponse, Page, parse_fields
 from services.usage_service import get_usage
 
 logger = logging.getLogger(__name__)
@@ -14,7 +17,12 @@ router = APIRouter()
 async def get_symbol_usage(
     project_id: int,
     symbol_name: str = Query(..., description="Name of the symbol (function/method)"),
-    file_path: str = Query(..., description="Relative file path where the symbol is defined")
+    file_path: str = Query(..., description="Relative file path where the symbol is defined"),
+    fields: Optional[str] = Query(None, description="Comma-separated symbol fields to return (e.g. id,name,file_path)"),
+    calls_offset: int = Query(0, ge=0, description="Index of the first calls entry to return"),
+    calls_limit: Optional[int] = Query(None, ge=1, le=10000, description="Maximum number of calls entries to return"),
+    called_by_offset: int = Query(0, ge=0, description="Index of the first called_by entry to return"),
+    called_by_limit: Optional[int] = Query(None, ge=1, le=10000, description="Maximum number of called_by entries to return")
 ):
     """Get usage information for a symbol (what it calls and what calls it)"""
     if not symbol_name or not symbol_name.strip():
@@ -24,8 +32,15 @@ async def get_symbol_usage(
         raise HTTPException(status_code=400, detail="file_path cannot be empty")
     
     try:
-        result = get_usage(str(project_id), symbol_name.strip(), file_path.strip())
-        return result
+        result = get_usage(
+            str(project_id),
+            symbol_name.strip(),
+            file_path.strip(),
+            fields=parse_fields(fields),
+            calls_page=Page(calls_offset, calls_limit),
+            called_by_page=Page(called_by_offset, called_by_limit)
+        )
+        return FastJSONResponse(result)
     except FileNotFoundError as e:
         logger.error(f"Graph not found for project {project_id}: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -36,3 +51,81 @@ async def get_symbol_usage(
         logger.error(f"Unexpected error getting usage for project {project_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error getting symbol usage: {str(e)}")
 
+
+@router.get("/projects/{project_id}/outline")
+async def get_file_outline(
+    project_id: int,
+    file_path: str = Query(..., description="Relative file path within the project")
+):
+    """Outline of a file: its indexed symbols with line ranges and usage counts, nested by scope"""
+    if not file_path.strip():
+        raise HTTPException(status_code=400, detail="file_path cannot be empty")
+    try:
+        return FastJSONResponse({
+            "file_path": file_path.strip(),
+            "symbols": outline_service.get_outline(str(project_id), file_path.strip())
+        })
+    except FileNotFoundError as e:
+        logger.error(f"Graph not found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error getting outline for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error getting outline: {str(e)}")
+
+
+@router.get("/projects/{project_id}/symbol-at")
+async def get_symbol_at(
+    project_id: int,
+    file_path: str = Query(..., description="Relative file path within the project"),
+    line: int = Query(..., ge=1, description="1-based line number (e.g. the cursor line)")
+):
+    """Innermost indexed symbol enclosing a line, with its usage counts (symbol is null outside symbols)"""
+    if not file_path.strip():
+        raise HTTPException(status_code=400, detail="file_path cannot be empty")
+    try:
+        found = outline_service.symbol_at(str(project_id), file_path.strip(), line)
+        return FastJSONResponse({
+            "file_path": file_path.strip(),
+            "line": line,
+            "symbol": found["symbol"] if found else None,
+            "enclosing": found["enclosing"] if found else [],
+        })
+    except FileNotFoundError as e:
+        logger.error(f"Graph not found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error resolving symbol for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error resolving symbol: {str(e)}")
+
+
+@router.get("/projects/{project_id}/graph/stats")
+async def get_graph_stats(
+    project_id: int,
+    top: int = Query(20, ge=1, le=graph_analytics.STORED_TOP, description="Entries per ranked list")
+):
+    """
+    Call graph analytics: summary counts, hub/central/fan-out symbols, call cycles
+    (strongly connected components) and unreferenced functions
+    """
+    try:
+        return FastJSONResponse(graph_analytics.get_stats(str(project_id), top))
+    except FileNotFoundError as e:
+        logger.error(f"Graph not found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error getting graph stats for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error getting graph stats: {str(e)}")
+
+
+@router.post("/projects/{project_id}/graph/export")
+async def export_graph(project_id: int):
+    """Write the call graph as <project_id>.json next to the binary graph file, for debugging"""
+    try:
+        path = graph_store.export_json(str(project_id))
+        return {"project_id": project_id, "path": str(path), "bytes": path.stat().st_size}
+    except FileNotFoundError as e:
+        logger.error(f"Graph not found for project {project_id}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error exporting graph for project {project_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error exporting graph: {str(e)}")
@@ -0,0 +1,227 @@
+"""
+Admission control - concurrency limits with bounded wait queues for expensive endpoints
+
+Each endpoint class (upload, save, chat, explain, impact) has a gate: a number of
+requests that may run at once and a number that may wait for a slot. Each
+project additionally gets its own, smaller gate per class, so one project
+cannot take every slot. A request that finds a full queue (or waits longer than
+ADMISSION_QUEUE_TIMEOUT) is rejected with a Retry-After estimate instead of
+piling up. Endpoints without a class are never limited.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from config import ADMISSION_LIMITS, ADMISSION_PROJECT_CONCURRENCY, ADMISSION_PROJECT_QUEUE, ADMISSION_QUEUE_TIMEOUT
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest request in the moving average of service time (used for Retry-After)
+_SERVICE_TIME_WEIGHT = 0.2
+_MAX_RETRY_AFTER = 120
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Gate:
+    """At most `limit` holders at a time and at most `max_queue` waiters, served in arrival order"""
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.service_seconds = 1.0  # moving average, refined as requests finish
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def idle(self) -> bool:
+        return self.active == 0 and not self._waiters
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: the queue ahead drained at the average service time"""
+        seconds = self.service_seconds * (self.queued + 1) / max(self.limit, 1)
+        return max(1, min(_MAX_RETRY_AFTER, math.ceil(seconds)))
+
+    async def acquire(self, timeout: float) -> bool:
+        """
+        Take a slot, waiting in the queue if all are busy
+
+        Returns:
+            True if the request had to wait
+
+        Raises:
+            Rejected: If the queue is full or no slot frees up within timeout
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return False
+        if len(self._waiters) >= self.max_queue:
+            raise Rejected("queue full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over as the wait ended: pass it on
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise Rejected("queue timeout", self.retry_after())
+            raise
+        return True
+
+    def release(self, service_seconds: Optional[float] = None):
+        """Give the slot to the next waiter (the active count is unchanged) or free it"""
+        if service_seconds is not None:
+            self.service_seconds += _SERVICE_TIME_WEIGHT * (service_seconds - self.service_seconds)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+def _parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """'chat=8:32,upload=2:4' -> {"chat": (8, 32), "upload": (2, 4)}"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        try:
+            name, values = item.split("=", 1)
+            concurrency, queue = values.split(":", 1)
+            limits[name.strip()] = (int(concurrency), int(queue))
+        except ValueError:
+            logger.error(f"Ignoring invalid ADMISSION_LIMITS entry: {item!r} (expected <class>=<concurrent>:<queued>)")
+    return limits
+
+
+_limits = _parse_limits(ADMISSION_LIMITS)
+_gates: Dict[str, Gate] = {name: Gate(*limit) for name, limit in _limits.items()}
+# Per-project gates, created on demand and dropped when idle: (class, project_id) -> Gate
+_project_gates: Dict[Tuple[str, str], Gate] = {}
+_counts: Dict[str, Dict[str, int]] = {
+    name: {"admitted": 0, "queued": 0, "rejected": 0} for name in _limits
+}
+
+
+def is_limited(endpoint_class: str) -> bool:
+    return endpoint_class in _gates
+
+
+def _project_gate(endpoint_class: str, project_id: str) -> Optional[Gate]:
+    if not ADMISSION_PROJECT_CONCURRENCY:
+        return None
+    key = (endpoint_class, project_id)
+    gate = _project_gates.get(key)
+    if gate is None:
+        limit, queue = _limits[endpoint_class]
+        gate = Gate(min(ADMISSION_PROJECT_CONCURRENCY, limit), min(ADMISSION_PROJECT_QUEUE, queue))
+        _project_gates[key] = gate
+    return gate
+
+
+def _reject(endpoint_class: str, project_id: Optional[str], error: Rejected):
+    _counts[endpoint_class]["rejected"] += 1
+    metrics.ADMISSION_REQUESTS.labels(endpoint_class, "rejected").inc()
+    logger.warning(
+        f"Rejected {endpoint_class} request for project {project_id or '-'} ({error.reason}); "
+        f"retry after {error.retry_after}s"
+    )
+
+
+class Admission:
+    """A request's slots: the project gate is taken first, then the class gate"""
+
+    def __init__(self, endpoint_class: str, project_id: Optional[str] = None):
+        self.endpoint_class = endpoint_class
+        self.project_id = project_id
+        self._held = []
+        self._started = 0.0
+
+    async def acquire(self):
+        """
+        Wait for the request's slots
+
+        Raises:
+            Rejected: If a queue is full or the wait timed out
+        """
+        started = time.perf_counter()
+        gates = [_gates[self.endpoint_class]]
+        project_gate = _project_gate(self.endpoint_class, self.project_id) if self.project_id else None
+        if project_gate is not None:
+            gates.insert(0, project_gate)
+
+        waited = False
+        try:
+            for gate in gates:
+                waited = await gate.acquire(ADMISSION_QUEUE_TIMEOUT) or waited
+                self._held.append(gate)
+        except Rejected as e:
+            self._release()
+            _reject(self.endpoint_class, self.project_id, e)
+            raise
+        except BaseException:
+            self._release()
+            raise
+
+        outcome = "queued" if waited else "admitted"
+        _counts[self.endpoint_class][outcome] += 1
+        metrics.ADMISSION_REQUESTS.labels(self.endpoint_class, outcome).inc()
+        self._started = time.perf_counter()
+        metrics.ADMISSION_WAIT_SECONDS.labels(self.endpoint_class).observe(self._started - started)
+
+    def release(self):
+        """Free the slots once the request is done"""
+        self._release(time.perf_counter() - self._started)
+
+    async def __aenter__(self) -> "Admission":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def _release(self, service_seconds: Optional[float] = None):
+        while self._held:
+            self._held.pop().release(service_seconds)
+        if self.project_id:
+            key = (self.endpoint_class, self.project_id)
+            gate = _project_gates.get(key)
+            if gate is not None and gate.idle:
+                del _project_gates[key]
+
+
+def get_stats() -> Dict:
+    """Limits, current load and cumulative admitted/queued/rejected counts per endpoint class"""
+    stats = {}
+    for name, gate in _gates.items():
+        stats[name] = {
+            "concurrency": gate.limit,
+            "max_queue": gate.max_queue,
+            "active": gate.active,
+            "queued_now": gate.queued,
+            "busy_projects": sum(1 for endpoint_class, _ in _project_gates if endpoint_class == name),
+            "avg_service_seconds": round(gate.service_seconds, 3),
+            **_counts[name],
+        }
+    return stats
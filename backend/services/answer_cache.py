@@ -0,0 +1,195 @@
+"""
+Answer cache - reuses chat answers for questions that ask the same thing
+
+Each project keeps its recent chat answers together with the embedding of
+their question. A question that matches a stored one after normalizing case
+and whitespace is answered without encoding it; otherwise a question whose
+embedding is within CHAT_CACHE_THRESHOLD (cosine similarity) of a stored one
+gets that answer and its references, skipping retrieval and the LLM call.
+
+Entries are only reused for the project's current index generation, and only
+by requests with the same retrieval options (filters, use_summaries). A
+re-index bumps the generation and drops the project's entries. The cache is
+held per worker process, least recently used entries (and projects, beyond
+CHAT_CACHE_MAX_PROJECTS) are evicted first.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+
+from config import CHAT_CACHE_MAX_ENTRIES, CHAT_CACHE_MAX_PROJECTS, CHAT_CACHE_THRESHOLD
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    vector: np.ndarray  # unit length
+    scope: Hashable
+    answer: str
+    references: List  # models.chat.Reference
+    hits: int = 0
+
+
+def normalize_question(question: str) -> str:
+    """Question text compared for exact matches (case and whitespace ignored)"""
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class ProjectAnswers:
+    """
+    Cached answers of one project at one index generation
+
+    Question vectors are rows of one matrix, so a similarity lookup is a single
+    matrix product. The rows stay where they are when entries are used (LRU
+    order is kept by _entries only); a removed entry's row is filled with the
+    last row.
+    """
+
+    _INITIAL_ROWS = 16
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()  # by normalized question, LRU first
+        self._matrix: Optional[np.ndarray] = None  # question vectors; rows past len(_keys) are unused
+        self._keys: List[str] = []  # key of each matrix row
+        self._rows: Dict[str, int] = {}  # matrix row of each key
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find_text(self, question: str, scope: Hashable) -> Optional[CachedAnswer]:
+        """Entry for the same question text (see normalize_question), or None"""
+        with self._lock:
+            key = normalize_question(question)
+            entry = self._entries.get(key)
+            if entry is None or entry.scope != scope:
+                return None
+            return self._hit(key, entry)
+
+    def find_similar(self, vector: np.ndarray, scope: Hashable) -> Optional[CachedAnswer]:
+        """Most similar entry whose question is within the similarity threshold, or None"""
+        with self._lock:
+            if not self._entries:
+                return None
+            similarities = self._similarities(_unit(vector))
+            for row in np.argsort(-similarities):
+                if similarities[row] < CHAT_CACHE_THRESHOLD:
+                    return None
+                key = self._keys[row]
+                entry = self._entries[key]
+                if entry.scope == scope:
+                    return self._hit(key, entry)
+            return None
+
+    def _hit(self, key: str, entry: CachedAnswer) -> CachedAnswer:
+        entry.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def _similarities(self, vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a unit vector to each stored question, by matrix row"""
+        if not self._keys:
+            return np.zeros(0, dtype=np.float32)
+        return self._matrix[:len(self._keys)] @ vector
+
+    def _add(self, key: str, entry: CachedAnswer):
+        if self._matrix is None or len(self._keys) == len(self._matrix):
+            rows = max(self._INITIAL_ROWS, 2 * len(self._keys))
+            matrix = np.empty((min(rows, CHAT_CACHE_MAX_ENTRIES + 1), len(entry.vector)), dtype=np.float32)
+            if self._keys:
+                matrix[:len(self._keys)] = self._matrix[:len(self._keys)]
+            self._matrix = matrix
+        self._rows[key] = len(self._keys)
+        self._matrix[len(self._keys)] = entry.vector
+        self._keys.append(key)
+        self._entries[key] = entry
+
+    def _remove(self, key: str):
+        del self._entries[key]
+        row = self._rows.pop(key)
+        last_key = self._keys.pop()
+        if last_key != key:
+            self._matrix[row] = self._matrix[len(self._keys)]
+            self._keys[row] = last_key
+            self._rows[last_key] = row
+
+    def put(self, question: str, vector: np.ndarray, scope: Hashable, answer: str, references: List):
+        """
+        Store an answer; it replaces stored answers to near-identical questions
+        in the same scope (so a refreshed answer supersedes the old one)
+        """
+        vector = _unit(vector)
+        with self._lock:
+            similarities = self._similarities(vector)
+            superseded = [
+                self._keys[row] for row in np.flatnonzero(similarities >= CHAT_CACHE_THRESHOLD)
+                if self._entries[self._keys[row]].scope == scope
+            ]
+            key = normalize_question(question)
+            if key in self._entries and key not in superseded:
+                superseded.append(key)
+            for superseded_key in superseded:
+                self._remove(superseded_key)
+            self._add(key, CachedAnswer(question, vector, scope, answer, references))
+            while len(self._entries) > CHAT_CACHE_MAX_ENTRIES:
+                self._remove(next(iter(self._entries)))
+
+
+_projects: "OrderedDict[str, ProjectAnswers]" = OrderedDict()  # least recently used first
+_projects_lock = threading.Lock()
+_counts: Dict[str, int] = {"hit": 0, "miss": 0, "refresh": 0}
+
+
+def for_project(project_id: str, generation: int) -> ProjectAnswers:
+    """A project's cached answers, emptied when its index generation changed"""
+    with _projects_lock:
+        answers = _projects.get(project_id)
+        if answers is None or answers.generation != generation:
+            if answers is not None and len(answers):
+                logger.debug(
+                    f"Dropping {len(answers)} cached answers of project {project_id} "
+                    f"(index generation {answers.generation} -> {generation})"
+                )
+            answers = ProjectAnswers(generation)
+            _projects[project_id] = answers
+        _projects.move_to_end(project_id)
+        while len(_projects) > max(CHAT_CACHE_MAX_PROJECTS, 1):
+            evicted, evicted_answers = _projects.popitem(last=False)
+            logger.debug(f"Dropping {len(evicted_answers)} cached answers of project {evicted} (least recently used)")
+        return answers
+
+
+def record(project_id: str, outcome: str):
+    """Count a cache lookup outcome: hit, miss or refresh (lookup skipped on request)"""
+    _counts[outcome] += 1
+    metrics.CHAT_CACHE_REQUESTS.labels(project_id, outcome).inc()
+
+
+def get_stats() -> Dict:
+    """Lookup outcomes and cached answers per project (this worker)"""
+    with _projects_lock:
+        projects = {
+            project_id: {"index_generation": answers.generation, "entries": len(answers)}
+            for project_id, answers in _projects.items()
+        }
+    return {
+        "threshold": CHAT_CACHE_THRESHOLD,
+        "max_entries": CHAT_CACHE_MAX_ENTRIES,
+        "max_projects": CHAT_CACHE_MAX_PROJECTS,
+        **_counts,
+        "projects": projects,
+    }
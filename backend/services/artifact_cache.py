@@ -0,0 +1,265 @@
+"""
+Artifact cache - parse results and embeddings keyed by content hash
+
+Parse results are keyed by the SHA-256 of the file content and the language it
+was parsed as, so an identical file in another project or snapshot is never
+parsed twice. The embedding chunks of a file are keyed by its digest, language
+and path and by the chunking settings, so an unchanged file is not tokenized
+again. Embeddings are keyed by the
+hash of the exact texts sent to the encoder (which include the file path) and the
+embedding backend/model, so cached vectors are only reused when they would come
+out the same. LLM summaries of symbols are keyed by the hash of the symbol's
+normalized code and stored per LLM model.
+
+The cache is bounded by INDEX_CACHE_MAX_BYTES: prune removes the least
+recently used entries (reads refresh an entry's mtime), including those of
+older parser versions and other models, which are never read again.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import (
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_LINES,
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL,
+    INDEX_CACHE_DIR,
+    INDEX_CACHE_MAX_BYTES,
+    OPENAI_MODEL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the parser output changes so stale parse results are ignored
+PARSER_VERSION = "2"
+# Bump when the summary prompt changes so old summaries are regenerated
+SUMMARY_VERSION = "1"
+# Bump when the chunk layout changes so old chunks are rebuilt
+CHUNKER_VERSION = "1"
+
+_SYMBOLS_DIR = INDEX_CACHE_DIR / f"symbols-v{PARSER_VERSION}"
+_VECTORS_DIR = INDEX_CACHE_DIR / "vectors" / f"{EMBEDDING_BACKEND}-{EMBEDDING_MODEL}".replace("/", "__")
+_CHUNKS_DIR = INDEX_CACHE_DIR / f"chunks-v{CHUNKER_VERSION}" / f"{EMBEDDING_BACKEND}-{EMBEDDING_MODEL}".replace("/", "__")
+_SUMMARIES_DIR = INDEX_CACHE_DIR / f"summaries-v{SUMMARY_VERSION}" / OPENAI_MODEL.replace("/", "__")
+
+# prune removes entries until the cache is this share of its bound, so it isn't at the limit again right away
+_PRUNE_TARGET = 0.9
+# maybe_prune runs prune at most this often
+_PRUNE_INTERVAL_SECONDS = 600
+_last_prune = 0.0
+
+
+def _fanout(root: Path, key: str, suffix: str) -> Path:
+    return root / key[:2] / f"{key[2:]}{suffix}"
+
+
+def _atomic_write(path: Path, write):
+    """Write a cache file via a temp file so concurrent readers never see partial data"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _touch(path: Path):
+    """Mark an entry as used, so prune keeps it longer"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _symbols_path(digest: str, language: str) -> Path:
+    return _fanout(_SYMBOLS_DIR, digest, f".{language}.json")
+
+
+def get_symbols(digest: str, language: str) -> Optional[List[Dict]]:
+    """Cached parse result for a file digest parsed as language, or None"""
+    path = _symbols_path(digest, language)
+    try:
+        with open(path, "r") as f:
+            symbols = json.load(f)
+        _touch(path)
+        return symbols
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable parse cache entry {path}: {e}")
+        return None
+
+
+def put_symbols(digest: str, language: str, symbols: List[Dict]):
+    """Store the parse result for a file digest parsed as language"""
+    data = json.dumps(symbols).encode("utf-8")
+    try:
+        _atomic_write(_symbols_path(digest, language), lambda f: f.write(data))
+    except Exception as e:
+        logger.warning(f"Could not cache parse result for {digest}: {e}")
+
+
+def _chunks_path(digest: str, language: str, rel_path: str) -> Path:
+    # The tokenizer is fixed by the directory; the parser and chunk settings are part of the key
+    key = hashlib.sha256(
+        "\0".join([digest, language, rel_path, PARSER_VERSION, str(CHUNK_MAX_TOKENS), str(CHUNK_OVERLAP_LINES)])
+        .encode("utf-8")
+    ).hexdigest()
+    return _fanout(_CHUNKS_DIR, key, ".json")
+
+
+def get_chunks(digest: str, language: str, rel_path: str) -> Optional[Dict]:
+    """Cached chunking.build_file_chunks result for a file digest at rel_path, or None"""
+    path = _chunks_path(digest, language, rel_path)
+    try:
+        with open(path, "r") as f:
+            chunks = json.load(f)
+        _touch(path)
+        return chunks
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable chunk cache entry {path}: {e}")
+        return None
+
+
+def put_chunks(digest: str, language: str, rel_path: str, chunks: Dict):
+    """Store the chunks of a file digest at rel_path"""
+    data = json.dumps(chunks).encode("utf-8")
+    try:
+        _atomic_write(_chunks_path(digest, language, rel_path), lambda f: f.write(data))
+    except Exception as e:
+        logger.warning(f"Could not cache chunks of {rel_path}: {e}")
+
+
+def texts_key(texts: List[str]) -> str:
+    """Cache key for the embeddings of a list of texts"""
+    h = hashlib.sha256()
+    for text in texts:
+        encoded = text.encode("utf-8")
+        h.update(len(encoded).to_bytes(8, "little"))
+        h.update(encoded)
+    return h.hexdigest()
+
+
+def get_vectors(key: str) -> Optional[np.ndarray]:
+    """Cached embedding matrix for a texts_key, or None"""
+    path = _fanout(_VECTORS_DIR, key, ".npy")
+    try:
+        vectors = np.load(path)
+        _touch(path)
+        return vectors
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable embedding cache entry {path}: {e}")
+        return None
+
+
+def put_vectors(key: str, vectors: np.ndarray):
+    """Store the embedding matrix for a texts_key"""
+    try:
+        _atomic_write(_fanout(_VECTORS_DIR, key, ".npy"), lambda f: np.save(f, vectors))
+    except Exception as e:
+        logger.warning(f"Could not cache embeddings for {key}: {e}")
+
+
+def normalize_code(code: str) -> str:
+    """Code with indentation, trailing whitespace and blank lines removed, so an editor selection matches its symbol"""
+    return "\n".join(line.strip() for line in code.splitlines() if line.strip())
+
+
+def summary_key(code: str) -> str:
+    """Cache key for the summary of a symbol's code"""
+    return hashlib.sha256(normalize_code(code).encode("utf-8")).hexdigest()
+
+
+def get_summary(key: str) -> Optional[Dict]:
+    """Cached summary for a summary_key, or None"""
+    path = _fanout(_SUMMARIES_DIR, key, ".json")
+    try:
+        with open(path, "r") as f:
+            summary = json.load(f)
+        _touch(path)
+        return summary
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable summary cache entry {path}: {e}")
+        return None
+
+
+def has_summary(key: str) -> bool:
+    return _fanout(_SUMMARIES_DIR, key, ".json").exists()
+
+
+def put_summary(key: str, summary: Dict):
+    """Store the summary for a summary_key"""
+    data = json.dumps(summary).encode("utf-8")
+    try:
+        _atomic_write(_fanout(_SUMMARIES_DIR, key, ".json"), lambda f: f.write(data))
+    except Exception as e:
+        logger.warning(f"Could not cache summary for {key}: {e}")
+
+
+def prune(max_bytes: int = INDEX_CACHE_MAX_BYTES) -> Dict[str, int]:
+    """
+    Remove the least recently used entries until the cache fits in max_bytes (0 = unbounded)
+
+    Returns:
+        {"files": entries removed, "bytes": bytes freed}
+    """
+    global _last_prune
+    _last_prune = time.monotonic()
+    removed = {"files": 0, "bytes": 0}
+    if max_bytes <= 0:
+        return removed
+    entries = []
+    total = 0
+    for root, _, names in os.walk(INDEX_CACHE_DIR):
+        for name in names:
+            if name.startswith("."):  # an entry being written
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return removed
+
+    entries.sort()
+    target = max_bytes * _PRUNE_TARGET
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed["files"] += 1
+        removed["bytes"] += size
+    logger.info(f"Pruned {removed['files']} cache entries ({removed['bytes']} bytes) from {INDEX_CACHE_DIR}")
+    return removed
+
+
+def maybe_prune() -> Optional[Dict[str, int]]:
+    """prune, unless it ran within the last _PRUNE_INTERVAL_SECONDS (for frequent callers like file saves)"""
+    if _last_prune and time.monotonic() - _last_prune < _PRUNE_INTERVAL_SECONDS:
+        return None
+    return prune()
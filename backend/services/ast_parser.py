@@ -2,8 +2,11 @@
 AST Parser service - extracts symbols (functions, classes, methods) from code
 """
 import ast
-from typing import List, Dict, Set
-from pathlib import Path
+import logging
+from itertools import accumulate
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
 
 
 class ASTParser:
@@ -16,105 +19,171 @@ class ASTParser:
             return []
         else:
             return []
-    
+
+    def parse_source(self, content: str, file_path: str = "<unknown>", language: str = "python") -> List[Dict]:
+        """Parse source code that is already in memory and extract symbols"""
+        if language == "python":
+            return self._parse_python_source(content, file_path)
+        return []
+
     def extract_calls(self, node: ast.AST) -> Set[str]:
         """
         Extract function/method call names from an AST node
-        
+
         Args:
             node: AST node to analyze
-        
+
         Returns:
             Set of called function/method names
         """
         calls = set()
-        
+
         for child in ast.walk(node):
             if isinstance(child, ast.Call):
-                func = child.func
-                
-                if isinstance(func, ast.Name):
-                    # Direct function call: function_name()
-                    calls.add(func.id)
-                elif isinstance(func, ast.Attribute):
-                    # Method call: obj.method_name() or module.function_name()
-                    calls.add(func.attr)
-        
+                name = _call_name(child)
+                if name:
+                    calls.add(name)
+
         return calls
-    
+
     def _parse_python(self, file_path: str) -> List[Dict]:
         """Parse Python file using built-in ast module"""
-        symbols = []
-        
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-            
+        except Exception as e:
+            logger.error(f"Error reading {file_path}: {e}")
+            return []
+
+        return self._parse_python_source(content, file_path)
+
+    def _parse_python_source(self, content: str, file_path: str) -> List[Dict]:
+        """Parse Python source with a single pass over the AST"""
+        try:
             tree = ast.parse(content, filename=file_path)
-            
-            # Only visit top-level nodes to avoid duplicates
-            for node in ast.iter_child_nodes(tree):
-                if isinstance(node, ast.FunctionDef):
-                    calls = self.extract_calls(node)
-                    symbols.append({
-                        "type": "function",
-                        "name": node.name,
-                        "line_start": node.lineno,
-                        "line_end": node.end_lineno or node.lineno,
-                        "code": ast.get_source_segment(content, node) or "",
-                        "calls": list(calls),
-                    })
-                elif isinstance(node, ast.ClassDef):
-                    # Add class definition
-                    class_code = ast.get_source_segment(content, node) or ""
-                    symbols.append({
-                        "type": "class",
-                        "name": node.name,
-                        "line_start": node.lineno,
-                        "line_end": node.end_lineno or node.lineno,
-                        "code": class_code,
-                        "calls": [],  # Classes don't make calls directly
-                    })
-                    
-                    # Also extract methods from the class
-                    for item in node.body:
-                        if isinstance(item, ast.FunctionDef):
-                            method_calls = self.extract_calls(item)
-                            method_code = ast.get_source_segment(content, item) or ""
-                            symbols.append({
-                                "type": "method",
-                                "name": f"{node.name}.{item.name}",
-                                "line_start": item.lineno,
-                                "line_end": item.end_lineno or item.lineno,
-                                "code": method_code,
-                                "calls": list(method_calls),
-                            })
-                        elif isinstance(item, ast.AsyncFunctionDef):
-                            method_calls = self.extract_calls(item)
-                            method_code = ast.get_source_segment(content, item) or ""
-                            symbols.append({
-                                "type": "async_method",
-                                "name": f"{node.name}.{item.name}",
-                                "line_start": item.lineno,
-                                "line_end": item.end_lineno or item.lineno,
-                                "code": method_code,
-                                "calls": list(method_calls),
-                            })
-                elif isinstance(node, ast.AsyncFunctionDef):
-                    calls = self.extract_calls(node)
-                    symbols.append({
-                        "type": "async_function",
-                        "name": node.name,
-                        "line_start": node.lineno,
-                        "line_end": node.end_lineno or node.lineno,
-                        "code": ast.get_source_segment(content, node) or "",
-                        "calls": list(calls),
-                    })
-        
+            visitor = _SymbolVisitor(content)
+            visitor.visit(tree)
+            return visitor.symbols
         except SyntaxError as e:
-            print(f"Syntax error in {file_path}: {e}")
+            logger.warning(f"Syntax error in {file_path}: {e}")
         except Exception as e:
-            print(f"Error parsing {file_path}: {e}")
-        
-        return symbols
+            logger.error(f"Error parsing {file_path}: {e}")
+        return []
+
+
+def _call_name(node: ast.Call) -> Optional[str]:
+    """Name of the called function: `function_name()` or `obj.method_name()`"""
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+class _SymbolVisitor(ast.NodeVisitor):
+    """
+    Collects every function, method and class (including nested ones) in one traversal
+
+    Symbol source is sliced through a table of line start offsets instead of
+    ast.get_source_segment, which re-splits the whole file on every call. Calls
+    are attributed to every enclosing function while walking.
+    """
+
+    def __init__(self, content: str):
+        self.symbols: List[Dict] = []
+        # ast column offsets are UTF-8 byte offsets, so slice the encoded source
+        self._source = content.encode("utf-8")
+        self._line_offsets = [0] + list(accumulate(len(line) for line in self._source.splitlines(keepends=True)))
+        # Enclosing definitions: (kind, qualified name, symbol dict)
+        self._scopes: List[tuple] = []
+
+    def _segment(self, node: ast.AST) -> str:
+        """Source text of a node, equivalent to ast.get_source_segment"""
+        end_lineno = getattr(node, "end_lineno", None)
+        end_col_offset = getattr(node, "end_col_offset", None)
+        if end_lineno is None or end_col_offset is None:
+            return ""
+        start = self._line_offsets[node.lineno - 1] + node.col_offset
+        end = self._line_offsets[end_lineno - 1] + end_col_offset
+        return self._source[start:end].decode("utf-8", errors="replace")
+
+    def _qualified_name(self, name: str) -> str:
+        if self._scopes:
+            return f"{self._scopes[-1][1]}.{name}"
+        return name
+
+    def _visit_function(self, node: ast.AST):
+        is_async = isinstance(node, ast.AsyncFunctionDef)
+        in_class = bool(self._scopes) and self._scopes[-1][0] == "class"
+        if in_class:
+            symbol_type = "async_method" if is_async else "method"
+        else:
+            symbol_type = "async_function" if is_async else "function"
+
+        prefix = "async def" if is_async else "def"
+        signature = f"{prefix} {node.name}({ast.unparse(node.args)})"
+        if node.returns is not None:
+            signature += f" -> {ast.unparse(node.returns)}"
+
+        symbol = {
+            "type": symbol_type,
+            "name": self._qualified_name(node.name),
+            "line_start": node.lineno,
+            "line_end": node.end_lineno or node.lineno,
+            "code": self._segment(node),
+            "signature": signature,
+            "docstring": ast.get_docstring(node) or "",
+            "calls": {},  # insertion-ordered set, converted to a list below
+        }
+        self.symbols.append(symbol)
+
+        self._scopes.append(("function", symbol["name"], symbol))
+        self.generic_visit(node)
+        self._scopes.pop()
+        symbol["calls"] = list(symbol["calls"])
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases]
+        bases += [ast.unparse(keyword) for keyword in node.keywords]
+        signature = f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+
+        members = []
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                members.append(item.name)
+            elif isinstance(item, ast.Assign):
+                members.extend(t.id for t in item.targets if isinstance(t, ast.Name))
+            elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                members.append(item.target.id)
+
+        symbol = {
+            "type": "class",
+            "name": self._qualified_name(node.name),
+            "line_start": node.lineno,
+            "line_end": node.end_lineno or node.lineno,
+            "code": self._segment(node),
+            "signature": signature,
+            "docstring": ast.get_docstring(node) or "",
+            "members": members,
+            "calls": [],  # Classes don't make calls directly
+        }
+        self.symbols.append(symbol)
+
+        self._scopes.append(("class", symbol["name"], symbol))
+        self.generic_visit(node)
+        self._scopes.pop()
 
+    def visit_Call(self, node: ast.Call):
+        # Attribute the call to every enclosing function, so a closure's calls are also
+        # the calls of the function defining it (calls directly in class bodies are dropped)
+        if self._scopes and self._scopes[-1][0] == "function":
+            name = _call_name(node)
+            if name:
+                for kind, _, symbol in self._scopes:
+                    if kind == "function":
+                        symbol["calls"][name] = None
+        self.generic_visit(node)
@@ -0,0 +1,152 @@
+"""
+Blob store - content-addressed storage for project files
+
+Each distinct file content is stored once under its SHA-256 digest. Project
+source trees reference blobs through hard links (or copies when the store is
+on another filesystem), so vendored libraries and unchanged re-uploads take
+no extra space. Blobs are read-only; writers must replace files rather than
+modify them in place.
+
+A blob whose only link is its own path is referenced by no project file any
+more; release and sweep remove such blobs after files were replaced.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple
+
+from config import BLOB_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def digest_bytes(data: bytes) -> str:
+    """SHA-256 hex digest of data"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_path(digest: str) -> Path:
+    """Path of the blob with the given digest (two-level fan-out)"""
+    return BLOB_DATA_DIR / digest[:2] / digest[2:]
+
+
+def put_bytes(data: bytes) -> Tuple[str, bool]:
+    """
+    Store data in the blob store
+
+    Args:
+        data: File content
+
+    Returns:
+        (digest, created) - created is False when the content was already stored
+    """
+    digest = digest_bytes(data)
+    path = blob_path(digest)
+    if path.exists():
+        return digest, False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return digest, True
+
+
+def link_into(digest: str, dest: Path) -> bool:
+    """
+    Make dest reference the blob with the given digest, replacing any existing file
+
+    Uses a hard link when possible and falls back to a copy.
+
+    Returns:
+        True if dest is a hard link to the blob, False if it is a copy
+    """
+    source = blob_path(digest)
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dest = dest.with_name(f".{dest.name}.tmp-{os.getpid()}")
+    linked = True
+    try:
+        os.link(source, tmp_dest)
+    except OSError:
+        shutil.copyfile(source, tmp_dest)
+        linked = False
+    os.replace(tmp_dest, dest)
+    return linked
+
+
+def put_file(data: bytes, dest: Path) -> Tuple[str, bool, bool]:
+    """
+    Store data and link it into dest
+
+    Returns:
+        (digest, created, linked) - created like put_bytes, linked like link_into
+    """
+    digest, created = put_bytes(data)
+    try:
+        linked = link_into(digest, dest)
+    except FileNotFoundError:
+        # A sweep removed the (unreferenced) blob before it was linked: store it again
+        digest, created = put_bytes(data)
+        linked = link_into(digest, dest)
+    return digest, created, linked
+
+
+def release(digest: str) -> bool:
+    """
+    Remove a blob if no project file links to it any more
+
+    Returns:
+        True if the blob was removed
+    """
+    path = blob_path(digest)
+    try:
+        if path.stat().st_nlink > 1:
+            return False
+        path.unlink()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def sweep() -> Dict[str, int]:
+    """
+    Remove every blob no project file links to any more
+
+    Source trees hold hard links to their blobs, so a link count of 1 means
+    unreferenced. Blobs of files that were copied (hard links failed) are
+    removed as well; the copies don't need them.
+
+    Returns:
+        {"blobs": blobs removed, "bytes": bytes freed}
+    """
+    removed = {"blobs": 0, "bytes": 0}
+    with os.scandir(BLOB_DATA_DIR) as fanout:
+        directories = [entry.path for entry in fanout if entry.is_dir() and not entry.name.startswith(".")]
+    for directory in directories:
+        with os.scandir(directory) as blobs:
+            for entry in blobs:
+                if entry.name.startswith("."):  # a blob being written
+                    continue
+                try:
+                    stat = entry.stat()
+                    if stat.st_nlink > 1:
+                        continue
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+                removed["blobs"] += 1
+                removed["bytes"] += stat.st_size
+    if removed["blobs"]:
+        logger.info(f"Removed {removed['blobs']} unreferenced blobs ({removed['bytes']} bytes)")
+    return removed
@@ -1,22 +1,73 @@
 """
 Chat service - handles project-aware chat queries using RAG
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
+from config import CHAT_CACHE_ENABLED
 from models.chat import ChatRequest, ChatResponse, Reference
-from services.embedding_service import search
+from services import answer_cache, summary_service
+from services.embedding_service import get_embedding, search_vector
 from services.llm_service import generate_response
 
 
 class ChatService:
-    async def process_chat(self, project_id: int, request: ChatRequest) -> ChatResponse:
-        """Process a chat query with RAG"""
+    async def process_chat(
+        self, project_id: int, request: ChatRequest, index_generation: Optional[int] = None
+    ) -> ChatResponse:
+        """
+        Process a chat query with RAG
+        
+        Args:
+            project_id: Project identifier
+            request: Chat request
+            index_generation: The project's current index generation; the answer cache
+                is only used when it is known
+        """
         project_id_str = str(project_id)
         
+        # Step 0: Answer from the cache when the same question (or one close enough) was
+        # already answered on this index generation with the same retrieval options
+        answers = None
+        scope = (
+            request.use_summaries,
+            request.path_prefix,
+            tuple(sorted(set(request.types))) if request.types else None,
+            request.language,
+        )
+        query_vector = None
+        if CHAT_CACHE_ENABLED and index_generation is not None:
+            answers = answer_cache.for_project(project_id_str, index_generation)
+            if request.refresh:
+                answer_cache.record(project_id_str, "refresh")
+            else:
+                cached = answers.find_text(request.message, scope)
+                if cached is None:
+                    query_vector = get_embedding(request.message)
+                    cached = answers.find_similar(query_vector, scope)
+                answer_cache.record(project_id_str, "miss" if cached is None else "hit")
+                if cached is not None:
+                    return ChatResponse(
+                        answer=cached.answer,
+                        references=cached.references,
+                        cached=True,
+                        cached_question=cached.question,
+                    )
+        if query_vector is None:
+            query_vector = get_embedding(request.message)
+        
         # Step 1: Search for relevant code snippets using embeddings
-        relevant_results = search(project_id_str, request.message, k=5)
+        relevant_results = search_vector(
+            project_id_str,
+            query_vector,
+            k=5,
+            path_prefix=request.path_prefix,
+            types=request.types,
+            language=request.language,
+        )
         
         # Step 2: Build context from relevant snippets
-        context_snippets = self._build_context_snippets(relevant_results)
+        context_snippets = self._build_context_snippets(
+            relevant_results, project_id_str if request.use_summaries else None
+        )
         
         # Step 3: Build LLM prompts
         system_prompt = (
@@ -42,18 +93,41 @@ class ChatService:
             for result in relevant_results
         ]
         
+        if answers is not None:
+            answers.put(request.message, query_vector, scope, answer, references)
+        
         return ChatResponse(answer=answer, references=references)
     
-    def _build_context_snippets(self, results: List[Dict]) -> List[str]:
-        """Build context snippets from search results"""
+    def _build_context_snippets(self, results: List[Dict], summaries_project: Optional[str] = None) -> List[str]:
+        """
+        Build context snippets from search results
+        
+        With summaries_project set, symbols that have a precomputed summary are sent as
+        that summary (once per symbol, however many of its chunks matched) instead of code.
+        """
         snippets = []
+        summarized = set()
         for result in results:
-            snippet = (
+            header = (
                 f"File: {result.get('file_path', 'unknown')}\n"
                 f"Symbol: {result.get('type', 'unknown')} {result.get('name', 'unknown')}\n"
-                f"Lines: {result.get('line_start', 0)}-{result.get('line_end', 0)}\n"
-                f"Code:\n{result.get('code', '')}\n"
             )
+            summary = None
+            if summaries_project is not None:
+                symbol = (result.get("file_path"), result.get("name"))
+                if symbol in summarized:
+                    continue
+                summary = summary_service.find_by_symbol(summaries_project, *symbol)
+                if summary is not None:
+                    summarized.add(symbol)
+            if summary is not None:
+                snippet = f"{header}Summary: {summary['summary']}\n"
+            else:
+                snippet = (
+                    f"{header}"
+                    f"Lines: {result.get('line_start', 0)}-{result.get('line_end', 0)}\n"
+                    f"Code:\n{result.get('code', '')}\n"
+                )
             snippets.append(snippet)
         return snippets
     
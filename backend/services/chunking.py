@@ -0,0 +1,178 @@
+"""
+Chunking service - turns parsed symbols into the text chunks that get embedded
+
+Classes are represented by their signature, docstring and member list instead of
+their full body (the methods are indexed as symbols of their own). Functions that
+would overflow the encoder's max sequence length are split into overlapping line
+windows, each mapped back to its line range in the file.
+
+Tokens are counted with the embedding backend's own tokenizer, so a chunk that
+fits is never silently truncated by the encoder. The texts of a whole file are
+tokenized together, in at most two backend calls.
+"""
+from typing import Dict, List
+
+from config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_LINES
+from services import embedding_service
+
+
+def max_chunk_tokens() -> int:
+    """Token budget of one chunk: CHUNK_MAX_TOKENS, capped at the encoder's max sequence length"""
+    limit = embedding_service.max_seq_length()
+    return min(CHUNK_MAX_TOKENS, limit) if CHUNK_MAX_TOKENS > 0 else limit
+
+
+def _header(rel_path: str, symbol: Dict) -> str:
+    return (
+        f"File: {rel_path}\n"
+        f"Symbol: {symbol.get('name', 'unknown')}\n"
+        f"Type: {symbol.get('type', 'unknown')}\n"
+    )
+
+
+def _class_summary(symbol: Dict) -> str:
+    """Signature, docstring and member list of a class"""
+    summary = symbol.get("signature") or f"class {symbol.get('name', 'unknown')}"
+    docstring = symbol.get("docstring")
+    if docstring:
+        summary += f"\n    \"\"\"{docstring}\"\"\""
+    members = symbol.get("members") or []
+    if members:
+        summary += f"\n    # Members: {', '.join(members)}"
+    return summary
+
+
+def _line_windows(costs: List[int], budget: int, overlap: int) -> List[tuple]:
+    """
+    Split lines into windows that fit the token budget
+
+    Args:
+        costs: Token count of each line
+        budget: Tokens available for the lines of one window
+        overlap: Lines shared between consecutive windows
+
+    Returns:
+        List of (first_line_index, last_line_index) pairs, inclusive and 0-based
+    """
+    windows = []
+    start = 0
+    while start < len(costs):
+        end = start
+        used = costs[start]
+        while end + 1 < len(costs):
+            cost = costs[end + 1]
+            if used + cost > budget:
+                break
+            used += cost
+            end += 1
+        windows.append((start, end))
+        if end + 1 >= len(costs):
+            break
+        # Step back by `overlap` lines, but always make progress
+        start = max(end + 1 - overlap, start + 1)
+    return windows
+
+
+def full_text(symbol: Dict, rel_path: str) -> str:
+    """Text that would be embedded for a symbol without chunking"""
+    return f"{_header(rel_path, symbol)}Code:\n{symbol.get('code', '')}"
+
+
+def _chunk(symbol_index: int, text: str, code: str, line_start: int, line_end: int, chunk_index: int = 0) -> Dict:
+    return {
+        "symbol": symbol_index,
+        "text": text,
+        "code": code,
+        "line_start": line_start,
+        "line_end": line_end,
+        "chunk_index": chunk_index,
+    }
+
+
+def build_file_chunks(symbols: List[Dict], rel_path: str) -> Dict:
+    """
+    Build the embedding chunks of every symbol of a file
+
+    Args:
+        symbols: Symbol dictionaries from ASTParser, in file order
+        rel_path: File path relative to the project root
+
+    Returns:
+        {"chunks": [...], "tokens": int, "tokens_without_chunking": int}. Chunks are in
+        symbol order with "symbol" (index into symbols), "text" (sent to the encoder),
+        "code" (stored for retrieval), "line_start", "line_end" and "chunk_index". The
+        token counts are what the encoder consumes (truncated at its max sequence
+        length) for the chunks and for the symbols' unchunked texts.
+    """
+    max_tokens = max_chunk_tokens()
+    limit = embedding_service.max_seq_length()
+
+    # One call for every symbol's full text plus the class summaries
+    full_texts = [full_text(symbol, rel_path) for symbol in symbols]
+    summaries = {
+        index: _class_summary(symbol) for index, symbol in enumerate(symbols) if symbol.get("type") == "class"
+    }
+    summary_texts = {index: f"{_header(rel_path, symbols[index])}Code:\n{summary}" for index, summary in summaries.items()}
+    lengths = embedding_service.token_lengths(full_texts + list(summary_texts.values()))
+    full_lengths = lengths[:len(symbols)]
+    summary_lengths = dict(zip(summary_texts, lengths[len(symbols):]))
+
+    chunks_by_symbol: Dict[int, List[Dict]] = {}
+    tokens = 0
+    long_symbols = []
+    for index, symbol in enumerate(symbols):
+        line_start = symbol.get("line_start", 0)
+        line_end = symbol.get("line_end", 0)
+        if index in summaries:
+            chunks_by_symbol[index] = [_chunk(index, summary_texts[index], summaries[index], line_start, line_end)]
+            tokens += min(summary_lengths[index], limit)
+        elif full_lengths[index] <= max_tokens:
+            chunks_by_symbol[index] = [_chunk(index, full_texts[index], symbol.get("code", ""), line_start, line_end)]
+            tokens += min(full_lengths[index], limit)
+        else:
+            long_symbols.append(index)
+
+    if long_symbols:
+        # Long functions: every window repeats the signature so it stays attributable. Lines are
+        # joined with whitespace, which the tokenizer only splits on, so a window costs its header
+        # (widest line numbers, special tokens included) plus each line's own tokens.
+        headers, lines_by_symbol = {}, {}
+        request = [""]
+        for index in long_symbols:
+            symbol = symbols[index]
+            header = _header(rel_path, symbol)
+            signature = symbol.get("signature", "")
+            headers[index] = f"{header}Signature: {signature}\n" if signature else header
+            lines_by_symbol[index] = symbol.get("code", "").splitlines()
+            last_line = symbol.get("line_start", 0) + len(lines_by_symbol[index])
+            request.append(f"{headers[index]}Lines: {last_line}-{last_line}\nCode:\n")
+            request.extend(lines_by_symbol[index])
+        lengths = embedding_service.token_lengths(request)
+        empty = lengths[0]
+        position = 1
+        for index in long_symbols:
+            lines = lines_by_symbol[index]
+            overhead = lengths[position]
+            costs = [max(length - empty, 0) for length in lengths[position + 1:position + 1 + len(lines)]]
+            position += 1 + len(lines)
+            budget = max(max_tokens - overhead, 16)
+            line_start = symbols[index].get("line_start", 0)
+            chunks = []
+            for chunk_index, (first, last) in enumerate(_line_windows(costs, budget, CHUNK_OVERLAP_LINES)):
+                window_code = "\n".join(lines[first:last + 1])
+                chunks.append(_chunk(
+                    index,
+                    f"{headers[index]}Lines: {line_start + first}-{line_start + last}\nCode:\n{window_code}",
+                    window_code,
+                    line_start + first,
+                    line_start + last,
+                    chunk_index,
+                ))
+                tokens += min(overhead + sum(costs[first:last + 1]), limit)
+            chunks_by_symbol[index] = chunks
+
+    return {
+        "chunks": [chunk for index in range(len(symbols)) for chunk in chunks_by_symbol[index]],
+        "tokens": tokens,
+        "tokens_without_chunking": sum(min(length, limit) for length in full_lengths),
+    }
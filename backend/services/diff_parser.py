@@ -0,0 +1,131 @@
+"""
+Unified diff parser - changed line ranges per file
+
+Parses `git diff` / `diff -u` output into the lines each file's hunks touch,
+on both sides of the diff. Removed lines count as changed on the old side and
+added lines on the new side; a pure insertion (or deletion) marks the line
+before it on the other side, which is the line the change lands next to.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+Ranges = List[Tuple[int, int]]
+
+
+@dataclass
+class FileDiff:
+    old_path: Optional[str]  # None for added files
+    new_path: Optional[str]  # None for deleted files
+    old_lines: List[int] = field(default_factory=list)
+    new_lines: List[int] = field(default_factory=list)
+
+    @property
+    def path(self) -> str:
+        return self.new_path or self.old_path
+
+    def ranges(self, side: str) -> Ranges:
+        """Changed lines of one side ("old" or "new") merged into inclusive (start, end) ranges"""
+        return _to_ranges(self.old_lines if side == "old" else self.new_lines)
+
+
+def _to_ranges(lines: List[int]) -> Ranges:
+    ranges: Ranges = []
+    for line in sorted(set(lines)):
+        if ranges and line == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], line)
+        else:
+            ranges.append((line, line))
+    return ranges
+
+
+def _header_path(value: str) -> Optional[str]:
+    """Path from a ---/+++ header: drops timestamps, quotes and git's a/ b/ prefixes"""
+    path = value.split("\t", 1)[0].strip().strip('"')
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def _mark_one_sided_run(file_diff: FileDiff, removed: int, added: int, old_line: int, new_line: int):
+    """After a run of only removals (or only additions), mark the line before it on the other side"""
+    if removed and not added:
+        file_diff.new_lines.append(max(new_line - 1, 1))
+    elif added and not removed:
+        file_diff.old_lines.append(max(old_line - 1, 1))
+
+
+def parse_unified_diff(text: str) -> List[FileDiff]:
+    """
+    Parse a unified diff
+
+    Args:
+        text: Diff text with ---/+++ file headers and @@ hunks
+
+    Returns:
+        One FileDiff per file with hunks, in diff order
+
+    Raises:
+        ValueError: If the text contains no file with hunks
+    """
+    files: List[FileDiff] = []
+    current: Optional[FileDiff] = None
+    lines = text.splitlines()
+    position = 0
+    while position < len(lines):
+        line = lines[position]
+        position += 1
+        if line.startswith("--- ") and position < len(lines) and lines[position].startswith("+++ "):
+            current = FileDiff(_header_path(line[4:]), _header_path(lines[position][4:]))
+            files.append(current)
+            position += 1
+            continue
+
+        match = _HUNK_RE.match(line)
+        if not match or current is None:
+            continue
+        old_line, new_line = int(match.group(1)), int(match.group(3))
+        old_remaining = int(match.group(2)) if match.group(2) is not None else 1
+        new_remaining = int(match.group(4)) if match.group(4) is not None else 1
+        # An empty side ("-5,0") names the line the other side's lines follow
+        if old_remaining == 0:
+            old_line += 1
+        if new_remaining == 0:
+            new_line += 1
+
+        # Hunk bodies are delimited by their line counts, so removed lines starting with
+        # "--" are never mistaken for file headers
+        removed = added = 0  # size of the current run of changed lines
+        while (old_remaining > 0 or new_remaining > 0) and position < len(lines):
+            body = lines[position]
+            position += 1
+            marker = body[:1]
+            if marker == "\\":  # "\ No newline at end of file"
+                continue
+            if marker == "-":
+                current.old_lines.append(old_line)
+                old_line += 1
+                old_remaining -= 1
+                removed += 1
+            elif marker == "+":
+                current.new_lines.append(new_line)
+                new_line += 1
+                new_remaining -= 1
+                added += 1
+            else:  # context line (also an empty line with its leading space stripped)
+                _mark_one_sided_run(current, removed, added, old_line, new_line)
+                removed = added = 0
+                old_line += 1
+                new_line += 1
+                old_remaining -= 1
+                new_remaining -= 1
+        _mark_one_sided_run(current, removed, added, old_line, new_line)
+
+    files = [f for f in files if f.old_lines or f.new_lines]
+    if not files:
+        raise ValueError("No file changes found in the diff (expected unified diff format)")
+    return files
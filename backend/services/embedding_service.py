@@ -1,22 +1,48 @@
 """
 Embedding Service - handles embeddings generation and FAISS index management
+
+Index files are safe to share between API worker processes: writers serialize on
+a per-project file lock and publish new files with atomic renames, and readers
+memory-map the index and metadata read-only so all workers share the page cache.
 """
 import asyncio
 import json
 import logging
+import os
+import threading
+import time
 import numpy as np
-import faiss
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
-from config import EMBEDDING_MODEL, FAISS_DATA_DIR
+from typing import TYPE_CHECKING, Iterable, List, Dict, Optional, Tuple, Union
+from config import EMBEDDING_BATCH_SIZE, FAISS_DATA_DIR, INDEX_RESIDENT_PROJECTS
+from embeddings.base import EmbeddingBackend
+from embeddings.factory import create_backend
+from services import metrics, vector_metadata
+from services.file_lock import FileLock
+
+if TYPE_CHECKING:
+    import faiss
 
 logger = logging.getLogger(__name__)
 
-# Model will be loaded once at startup
-_model: Optional[SentenceTransformer] = None
+# Embedding backend will be loaded once, on first use (or by the startup prewarm)
+_backend: Optional[EmbeddingBackend] = None
+_backend_lock = threading.Lock()
+
+# Metadata as read by searches: memory-mapped, or a plain dict for legacy JSON metadata
+Metadata = Union[vector_metadata.MappedMetadata, Dict[int, Dict]]
+
+# Metadata stores are rewritten in full once their dead bytes exceed both their live bytes and this
+_MIN_COMPACT_BYTES = 1 << 20
+
+# Loaded indexes kept resident between searches, least recently used first:
+# project_id -> (index file identity, index, metadata); at most INDEX_RESIDENT_PROJECTS entries
+_index_cache: "OrderedDict[str, Tuple[Tuple[int, int], faiss.Index, Metadata]]" = OrderedDict()
+_index_cache_lock = threading.Lock()
 
-# Per-project locks for FAISS index and metadata writes
+# Per-project locks for FAISS index and metadata writes within this process
+# (writes across processes are serialized by the project's write file lock)
 _locks: Dict[str, asyncio.Lock] = {}
 _locks_lock = asyncio.Lock()
 
@@ -29,14 +55,26 @@ async def _get_lock(project_id: str) -> asyncio.Lock:
         return _locks[project_id]
 
 
-def _get_model() -> SentenceTransformer:
-    """Load and return the sentence transformer model (singleton)"""
-    global _model
-    if _model is None:
-        logger.info(f"Loading embedding model: {EMBEDDING_MODEL}")
-        _model = SentenceTransformer(EMBEDDING_MODEL)
-        logger.info("Embedding model loaded successfully")
-    return _model
+def _faiss():
+    """Import faiss on first use so that importing this module stays cheap"""
+    import faiss
+    return faiss
+
+
+def _get_backend() -> EmbeddingBackend:
+    """Load and return the configured embedding backend (singleton)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+                logger.info(f"Using embedding backend: {_backend.name}")
+    return _backend
+
+
+def warm_model() -> None:
+    """Load the embedding backend and run one encode so the first request doesn't pay for it"""
+    _get_backend().encode(["warmup"])
 
 
 def get_embedding(text: str) -> np.ndarray:
@@ -49,69 +87,219 @@ def get_embedding(text: str) -> np.ndarray:
     Returns:
         numpy array of the embedding vector
     """
-    model = _get_model()
-    embedding = model.encode(text, convert_to_numpy=True)
-    return embedding.astype("float32")
+    return get_embeddings([text])[0]
 
 
-def create_or_load_index(project_id: str, dimension: int = 384) -> faiss.IndexFlatL2:
+def get_embeddings(texts: List[str]) -> np.ndarray:
+    """
+    Generate embeddings for a batch of texts
+    
+    Args:
+        texts: Input texts to embed
+    
+    Returns:
+        float32 matrix with one embedding vector per row
+    """
+    backend = _get_backend()
+    with metrics.EMBEDDING_BATCH_SECONDS.labels(backend.name).time():
+        vectors = backend.encode(texts, batch_size=EMBEDDING_BATCH_SIZE)
+    metrics.EMBEDDED_TEXTS.labels(backend.name).inc(len(texts))
+    return vectors
+
+
+def token_lengths(texts: List[str]) -> List[int]:
+    """Token count of each text as the encoder tokenizes it (special tokens included, before truncation)"""
+    return _get_backend().token_lengths(texts)
+
+
+def count_tokens(texts: List[str]) -> int:
+    """Tokens the encoder consumes for texts (after truncation)"""
+    return _get_backend().count_tokens(texts)
+
+
+def max_seq_length() -> int:
+    """Maximum number of tokens the encoder looks at; longer input is truncated"""
+    return _get_backend().max_seq_length
+
+
+def _get_index_path(project_id: str) -> Path:
+    """Get the FAISS index file path for a project"""
+    return FAISS_DATA_DIR / f"{project_id}.index"
+
+
+def create_or_load_index(project_id: str, dimension: Optional[int] = None) -> "faiss.IndexIDMap2":
     """
     Create or load a FAISS index for the given project
     
+    Vectors are stored under stable IDs (IndexIDMap2) so that the vectors of one
+    file can be removed and replaced without rebuilding the whole index.
+    
     Args:
         project_id: Project identifier
-        dimension: Embedding dimension (384 for all-MiniLM-L6-v2)
+        dimension: Embedding dimension of a new index (the active backend's when None)
     
     Returns:
         FAISS index
     """
-    index_path = FAISS_DATA_DIR / f"{project_id}.index"
+    faiss = _faiss()
+    index_path = _get_index_path(project_id)
     
     try:
         if index_path.exists():
             index = faiss.read_index(str(index_path))
+            if not isinstance(index, faiss.IndexIDMap2):
+                index = _to_id_map(index)
             logger.debug(f"Loaded existing FAISS index for project {project_id}")
         else:
-            index = faiss.IndexFlatL2(dimension)
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension or _get_backend().dimension))
             logger.debug(f"Created new FAISS index for project {project_id}")
     except Exception as e:
         logger.error(f"Error loading FAISS index for project {project_id}: {str(e)}")
         # Create a new index if loading fails
-        index = faiss.IndexFlatL2(dimension)
+        index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension or _get_backend().dimension))
     
     return index
 
 
+def _to_id_map(index: "faiss.Index") -> "faiss.IndexIDMap2":
+    """Convert a positional index (written before IDs were used) into an IndexIDMap2 keyed by position"""
+    faiss = _faiss()
+    id_map = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+    if index.ntotal > 0:
+        vectors = index.reconstruct_n(0, index.ntotal)
+        id_map.add_with_ids(vectors, np.arange(index.ntotal, dtype="int64"))
+    return id_map
+
+
 def _get_metadata_path(project_id: str) -> Path:
-    """Get the metadata file path for a project"""
+    """Get the metadata file path (JSON lines) for a project"""
+    return FAISS_DATA_DIR / f"{project_id}.meta.jsonl"
+
+
+def _get_offsets_path(project_id: str) -> Path:
+    """Get the metadata offsets table path for a project"""
+    return FAISS_DATA_DIR / f"{project_id}.meta.npy"
+
+
+def _get_facets_path(project_id: str) -> Path:
+    """Get the metadata facet vocabularies path for a project (used by filtered searches)"""
+    return FAISS_DATA_DIR / f"{project_id}.meta.facets.json"
+
+
+def _get_legacy_metadata_path(project_id: str) -> Path:
+    """Get the path of metadata written as one JSON list (before memory-mapped metadata)"""
     return FAISS_DATA_DIR / f"{project_id}.json"
 
 
-def _load_metadata(project_id: str) -> List[Dict]:
-    """Load metadata for a project"""
+def _get_write_lock(project_id: str) -> FileLock:
+    """File lock held for a whole read-modify-write of a project's index"""
+    return FileLock(FAISS_DATA_DIR / f"{project_id}.write.lock")
+
+
+def _get_swap_lock(project_id: str) -> FileLock:
+    """File lock held exclusively while files are swapped in and shared while readers open them"""
+    return FileLock(FAISS_DATA_DIR / f"{project_id}.lock")
+
+
+def _load_metadata(project_id: str) -> Dict[int, Dict]:
+    """
+    Load metadata for a project
+    
+    Returns:
+        Mapping of vector ID -> metadata dictionary
+    """
     metadata_path = _get_metadata_path(project_id)
+    legacy_path = _get_legacy_metadata_path(project_id)
     try:
         if metadata_path.exists():
-            with open(metadata_path, "r") as f:
-                return json.load(f)
+            return vector_metadata.read_all(metadata_path, _get_offsets_path(project_id))
+        if legacy_path.exists():
+            with open(legacy_path, "r") as f:
+                entries = json.load(f)
+            # Entries written before IDs were used are keyed by their position
+            return {entry.get("id", position): entry for position, entry in enumerate(entries)}
     except json.JSONDecodeError as e:
         logger.error(f"Error parsing metadata JSON for project {project_id}: {str(e)}")
-        return []
+        return {}
     except Exception as e:
         logger.error(f"Error loading metadata for project {project_id}: {str(e)}")
-        return []
-    return []
+        return {}
+    return {}
 
 
-def _save_metadata(project_id: str, metadata: List[Dict]):
-    """Save metadata for a project"""
-    metadata_path = _get_metadata_path(project_id)
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp-{os.getpid()}")
+
+
+def _commit(
+    project_id: str,
+    index: "faiss.Index",
+    metadata: Optional[Dict[int, Dict]] = None,
+    patch: Optional[Tuple[vector_metadata.MappedMetadata, np.ndarray, Dict[int, Dict]]] = None,
+):
+    """
+    Write a project's index and metadata and publish them atomically
+    
+    Files are written to temporary paths first; the renames happen under the
+    exclusive swap lock, so readers always open a matching index and metadata.
+    Must be called with the project's write lock held.
+    
+    Args:
+        project_id: Project identifier
+        index: The updated index
+        metadata: Every entry, written as a new store
+        patch: Or (current store, removed IDs, added entries): the entries are
+            appended to the current data file, and only the offsets table and
+            vocabularies are rewritten
+    """
+    targets = [
+        _get_index_path(project_id),
+        _get_metadata_path(project_id),
+        _get_offsets_path(project_id),
+        _get_facets_path(project_id),
+    ]
+    if patch is not None:
+        # The data file is appended to in place, not replaced
+        del targets[1]
+    tmp_paths = [_tmp_path(path) for path in targets]
+    started = time.perf_counter()
     try:
-        with open(metadata_path, "w") as f:
-            json.dump(metadata, f, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving metadata for project {project_id}: {str(e)}")
+        _faiss().write_index(index, str(tmp_paths[0]))
+        if patch is not None:
+            store, removed_ids, added = patch
+            vector_metadata.append(store, _get_metadata_path(project_id), removed_ids, added, tmp_paths[1], tmp_paths[2])
+        else:
+            vector_metadata.write(metadata, tmp_paths[1], tmp_paths[2], tmp_paths[3])
+        with _get_swap_lock(project_id).hold(exclusive=True):
+            for tmp_path, path in zip(tmp_paths, targets):
+                os.replace(tmp_path, path)
+            _get_legacy_metadata_path(project_id).unlink(missing_ok=True)
+    except BaseException:
+        for tmp_path in tmp_paths:
+            tmp_path.unlink(missing_ok=True)
         raise
+    _release_index(project_id)
+    metrics.INDEX_WRITE_SECONDS.labels(project_id).observe(time.perf_counter() - started)
+
+
+def _appendable_store(project_id: str) -> Optional[vector_metadata.MappedMetadata]:
+    """
+    The project's metadata store if it can be updated by appending, else None
+    
+    Legacy JSON metadata, stores without facet codes and stores that are
+    mostly dead bytes are rewritten in full instead.
+    """
+    metadata_path = _get_metadata_path(project_id)
+    if not metadata_path.exists() or not _get_offsets_path(project_id).exists():
+        return None
+    store = vector_metadata.MappedMetadata(metadata_path, _get_offsets_path(project_id), _get_facets_path(project_id))
+    if not store.appendable:
+        return None
+    dead_bytes = os.path.getsize(metadata_path) - store.live_bytes()
+    if dead_bytes > max(store.live_bytes(), _MIN_COMPACT_BYTES):
+        logger.debug(f"Compacting vector metadata of project {project_id} ({dead_bytes} dead bytes)")
+        return None
+    return store
 
 
 async def add_embeddings(
@@ -128,6 +316,34 @@ async def add_embeddings(
         vectors: List of embedding vectors (numpy arrays)
         metadata: List of metadata dictionaries (one per vector)
     
+    Raises:
+        ValueError: If vectors and metadata don't match in length
+        Exception: If file operations fail
+    """
+    await replace_embeddings(project_id, vectors, metadata, file_paths=[])
+
+
+async def replace_embeddings(
+    project_id: str,
+    vectors: List[np.ndarray],
+    metadata: List[Dict],
+    file_paths: Iterable[str],
+) -> Dict:
+    """
+    Replace the embeddings of some files in place
+    
+    Removes every vector whose metadata file_path is in file_paths, then adds
+    the new vectors under fresh IDs. Thread-safe using per-project locks.
+    
+    Args:
+        project_id: Project identifier
+        vectors: New embedding vectors (numpy arrays)
+        metadata: New metadata dictionaries (one per vector)
+        file_paths: Files whose existing vectors are removed first
+    
+    Returns:
+        Dictionary with "removed" and "added" counts
+    
     Raises:
         ValueError: If vectors and metadata don't match in length
         Exception: If file operations fail
@@ -135,72 +351,274 @@ async def add_embeddings(
     if len(vectors) != len(metadata):
         raise ValueError("Number of vectors must match number of metadata entries")
     
-    if len(vectors) == 0:
-        return
+    file_paths = set(file_paths)
+    if len(vectors) == 0 and not file_paths:
+        return {"removed": 0, "added": 0}
     
     # Get lock for this project
     lock = await _get_lock(project_id)
     
     async with lock:
+        # Serialize with writers in other worker processes (polled, so no pool thread waits on it)
+        write_lock = _get_write_lock(project_id)
+        await write_lock.acquire_async()
         try:
-            # Load or create index
-            dimension = len(vectors[0])
-            index = create_or_load_index(project_id, dimension)
-            
-            # Stack vectors into a matrix
-            vectors_matrix = np.vstack(vectors)
+            store = _appendable_store(project_id)
+            if store is not None:
+                stale_ids = store.select_files(file_paths)
+                next_id = store.max_id() + 1
+            else:
+                existing_metadata = _load_metadata(project_id)
+                # Nothing stored and nothing to add: leave the index untouched
+                if len(vectors) == 0 and not existing_metadata:
+                    return {"removed": 0, "added": 0}
+                stale_ids = np.array(
+                    [vector_id for vector_id, entry in existing_metadata.items() if entry.get("file_path") in file_paths],
+                    dtype="int64",
+                )
+                next_id = max(existing_metadata, default=-1) + 1
             
-            # Add to index
-            index.add(vectors_matrix)
-            logger.debug(f"Added {len(vectors)} embeddings to index for project {project_id}")
-            
-            # Load existing metadata
-            existing_metadata = _load_metadata(project_id)
+            # Load or create index
+            index = create_or_load_index(project_id, len(vectors[0]) if len(vectors) else None)
             
-            # Append new metadata
-            existing_metadata.extend(metadata)
+            # Remove the vectors of the replaced files
+            update_started = time.perf_counter()
+            if len(stale_ids):
+                index.remove_ids(stale_ids)
             
-            # Save metadata
-            _save_metadata(project_id, existing_metadata)
+            # Add new vectors under fresh IDs
+            added: Dict[int, Dict] = {}
+            if len(vectors):
+                ids = np.arange(next_id, next_id + len(vectors), dtype="int64")
+                index.add_with_ids(np.vstack(vectors), ids)
+                added = dict(zip(ids.tolist(), metadata))
+            metrics.INDEX_UPDATE_SECONDS.labels(project_id).observe(time.perf_counter() - update_started)
+            logger.debug(
+                f"Removed {len(stale_ids)} and added {len(vectors)} embeddings for project {project_id}"
+            )
             
-            # Save index
-            index_path = FAISS_DATA_DIR / f"{project_id}.index"
-            faiss.write_index(index, str(index_path))
+            # Save index and metadata; an appendable store only gets the changed rows
+            if store is not None:
+                _commit(project_id, index, patch=(store, stale_ids, added))
+            else:
+                for vector_id in stale_ids.tolist():
+                    del existing_metadata[vector_id]
+                existing_metadata.update(added)
+                _commit(project_id, index, existing_metadata)
             logger.debug(f"Saved FAISS index and metadata for project {project_id}")
+            return {"removed": len(stale_ids), "added": len(vectors)}
         except Exception as e:
-            logger.error(f"Error adding embeddings for project {project_id}: {str(e)}")
+            logger.error(f"Error replacing embeddings for project {project_id}: {str(e)}")
             raise
+        finally:
+            write_lock.release()
+
+
+async def reset_embeddings(project_id: str):
+    """Delete a project's FAISS index and metadata (used before a full re-index)"""
+    lock = await _get_lock(project_id)
+    async with lock:
+        write_lock = _get_write_lock(project_id)
+        await write_lock.acquire_async()
+        try:
+            with _get_swap_lock(project_id).hold(exclusive=True):
+                for path in (
+                    _get_index_path(project_id),
+                    _get_metadata_path(project_id),
+                    _get_offsets_path(project_id),
+                    _get_facets_path(project_id),
+                    _get_legacy_metadata_path(project_id),
+                ):
+                    path.unlink(missing_ok=True)
+            _release_index(project_id)
+        finally:
+            write_lock.release()
+
+
+def _release_index(project_id: str):
+    """Drop a project's resident index; searches still using it keep it alive until they finish"""
+    with _index_cache_lock:
+        _index_cache.pop(project_id, None)
+
+
+def _cached_index(project_id: str, identity: Tuple[int, int]) -> Optional[Tuple["faiss.Index", Metadata]]:
+    """Resident (index, metadata) of a project if it was loaded from the file with this identity"""
+    with _index_cache_lock:
+        cached = _index_cache.get(project_id)
+        if cached is None or cached[0] != identity:
+            return None
+        _index_cache.move_to_end(project_id)
+        return cached[1], cached[2]
 
 
-def search(project_id: str, query: str, k: int = 5) -> List[Dict]:
+def _cache_index(project_id: str, identity: Tuple[int, int], index: "faiss.Index", metadata: Metadata):
+    """Keep a loaded index resident, releasing the least recently used ones beyond INDEX_RESIDENT_PROJECTS"""
+    with _index_cache_lock:
+        _index_cache[project_id] = (identity, index, metadata)
+        _index_cache.move_to_end(project_id)
+        while len(_index_cache) > max(INDEX_RESIDENT_PROJECTS, 1):
+            evicted, _ = _index_cache.popitem(last=False)
+            logger.debug(f"Released the resident FAISS index of project {evicted}")
+
+
+def _file_identity(path: Path) -> Tuple[int, int]:
+    """(inode, mtime in ns) - changes whenever a writer renames a new file into place"""
+    stat = path.stat()
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _read_index_mapped(index_path: Path) -> "faiss.Index":
+    """
+    Read an index read-only, memory-mapping its vectors where this faiss version supports it
+    
+    IO_FLAG_MMAP_IFC maps the vectors of flat indexes straight from the file, so worker
+    processes share one page-cache copy. Older faiss versions only map IVF lists and
+    fall back to reading the vectors into memory.
+    """
+    faiss = _faiss()
+    mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    index = faiss.read_index(str(index_path), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+    if not isinstance(index, faiss.IndexIDMap2):
+        index = _to_id_map(index)
+    return index
+
+
+def _load_index_and_metadata(project_id: str) -> Optional[Tuple["faiss.Index", Metadata]]:
+    """
+    Return the project's index and metadata, reusing the resident copy while the index file is unchanged
+    
+    Returns:
+        (index, metadata) tuple, or None if the index or metadata file doesn't exist
+    """
+    index_path = _get_index_path(project_id)
+    
+    # Writers replace the index and metadata together, so the index file identifies both
+    try:
+        cached = _cached_index(project_id, _file_identity(index_path))
+        if cached is not None:
+            return cached
+    except FileNotFoundError:
+        pass
+    
+    # Hold the swap lock (shared) while opening so a writer can't swap files in between
+    with _get_swap_lock(project_id).hold(exclusive=False):
+        # Handle missing index file gracefully
+        if not index_path.exists():
+            logger.debug(f"FAISS index not found for project {project_id}")
+            return None
+        
+        metadata_path = _get_metadata_path(project_id)
+        if metadata_path.exists():
+            metadata = vector_metadata.MappedMetadata(
+                metadata_path, _get_offsets_path(project_id), _get_facets_path(project_id)
+            )
+        elif _get_legacy_metadata_path(project_id).exists():
+            metadata = _load_metadata(project_id)
+        else:
+            # Handle missing metadata file gracefully
+            logger.debug(f"Metadata file not found for project {project_id}")
+            return None
+        
+        identity = _file_identity(index_path)
+        index = _read_index_mapped(index_path)
+    
+    _cache_index(project_id, identity, index, metadata)
+    return index, metadata
+
+
+def warm_index(project_id: str) -> bool:
+    """
+    Load a project's index and metadata into the resident cache
+    
+    Returns:
+        True if the project has an index on disk
+    """
+    return _load_index_and_metadata(project_id) is not None
+
+
+def list_indexed_projects() -> List[str]:
+    """List the project IDs that have a FAISS index on disk"""
+    return sorted(path.stem for path in FAISS_DATA_DIR.glob("*.index"))
+
+
+def search(
+    project_id: str,
+    query: str,
+    k: int = 5,
+    path_prefix: Optional[str] = None,
+    types: Optional[Iterable[str]] = None,
+    language: Optional[str] = None,
+) -> List[Dict]:
     """
     Search for similar code snippets using FAISS
     
+    Filters are applied inside the FAISS search through an ID selector, so only
+    vectors that pass them are compared with the query and k results are returned
+    whenever that many match.
+    
     Args:
         project_id: Project identifier
         query: Search query text
         k: Number of results to return
+        path_prefix: Only search files under this path (e.g. "backend/services/")
+        types: Only search these symbol types (e.g. ["class"])
+        language: Only search files of this language (e.g. "python")
     
     Returns:
         List of metadata dictionaries for top-k matches (empty list if index/metadata don't exist)
     """
-    index_path = FAISS_DATA_DIR / f"{project_id}.index"
-    metadata_path = _get_metadata_path(project_id)
-    
-    # Handle missing index file gracefully
-    if not index_path.exists():
-        logger.debug(f"FAISS index not found for project {project_id}")
-        return []
-    
-    # Handle missing metadata file gracefully
-    if not metadata_path.exists():
-        logger.debug(f"Metadata file not found for project {project_id}")
-        return []
+    vector_filter = vector_metadata.VectorFilter.create(path_prefix, types, language)
+    return _search(project_id, lambda: get_embedding(query), k, vector_filter)
+
+
+def search_vector(
+    project_id: str,
+    query_vector: np.ndarray,
+    k: int = 5,
+    path_prefix: Optional[str] = None,
+    types: Optional[Iterable[str]] = None,
+    language: Optional[str] = None,
+) -> List[Dict]:
+    """Like search(), with an already computed query embedding"""
+    vector_filter = vector_metadata.VectorFilter.create(path_prefix, types, language)
+    return _search(project_id, lambda: query_vector, k, vector_filter)
+
+
+def _search_params(metadata: Metadata, vector_filter: "vector_metadata.VectorFilter"):
+    """
+    FAISS search parameters restricting a search to the vectors matching a filter
     
+    Returns:
+        (params, number of matching vectors); the bitmap backing the selector is
+        attached to params so it lives as long as the search
+    """
+    faiss = _faiss()
+    ids = vector_metadata.select_ids(metadata, vector_filter)
+    if len(ids) == 0:
+        return None, 0
+    # Vector IDs are dense (assigned sequentially), so a bitmap over them is small and O(1) to test
+    membership = np.zeros(int(ids.max()) + 1, dtype=bool)
+    membership[ids] = True
+    bitmap = np.packbits(membership, bitorder="little")
+    params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)))
+    params.bitmap = bitmap
+    return params, len(ids)
+
+
+def _search(
+    project_id: str,
+    embed_query,
+    k: int,
+    vector_filter: Optional["vector_metadata.VectorFilter"] = None,
+) -> List[Dict]:
+    stage_seconds = metrics.SEARCH_STAGE_SECONDS
     try:
         # Load index and metadata
-        index = faiss.read_index(str(index_path))
-        metadata = _load_metadata(project_id)
+        with stage_seconds.labels(project_id, "load").time():
+            loaded = _load_index_and_metadata(project_id)
+        if loaded is None:
+            return []
+        index, metadata = loaded
         
         if index.ntotal == 0:
             logger.debug(f"FAISS index for project {project_id} is empty")
@@ -210,28 +628,36 @@ def search(project_id: str, query: str, k: int = 5) -> List[Dict]:
             logger.debug(f"Metadata for project {project_id} is empty")
             return []
         
-        # Generate query embedding
-        query_embedding = get_embedding(query)
-        query_vector = query_embedding.reshape(1, -1)
+        params, candidates = None, index.ntotal
+        if vector_filter:
+            with stage_seconds.labels(project_id, "filter").time():
+                params, candidates = _search_params(metadata, vector_filter)
+            if candidates == 0:
+                logger.debug(f"No vectors match {vector_filter} in project {project_id}")
+                return []
+        
+        # Generate query embedding (only once we know there is something to search)
+        with stage_seconds.labels(project_id, "encode").time():
+            query_vector = np.asarray(embed_query(), dtype="float32").reshape(1, -1)
         
         # Search
-        distances, indices = index.search(query_vector, min(k, index.ntotal))
+        with stage_seconds.labels(project_id, "faiss").time():
+            distances, indices = index.search(query_vector, min(k, candidates), params=params)
         
         # Return metadata for matched items
         results = []
-        for idx, distance in zip(indices[0], distances[0]):
-            if idx < len(metadata):
-                result = metadata[idx].copy()
-                result["score"] = float(distance)  # Lower is better (L2 distance)
-                results.append(result)
+        with stage_seconds.labels(project_id, "metadata").time():
+            for vector_id, distance in zip(indices[0], distances[0]):
+                entry = metadata.get(int(vector_id))
+                if entry is not None:
+                    result = entry.copy()
+                    result["score"] = float(distance)  # Lower is better (L2 distance)
+                    results.append(result)
         
         logger.debug(f"Found {len(results)} results for query in project {project_id}")
         return results
     
-    except faiss.FaissException as e:
-        logger.error(f"FAISS error searching project {project_id}: {str(e)}")
-        return []
     except Exception as e:
+        # faiss raises RuntimeError subclasses; log and degrade to "no results" like a missing index
         logger.error(f"Error searching embeddings for project {project_id}: {str(e)}")
         return []
-
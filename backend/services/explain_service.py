@@ -3,6 +3,7 @@ Explain service - handles code explanation requests
 """
 from typing import Optional
 from models.explain import ExplainRequest, ExplainResponse
+from services import summary_service
 from services.llm_service import generate_response
 
 
@@ -12,9 +13,21 @@ class ExplainService:
         project_id: Optional[int], 
         request: ExplainRequest
     ) -> ExplainResponse:
-        """Explain code with optional project context"""
-        # For now, use standalone explanation
-        # Later: can use project context for better explanations
+        """
+        Explain code with optional project context
+        
+        A selection that matches an indexed symbol of the project is answered from
+        its precomputed summary, without an LLM call.
+        """
+        if project_id is not None:
+            summary = summary_service.find_by_code(str(project_id), request.code)
+            if summary is not None:
+                return ExplainResponse(
+                    explanation=summary["summary"],
+                    complexity=summary.get("complexity"),
+                    issues=[],
+                    cached=True
+                )
         return await self.explain_code_standalone(request)
     
     async def explain_code_standalone(self, request: ExplainRequest) -> ExplainResponse:
@@ -45,15 +58,9 @@ class ExplainService:
         explanation = await generate_response(system_prompt, user_prompt)
         
         # Parse response to extract complexity and issues (simple heuristic for now)
-        complexity = "medium"  # Default
+        complexity = summary_service.parse_complexity(explanation)
         issues = []
-        
-        # Try to extract complexity from response
         explanation_lower = explanation.lower()
-        if "complexity: low" in explanation_lower or "low complexity" in explanation_lower:
-            complexity = "low"
-        elif "complexity: high" in explanation_lower or "high complexity" in explanation_lower:
-            complexity = "high"
         
         # Try to extract issues (look for common patterns)
         if "issue" in explanation_lower or "pitfall" in explanation_lower or "problem" in explanation_lower:
@@ -0,0 +1,176 @@
+"""
+File content service - line-range reads and streaming for project files
+
+Files are memory-mapped and a per-file line index (byte offset of every line
+start) is built once and cached, so a range read touches only the requested
+lines. Very large files are streamed as a JSON document instead of being
+buffered and decoded in one piece.
+"""
+import codecs
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+# Number of memory-mapped files (with their line index) kept open
+LINE_INDEX_CACHE_SIZE = 64
+# Bytes per chunk when validating encodings or streaming
+_CHUNK_SIZE = 1 << 20
+
+
+class _LineIndex:
+    """Memory map of a file plus the byte offset of each line start"""
+
+    def __init__(self, path: Path):
+        stat = os.stat(path)
+        self.key = (stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        self._file = open(path, "rb")
+        if self.size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            newlines = np.flatnonzero(np.frombuffer(self.data, dtype=np.uint8) == ord("\n"))
+        else:
+            self.data = b""
+            newlines = np.zeros(0, dtype=np.int64)
+        # starts[i] is the offset of line i+1; a trailing newline doesn't start a new line
+        starts = np.concatenate(([0], newlines + 1))
+        if len(starts) > 1 and starts[-1] == self.size:
+            starts = starts[:-1]
+        self.starts = starts
+        self.line_count = len(starts) if self.size else 0
+        # Reads in progress, and whether the cache dropped this index (it is closed once the last read ends)
+        self.readers = 0
+        self.retired = False
+
+    def slice(self, start_line: int, end_line: int) -> bytes:
+        """Bytes of lines start_line..end_line (1-based, inclusive)"""
+        begin = int(self.starts[start_line - 1])
+        end = int(self.starts[end_line]) if end_line < self.line_count else self.size
+        return self.data[begin:end]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+
+_line_indexes: "OrderedDict[str, _LineIndex]" = OrderedDict()
+_line_indexes_lock = threading.Lock()
+
+
+@contextmanager
+def _line_index(path: Path) -> Iterator[_LineIndex]:
+    """
+    Cached line index for path, rebuilt if the file changed, held open while the caller reads it
+
+    An index the cache drops meanwhile (the file changed, or it was evicted) is
+    only closed when its last reader is done.
+    """
+    key = str(path)
+    stat = os.stat(path)
+    with _line_indexes_lock:
+        index = _line_indexes.get(key)
+        if index is not None and index.key == (stat.st_mtime_ns, stat.st_size):
+            _line_indexes.move_to_end(key)
+        else:
+            if index is not None:
+                _retire(_line_indexes.pop(key))
+            index = _LineIndex(path)
+            _line_indexes[key] = index
+            while len(_line_indexes) > LINE_INDEX_CACHE_SIZE:
+                _, evicted = _line_indexes.popitem(last=False)
+                _retire(evicted)
+        index.readers += 1
+    try:
+        yield index
+    finally:
+        with _line_indexes_lock:
+            index.readers -= 1
+            if index.retired and not index.readers:
+                index.close()
+
+
+def _retire(index: _LineIndex):
+    """Close an index dropped from the cache, or leave that to its last reader (call with the lock held)"""
+    index.retired = True
+    if not index.readers:
+        index.close()
+
+
+def decode(data: bytes) -> str:
+    """Decode file bytes as UTF-8, falling back to latin-1 (which never fails)"""
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def read_lines(path: Path, start_line: int, end_line: Optional[int] = None) -> Tuple[str, int, int]:
+    """
+    Read a range of lines from a file
+
+    Args:
+        path: File to read
+        start_line: First line to return (1-based)
+        end_line: Last line to return, inclusive (defaults to the last line)
+
+    Returns:
+        (text, last line actually returned, total line count)
+
+    Raises:
+        ValueError: If the range is invalid
+    """
+    if start_line < 1:
+        raise ValueError("start_line must be >= 1")
+    if end_line is not None and end_line < start_line:
+        raise ValueError("end_line must be >= start_line")
+    with _line_index(path) as index:
+        if start_line > index.line_count:
+            raise ValueError(f"start_line {start_line} is past the end of the file ({index.line_count} lines)")
+        end_line = min(end_line or index.line_count, index.line_count)
+        data = index.slice(start_line, end_line)
+        line_count = index.line_count
+    return decode(data), end_line, line_count
+
+
+def detect_encoding(path: Path) -> str:
+    """Return "utf-8" if the whole file is valid UTF-8, else "latin-1" (checked in bounded memory)"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(_CHUNK_SIZE)
+                if not chunk:
+                    decoder.decode(b"", final=True)
+                    return "utf-8"
+                decoder.decode(chunk)
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def stream_json(path: Path, file_path: str) -> Iterator[bytes]:
+    """
+    Stream {"file_path": ..., "content": ...} for a file without holding it in memory
+
+    The content is decoded and JSON-escaped chunk by chunk.
+    """
+    encoding = detect_encoding(path)
+    decoder = codecs.getincrementaldecoder(encoding)()
+
+    yield f'{{"file_path": {json.dumps(file_path)}, "content": "'.encode("utf-8")
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                # json.dumps of a str is a quoted string; strip the quotes to get the escaped body
+                yield json.dumps(text)[1:-1].encode("utf-8")
+            if not chunk:
+                break
+    yield b'"}'
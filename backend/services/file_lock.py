@@ -0,0 +1,93 @@
+"""
+File locks - cross-process coordination between API workers
+
+Advisory fcntl.flock locks on small lock files next to the data they protect.
+flock locks belong to the open file, so they exclude other threads of the same
+process as well as other worker processes. On platforms without fcntl the
+locks are no-ops and only a single worker process is safe.
+
+Coroutines wait with acquire_async, which polls instead of parking a thread of
+the event loop's default executor on flock: a few waiters would otherwise take
+every thread, including the one the holder needs to finish.
+"""
+import asyncio
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Polling interval of acquire_async: doubled after every failed try, up to the maximum
+_POLL_SECONDS = 0.005
+_MAX_POLL_SECONDS = 0.25
+
+if fcntl is None:
+    logger.warning("fcntl is not available; file locks are disabled (run a single worker)")
+
+
+class FileLock:
+    """An exclusive or shared lock on a lock file; one acquisition per instance at a time"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    def acquire(self, exclusive: bool = True):
+        """Block until the lock is held"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            except BaseException:
+                os.close(fd)
+                raise
+        self._fd = fd
+
+    def try_acquire(self, exclusive: bool = True) -> bool:
+        """Take the lock if it is free; False (without waiting) if another holder has it"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            except BaseException:
+                os.close(fd)
+                raise
+        self._fd = fd
+        return True
+
+    async def acquire_async(self, exclusive: bool = True):
+        """Wait until the lock is held without blocking the event loop or a worker thread"""
+        delay = _POLL_SECONDS
+        while not self.try_acquire(exclusive):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_POLL_SECONDS)
+
+    def release(self):
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def hold(self, exclusive: bool = True) -> Iterator["FileLock"]:
+        self.acquire(exclusive)
+        try:
+            yield self
+        finally:
+            self.release()
@@ -0,0 +1,209 @@
+"""
+Graph analytics - architecture-level signals computed from the call graph
+
+Runs after the call graph is built (and after single-file re-indexes) on a
+sparse adjacency matrix, so every step is vectorized:
+
+- in/out degree (distinct callers/callees)
+- strongly connected components; components with more than one symbol are call cycles
+- PageRank-style centrality, importance flowing from callers to callees
+- unreferenced functions/methods (no callers, minus likely entry points)
+
+Results are stored as <project_id>.stats.json next to the graph.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from config import GRAPH_DATA_DIR
+from services import graph_store, metrics
+
+logger = logging.getLogger(__name__)
+
+# Entries kept in each ranked list of the stored stats
+STORED_TOP = 100
+_DAMPING = 0.85
+_MAX_ITERATIONS = 100
+_TOLERANCE = 1e-8
+_CALLABLE_TYPES = {"function", "async_function", "method", "async_method"}
+
+
+def stats_path(project_id: str) -> Path:
+    """Get the graph stats file path for a project"""
+    return GRAPH_DATA_DIR / f"{project_id}.stats.json"
+
+
+def _adjacency(symbols: List[Dict], edges: List[Dict]):
+    """CSR matrix with A[i, j] = 1 if symbol i calls symbol j (duplicate edges collapsed)"""
+    from scipy import sparse
+
+    n = len(symbols)
+    ids = np.fromiter((symbol["id"] for symbol in symbols), dtype=np.int64, count=n)
+    sources = np.fromiter((edge["from"] for edge in edges), dtype=np.int64, count=len(edges))
+    targets = np.fromiter((edge["to"] for edge in edges), dtype=np.int64, count=len(edges))
+    if not n or not len(edges):
+        return sparse.csr_matrix((n, n), dtype=np.float64)
+
+    # Symbol ID -> row, through a lookup table (IDs are small positive integers)
+    size = int(max(ids.max(), sources.max(), targets.max())) + 1
+    lookup = np.full(size, -1, dtype=np.int64)
+    lookup[ids] = np.arange(n)
+    rows, cols = lookup[sources], lookup[targets]
+    valid = (rows >= 0) & (cols >= 0)
+    rows, cols = rows[valid], cols[valid]
+    matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return matrix
+
+
+def _pagerank(matrix, out_degree: np.ndarray) -> np.ndarray:
+    """Power iteration on the row-normalized adjacency; callees of central callers rank high"""
+    from scipy import sparse
+
+    n = matrix.shape[0]
+    inverse_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=out_degree > 0)
+    transition = (sparse.diags(inverse_degree) @ matrix).T.tocsr()
+    dangling = out_degree == 0
+    rank = np.full(n, 1.0 / n)
+    for _ in range(_MAX_ITERATIONS):
+        # Rank of symbols that call nothing is spread evenly, like a random jump
+        updated = _DAMPING * (transition @ rank + rank[dangling].sum() / n) + (1 - _DAMPING) / n
+        converged = np.abs(updated - rank).sum() < _TOLERANCE
+        rank = updated
+        if converged:
+            break
+    return rank
+
+
+def _is_entry_point(symbol: Dict) -> bool:
+    """Symbols expected to have no callers inside the project"""
+    short_name = symbol["name"].rsplit(".", 1)[-1]
+    return (
+        short_name.startswith("test")
+        or (short_name.startswith("__") and short_name.endswith("__"))
+        or short_name == "main"
+        or os.path.basename(symbol.get("file_path", "")).startswith(("test_", "conftest"))
+    )
+
+
+def compute_stats(graph: Dict) -> Dict:
+    """
+    Compute degree, SCC, centrality and unreferenced-code stats of a call graph
+
+    Returns:
+        Dictionary with summary counts and ranked symbol lists (each capped at STORED_TOP)
+    """
+    from scipy.sparse.csgraph import connected_components
+
+    symbols = graph.get("symbols", [])
+    n = len(symbols)
+    if n == 0:
+        return {"summary": {"symbols": 0, "edges": 0}, "hubs": [], "central": [], "fan_out": [],
+                "cycles": [], "unreferenced": [], "unreferenced_total": 0}
+
+    matrix = _adjacency(symbols, graph.get("edges", []))
+    out_degree = np.diff(matrix.indptr)
+    in_degree = np.bincount(matrix.indices, minlength=n)
+    rank = _pagerank(matrix, out_degree.astype(np.float64))
+    component_count, labels = connected_components(matrix, directed=True, connection="strong")
+    component_sizes = np.bincount(labels, minlength=component_count)
+
+    def describe(i: int) -> Dict:
+        symbol = symbols[i]
+        return {
+            "id": symbol["id"],
+            "name": symbol["name"],
+            "file_path": symbol["file_path"],
+            "type": symbol.get("type", ""),
+            "called_by": int(in_degree[i]),
+            "calls": int(out_degree[i]),
+            "centrality": round(float(rank[i]) * n, 4),  # 1.0 is the average symbol
+        }
+
+    def top(values: np.ndarray) -> List[Dict]:
+        order = np.argsort(-values, kind="stable")[:STORED_TOP]
+        return [describe(int(i)) for i in order if values[i] > 0]
+
+    # Cycles: strongly connected components with more than one symbol, largest first
+    cyclic = np.flatnonzero(component_sizes > 1)
+    cyclic = cyclic[np.argsort(-component_sizes[cyclic], kind="stable")]
+    members = {int(c): [] for c in cyclic[:STORED_TOP]}
+    for i in np.flatnonzero(np.isin(labels, cyclic[:STORED_TOP])):
+        members[int(labels[i])].append(symbols[i])
+    cycles = [
+        {
+            "size": int(component_sizes[c]),
+            "symbols": [{"id": s["id"], "name": s["name"], "file_path": s["file_path"]} for s in members[int(c)][:50]],
+        }
+        for c in cyclic[:STORED_TOP]
+    ]
+
+    unreferenced = [
+        {"id": symbols[i]["id"], "name": symbols[i]["name"], "file_path": symbols[i]["file_path"],
+         "type": symbols[i].get("type", "")}
+        for i in np.flatnonzero(in_degree == 0)
+        if symbols[i].get("type") in _CALLABLE_TYPES and not _is_entry_point(symbols[i])
+    ]
+
+    return {
+        "summary": {
+            "symbols": n,
+            "edges": int(matrix.nnz),
+            "strong_components": int(component_count),
+            "cycles": int(len(cyclic)),
+            "symbols_in_cycles": int(component_sizes[cyclic].sum()),
+            "largest_cycle": int(component_sizes[cyclic].max()) if len(cyclic) else 0,
+            "zero_callers": int((in_degree == 0).sum()),
+            "zero_callees": int((out_degree == 0).sum()),
+            "max_called_by": int(in_degree.max()),
+            "max_calls": int(out_degree.max()),
+        },
+        "hubs": top(in_degree.astype(np.float64)),
+        "central": top(rank),
+        "fan_out": top(out_degree.astype(np.float64)),
+        "cycles": cycles,
+        "unreferenced": unreferenced[:STORED_TOP],
+        "unreferenced_total": len(unreferenced),
+    }
+
+
+def save_stats(project_id: str, graph: Dict) -> Dict:
+    """Compute and persist a project's graph stats (call after saving its graph)"""
+    started = time.perf_counter()
+    stats = compute_stats(graph)
+    stats["computed_seconds"] = round(time.perf_counter() - started, 4)
+    metrics.GRAPH_ANALYTICS_SECONDS.labels(project_id).observe(stats["computed_seconds"])
+
+    path = stats_path(project_id)
+    tmp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f)
+    os.replace(tmp_path, path)
+    return stats
+
+
+def get_stats(project_id: str, top: int = 20) -> Dict:
+    """
+    Stored graph stats of a project, with every ranked list cut to top entries
+
+    Stats are computed from the graph on first use for projects indexed before
+    graph analytics existed.
+
+    Raises:
+        FileNotFoundError: If the project has no call graph
+    """
+    path = stats_path(project_id)
+    if path.exists():
+        with open(path, "r") as f:
+            stats = json.load(f)
+    else:
+        stats = save_stats(project_id, graph_store.load_graph(project_id))
+    for key in ("hubs", "central", "fan_out", "cycles", "unreferenced"):
+        stats[key] = stats[key][:top]
+    return stats
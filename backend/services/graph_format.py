@@ -0,0 +1,314 @@
+"""
+Graph format - the binary, memory-mappable call graph file
+
+A call graph is stored as columnar arrays in one file:
+
+- a string pool: every distinct name, file path, type and call name, sorted by
+  UTF-8 bytes, as one byte array plus an offsets array
+- a symbol table: one row per symbol (ID, pool indexes of its name, file path
+  and type, line range, and a CSR slice of its call names)
+- the edges in CSR form twice: callees by caller row and callers by callee row
+
+Layout: an 8-byte magic, the header length (uint64), a JSON header naming
+each array's dtype, offset and length, then the arrays, 8-byte aligned.
+Readers memory-map the file read-only and wrap the arrays without copying, so
+opening a graph costs the same for 100 symbols as for 100k, and a query only
+decodes the symbols it returns.
+"""
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+_MAGIC = b"CGRAPH\x00\x01"
+_ALIGN = 8
+# Line numbers of symbols without a line range
+_NO_LINE = -1
+
+# Array name -> dtype; rows are symbols unless noted
+_ARRAYS = {
+    "string_offsets": "<i8",  # strings + 1
+    "string_data": "u1",
+    "ids": "<i8",
+    "names": "<i4",
+    "files": "<i4",
+    "types": "<i4",
+    "line_starts": "<i4",
+    "line_ends": "<i4",
+    "call_offsets": "<i8",  # symbols + 1
+    "calls": "<i4",  # pool indexes of call names
+    "out_offsets": "<i8",  # symbols + 1
+    "out_targets": "<i4",  # callee rows
+    "in_offsets": "<i8",  # symbols + 1
+    "in_sources": "<i4",  # caller rows
+}
+
+
+def _csr(rows: np.ndarray, values: np.ndarray, n: int):
+    """(offsets, values) grouping values by row, keeping their order within a row"""
+    order = np.argsort(rows, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=offsets[1:])
+    return offsets, values[order].astype(np.int32)
+
+
+def encode(graph: Dict) -> Dict[str, np.ndarray]:
+    """Columnar arrays of a call graph ({"symbols": [...], "edges": [...]})"""
+    symbols = graph.get("symbols", [])
+    edges = graph.get("edges", [])
+    n = len(symbols)
+
+    strings = set()
+    for symbol in symbols:
+        strings.add(symbol["name"])
+        strings.add(symbol["file_path"])
+        strings.add(symbol["type"])
+        strings.update(symbol.get("calls", []))
+    pool = sorted(strings, key=lambda s: s.encode("utf-8"))
+    encoded = [s.encode("utf-8") for s in pool]
+    index = {s: i for i, s in enumerate(pool)}
+    string_offsets = np.zeros(len(pool) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=string_offsets[1:])
+
+    call_counts = [len(symbol.get("calls", [])) for symbol in symbols]
+    call_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(call_counts, out=call_offsets[1:])
+
+    ids = np.fromiter((symbol["id"] for symbol in symbols), dtype=np.int64, count=n)
+    arrays = {
+        "string_offsets": string_offsets,
+        "string_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "ids": ids,
+        "names": np.fromiter((index[s["name"]] for s in symbols), dtype=np.int32, count=n),
+        "files": np.fromiter((index[s["file_path"]] for s in symbols), dtype=np.int32, count=n),
+        "types": np.fromiter((index[s["type"]] for s in symbols), dtype=np.int32, count=n),
+        "line_starts": np.fromiter(
+            (_NO_LINE if s.get("line_start") is None else s["line_start"] for s in symbols), dtype=np.int32, count=n
+        ),
+        "line_ends": np.fromiter(
+            (_NO_LINE if s.get("line_start") is None else s.get("line_end", s["line_start"]) for s in symbols),
+            dtype=np.int32, count=n,
+        ),
+        "call_offsets": call_offsets,
+        "calls": np.fromiter(
+            (index[call] for s in symbols for call in s.get("calls", [])), dtype=np.int32, count=int(call_offsets[-1])
+        ),
+    }
+
+    # Edges by row; edges to or from unknown IDs can't be represented and are dropped
+    sources = np.fromiter((edge["from"] for edge in edges), dtype=np.int64, count=len(edges))
+    targets = np.fromiter((edge["to"] for edge in edges), dtype=np.int64, count=len(edges))
+    if n and len(edges):
+        size = int(max(ids.max(), sources.max(), targets.max())) + 1
+        lookup = np.full(size, -1, dtype=np.int64)
+        lookup[ids] = np.arange(n)
+        sources, targets = lookup[sources], lookup[targets]
+        valid = (sources >= 0) & (targets >= 0)
+        sources, targets = sources[valid], targets[valid]
+    else:
+        sources = targets = np.zeros(0, dtype=np.int64)
+    arrays["out_offsets"], arrays["out_targets"] = _csr(sources, targets, n)
+    arrays["in_offsets"], arrays["in_sources"] = _csr(targets, sources, n)
+    return arrays
+
+
+def write(graph: Dict, path: Path):
+    """
+    Write a call graph in the binary format
+
+    Callers write to a temporary path and rename it into place.
+    """
+    arrays = encode(graph)
+    entries = {}
+    offset = 0
+    for name, dtype in _ARRAYS.items():
+        array = np.ascontiguousarray(arrays[name], dtype=dtype)
+        arrays[name] = array
+        entries[name] = {"dtype": dtype, "offset": offset, "length": len(array)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        "symbols": len(arrays["ids"]),
+        "edges": len(arrays["out_targets"]),
+        "arrays": entries,
+    }).encode("utf-8")
+    header += b" " * (-(len(_MAGIC) + 8 + len(header)) % _ALIGN)
+
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name in _ARRAYS:
+            data = arrays[name].tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % _ALIGN))
+
+
+class MappedGraph:
+    """Read-only view of a binary call graph file; symbols are decoded to dicts on access"""
+
+    def __init__(self, path: Path):
+        """
+        Raises:
+            ValueError: If the file is not a call graph in this format
+        """
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            if size < len(_MAGIC) + 8:
+                raise ValueError(f"Not a call graph file: {path}")
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"Not a call graph file: {path}")
+        (header_length,) = struct.unpack_from("<Q", self._buffer, len(_MAGIC))
+        start = len(_MAGIC) + 8
+        header = json.loads(self._buffer[start:start + header_length])
+        base = start + header_length
+        for name, entry in header["arrays"].items():
+            array = np.frombuffer(
+                self._buffer, dtype=entry["dtype"], count=entry["length"], offset=base + entry["offset"]
+            )
+            setattr(self, name, array)
+        self.edge_count: int = header["edges"]
+        self._string_cache: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def string(self, index: int) -> str:
+        """String `index` of the pool"""
+        value = self._string_cache.get(index)
+        if value is None:
+            start, end = self.string_offsets[index], self.string_offsets[index + 1]
+            value = self.string_data[start:end].tobytes().decode("utf-8")
+            self._string_cache[index] = value
+        return value
+
+    def string_index(self, value: str) -> Optional[int]:
+        """Pool index of a string (binary search over the sorted pool), or None if absent"""
+        target = value.encode("utf-8")
+        low, high = 0, len(self.string_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            start, end = self.string_offsets[middle], self.string_offsets[middle + 1]
+            if self.string_data[start:end].tobytes() < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.string_offsets) - 1 and self.string(low) == value:
+            return low
+        return None
+
+    def symbol(self, row: int) -> Dict:
+        """Symbol at a row, as stored in the JSON graph"""
+        row = int(row)
+        calls = self.calls[self.call_offsets[row]:self.call_offsets[row + 1]]
+        entry = {
+            "id": int(self.ids[row]),
+            "name": self.string(self.names[row]),
+            "file_path": self.string(self.files[row]),
+            "type": self.string(self.types[row]),
+            "calls": [self.string(call) for call in calls],
+        }
+        if self.line_starts[row] != _NO_LINE:
+            entry["line_start"] = int(self.line_starts[row])
+            entry["line_end"] = int(self.line_ends[row])
+        return entry
+
+    def symbols(self, rows: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Symbols at rows (all symbols when rows is None)"""
+        return [self.symbol(row) for row in (range(len(self)) if rows is None else rows)]
+
+    def symbol_list(self, rows: Sequence[int]) -> "SymbolList":
+        """Symbols at rows, decoded only when accessed"""
+        return SymbolList(self, rows)
+
+    def find(self, name: str, file_path: str) -> Optional[int]:
+        """Row of the first symbol with this name in this file, or None"""
+        name_index = self.string_index(name)
+        file_index = self.string_index(file_path)
+        if name_index is None or file_index is None:
+            return None
+        rows = np.flatnonzero((self.names == name_index) & (self.files == file_index))
+        return int(rows[0]) if len(rows) else None
+
+    def file_rows(self, file_path: str) -> np.ndarray:
+        """Rows of the symbols of one file"""
+        file_index = self.string_index(file_path)
+        if file_index is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.files == file_index)
+
+    def callees(self, row: int) -> np.ndarray:
+        """Rows of the symbols a symbol calls (one per edge)"""
+        return self.out_targets[self.out_offsets[row]:self.out_offsets[row + 1]]
+
+    def callers(self, row: int) -> np.ndarray:
+        """Rows of the symbols calling a symbol (one per edge)"""
+        return self.in_sources[self.in_offsets[row]:self.in_offsets[row + 1]]
+
+    def has_line_ranges(self) -> bool:
+        return bool((self.line_starts != _NO_LINE).any())
+
+    def to_dict(self) -> Dict:
+        """The whole graph as {"symbols": [...], "edges": [...]} (like the JSON graph)"""
+        # Column-wise: the pool is decoded once and every array converted in one call
+        data = self.string_data.tobytes()
+        offsets = self.string_offsets.tolist()
+        pool = [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        ids = self.ids.tolist()
+        calls = [pool[call] for call in self.calls.tolist()]
+        call_offsets = self.call_offsets.tolist()
+        symbols = []
+        for row, (symbol_id, name, file_index, type_index, line_start, line_end) in enumerate(zip(
+            ids, self.names.tolist(), self.files.tolist(), self.types.tolist(),
+            self.line_starts.tolist(), self.line_ends.tolist(),
+        )):
+            entry = {
+                "id": symbol_id,
+                "name": pool[name],
+                "file_path": pool[file_index],
+                "type": pool[type_index],
+                "calls": calls[call_offsets[row]:call_offsets[row + 1]],
+            }
+            if line_start != _NO_LINE:
+                entry["line_start"] = line_start
+                entry["line_end"] = line_end
+            symbols.append(entry)
+        sources = np.repeat(np.arange(len(self)), np.diff(self.out_offsets)).tolist()
+        return {
+            "symbols": symbols,
+            "edges": [{"from": ids[source], "to": ids[target]} for source, target in zip(sources, self.out_targets.tolist())],
+        }
+
+    def close(self):
+        """
+        Drop the arrays and unmap the file; the graph can't be used afterwards
+
+        If a view of the arrays is still referenced elsewhere, the mapping is
+        released when that view is freed instead.
+        """
+        for name in _ARRAYS:
+            self.__dict__.pop(name, None)
+        self._string_cache.clear()
+        try:
+            self._buffer.close()
+        except BufferError:
+            pass
+
+
+class SymbolList(Sequence):
+    """Symbols at some rows of a mapped graph; indexing and slicing decode only what they return"""
+
+    def __init__(self, graph: MappedGraph, rows: Sequence[int]):
+        self._graph = graph
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._graph.symbols(self._rows[item])
+        return self._graph.symbol(self._rows[item])
@@ -0,0 +1,336 @@
+"""
+Graph store - builds, persists, loads and patches per-project call graphs
+
+Graphs are persisted in the binary format of graph_format (<project_id>.graph)
+and memory-mapped once per worker, for up to GRAPH_RESIDENT_PROJECTS projects.
+Queries use the mapped arrays directly; load_graph decodes the whole graph for
+callers that need every symbol.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from config import GRAPH_DATA_DIR, GRAPH_JSON_EXPORT, GRAPH_RESIDENT_PROJECTS
+from services import graph_format, metrics
+from services.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+# Mapped graphs, least recently used first: project_id -> ((inode, mtime) of the graph file, graph)
+_cache: "OrderedDict[str, Tuple[Tuple[int, int], graph_format.MappedGraph]]" = OrderedDict()
+# Graphs dropped from the cache while a query still held them; unmapped once it lets go
+_retired: List[graph_format.MappedGraph] = []
+_cache_lock = threading.Lock()
+
+# Symbol types that can enclose nested symbols
+_FUNCTION_TYPES = {"function", "async_function", "method", "async_method"}
+
+
+def _short_name(name: str) -> str:
+    """Last component of a symbol name ("Service.create_user" -> "create_user")"""
+    return name.rsplit(".", 1)[-1]
+
+
+def _graph_symbol(symbol_id: int, sym: Dict, file_path: str) -> Dict:
+    """Graph entry of a parsed symbol; line ranges are kept for mapping diffs to symbols"""
+    entry = {
+        "id": symbol_id,
+        "name": sym["name"],
+        "file_path": file_path,
+        "type": sym["type"],
+        "calls": list(sym.get("calls", [])),
+    }
+    if sym.get("line_start") is not None:
+        entry["line_start"] = sym["line_start"]
+        entry["line_end"] = sym.get("line_end") or sym["line_start"]
+    return entry
+
+
+def _enclosing_function(symbol: Dict, functions: Set[Tuple[str, str]]) -> Optional[str]:
+    """Qualified name of the function a symbol is nested in ("deco.wrapper" -> "deco"), or None"""
+    name = symbol["name"]
+    while "." in name:
+        name = name.rsplit(".", 1)[0]
+        if (symbol["file_path"], name) in functions:
+            return name
+    return None
+
+
+def _build_name_index(symbols: List[Dict]) -> Dict[Hashable, List[int]]:
+    """
+    Map each short name to the IDs of the symbols it can refer to, in symbol order
+
+    Symbols nested in a function (closures, local classes) can only be called
+    from within it, so they are keyed by (file path, enclosing function, short
+    name) instead of entering the project-wide short name.
+    """
+    functions = {(s["file_path"], s["name"]) for s in symbols if s["type"] in _FUNCTION_TYPES}
+    name_index: Dict[Hashable, List[int]] = {}
+    for symbol in symbols:
+        key: Hashable = _short_name(symbol["name"])
+        scope = _enclosing_function(symbol, functions)
+        if scope is not None:
+            key = (symbol["file_path"], scope, key)
+        name_index.setdefault(key, []).append(symbol["id"])
+    return name_index
+
+
+def _resolve_edges(symbol: Dict, name_index: Dict[Hashable, List[int]]) -> List[Dict]:
+    """
+    Resolve the calls of one symbol to edges
+
+    A call matches a symbol with the same name or a method with that name
+    (e.g. "create_user" matches "Service.create_user"). Symbols nested in the
+    caller or in a function enclosing it are tried first, innermost scope
+    first. Only the first match is used, since calls carry no information
+    about the target's file.
+    """
+    scopes = [symbol["name"]]
+    while "." in scopes[-1]:
+        scopes.append(scopes[-1].rsplit(".", 1)[0])
+    edges = []
+    for call_name in symbol.get("calls", []):
+        candidates = [name_index.get((symbol["file_path"], scope, call_name), []) for scope in scopes]
+        candidates.append(name_index.get(call_name, []))
+        target = next((t for ids in candidates for t in ids if t != symbol["id"]), None)
+        if target is not None:
+            edges.append({"from": symbol["id"], "to": target})
+    return edges
+
+
+def build_graph(symbols_with_calls: List[Dict]) -> Dict:
+    """
+    Build a call graph from symbols and their calls
+
+    Args:
+        symbols_with_calls: List of symbols with name, file_path, type, calls and
+            optionally line_start/line_end
+
+    Returns:
+        Dictionary with "symbols" and "edges" keys
+    """
+    symbols = [_graph_symbol(idx + 1, sym, sym["file_path"]) for idx, sym in enumerate(symbols_with_calls)]
+
+    name_index = _build_name_index(symbols)
+    edges = []
+    for symbol in symbols:
+        edges.extend(_resolve_edges(symbol, name_index))
+
+    return {
+        "symbols": symbols,
+        "edges": edges
+    }
+
+
+def patch_file(graph: Dict, file_path: str, file_symbols: List[Dict]) -> Dict:
+    """
+    Replace the symbols of one file in a call graph and re-resolve the affected edges
+
+    Edges from and to the file's old symbols are dropped. The new symbols get
+    fresh IDs; their calls are resolved, and so are the calls of every other
+    symbol that calls a name defined (before or after) in the file.
+
+    Args:
+        graph: Call graph as returned by build_graph (modified in place)
+        file_path: Relative path of the changed file
+        file_symbols: New symbols of the file with name, type, calls and optionally line_start/line_end
+
+    Returns:
+        The patched graph
+    """
+    symbols = graph.get("symbols", [])
+    edges = graph.get("edges", [])
+
+    removed = [s for s in symbols if s.get("file_path") == file_path]
+    removed_ids = {s["id"] for s in removed}
+    affected_names: Set[str] = {_short_name(s["name"]) for s in removed}
+    affected_names.update(_short_name(s["name"]) for s in file_symbols)
+
+    kept = [s for s in symbols if s["id"] not in removed_ids]
+    next_id = max((s["id"] for s in symbols), default=0) + 1
+    added = [_graph_symbol(next_id + offset, sym, file_path) for offset, sym in enumerate(file_symbols)]
+    symbols = kept + added
+
+    # Symbols whose outgoing edges have to be re-resolved
+    rebuilt = [s for s in kept if affected_names.intersection(s.get("calls", []))]
+    rebuilt_ids = {s["id"] for s in rebuilt}
+
+    edges = [
+        e for e in edges
+        if e["from"] not in removed_ids and e["to"] not in removed_ids and e["from"] not in rebuilt_ids
+    ]
+    name_index = _build_name_index(symbols)
+    for symbol in rebuilt + added:
+        edges.extend(_resolve_edges(symbol, name_index))
+
+    graph["symbols"] = symbols
+    graph["edges"] = edges
+    return graph
+
+
+def graph_path(project_id: str) -> Path:
+    """Get the (binary) graph file path for a project"""
+    return GRAPH_DATA_DIR / f"{project_id}.graph"
+
+
+def json_path(project_id: str) -> Path:
+    """Get the JSON graph path for a project: the debug export, or the graph itself before the binary format"""
+    return GRAPH_DATA_DIR / f"{project_id}.json"
+
+
+def write_lock(project_id: str) -> FileLock:
+    """
+    File lock held across a whole update of a project's graph and the files derived from it
+
+    Covers load, patch, save, outlines, graph stats and the manifest, so two
+    workers saving files of the same project can't drop each other's changes.
+    """
+    return FileLock(GRAPH_DATA_DIR / f"{project_id}.write.lock")
+
+
+def graph_exists(project_id: str) -> bool:
+    return graph_path(project_id).exists() or json_path(project_id).exists()
+
+
+def _write_json(path: Path, graph: Dict):
+    tmp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        json.dump(graph, f)
+    os.replace(tmp_path, path)
+
+
+def save_graph(project_id: str, graph: Dict):
+    """Persist a project's call graph in the binary format (plus the JSON export if GRAPH_JSON_EXPORT is set)"""
+    path = graph_path(project_id)
+    tmp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    try:
+        graph_format.write(graph, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    if GRAPH_JSON_EXPORT:
+        _write_json(json_path(project_id), graph)
+    else:
+        # A stale export (or pre-binary graph) must not be mistaken for the current graph
+        json_path(project_id).unlink(missing_ok=True)
+
+
+def _open(project_id: str) -> graph_format.MappedGraph:
+    """
+    Resident mapped graph of a project, remapped when the graph file changed
+
+    A project indexed before the binary format existed has its JSON graph
+    converted once.
+    """
+    path = graph_path(project_id)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        legacy_path = json_path(project_id)
+        if not legacy_path.exists():
+            logger.debug(f"Graph file not found for project {project_id}")
+            raise FileNotFoundError(f"Call graph not found for project {project_id}. Please index the project first.")
+        try:
+            with open(legacy_path, "r") as f:
+                graph = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing graph JSON for project {project_id}: {str(e)}")
+            raise ValueError(f"Invalid graph data for project {project_id}")
+        logger.info(f"Converting the JSON call graph of project {project_id} to the binary format")
+        save_graph(project_id, graph)
+        stat = path.stat()
+    identity = (stat.st_ino, stat.st_mtime_ns)
+
+    with _cache_lock:
+        graph = _cached_graph(project_id, identity)
+        if graph is None:
+            try:
+                graph = graph_format.MappedGraph(path)
+            except (ValueError, KeyError) as e:
+                logger.error(f"Error reading graph file for project {project_id}: {str(e)}")
+                raise ValueError(f"Invalid graph data for project {project_id}")
+            _cache_graph(project_id, identity, graph)
+            _close_retired()
+        return graph
+
+
+def _cached_graph(project_id: str, identity: Tuple[int, int]) -> Optional[graph_format.MappedGraph]:
+    """Resident graph of a project if it was mapped from the file with this identity (call with _cache_lock held)"""
+    cached = _cache.get(project_id)
+    if cached is None or cached[0] != identity:
+        return None
+    _cache.move_to_end(project_id)
+    return cached[1]
+
+
+def _cache_graph(project_id: str, identity: Tuple[int, int], graph: graph_format.MappedGraph):
+    """
+    Keep a mapped graph resident (call with _cache_lock held)
+
+    The graph it replaces and the least recently used graphs beyond
+    GRAPH_RESIDENT_PROJECTS are retired.
+    """
+    replaced = _cache.pop(project_id, None)
+    if replaced is not None:
+        _retired.append(replaced[1])
+    _cache[project_id] = (identity, graph)
+    while len(_cache) > max(GRAPH_RESIDENT_PROJECTS, 1):
+        evicted, (_, evicted_graph) = _cache.popitem(last=False)
+        _retired.append(evicted_graph)
+        logger.debug(f"Released the mapped call graph of project {evicted}")
+
+
+def _close_retired():
+    """
+    Unmap the retired graphs no query holds any more (call with _cache_lock held)
+
+    A query (e.g. an impact analysis waiting for the LLM) may still use a graph
+    that was replaced or evicted, so a graph is only closed once the retired
+    list holds the last reference to it.
+    """
+    for position in range(len(_retired) - 1, -1, -1):
+        # References: the list and getrefcount's argument
+        if sys.getrefcount(_retired[position]) <= 2:
+            _retired.pop(position).close()
+
+
+def open_graph(project_id: str) -> graph_format.MappedGraph:
+    """
+    Memory-mapped call graph of a project, for queries that only decode the symbols they return
+
+    Raises:
+        FileNotFoundError: If the project has no call graph
+        ValueError: If the graph file can't be read
+    """
+    with metrics.GRAPH_LOAD_SECONDS.labels(project_id).time():
+        return _open(project_id)
+
+
+def load_graph(project_id: str) -> Dict:
+    """
+    Load a project's whole call graph as {"symbols": [...], "edges": [...]}
+
+    Raises:
+        FileNotFoundError: If the graph file doesn't exist
+        ValueError: If the graph file can't be parsed
+    """
+    with metrics.GRAPH_LOAD_SECONDS.labels(project_id).time():
+        return _open(project_id).to_dict()
+
+
+def export_json(project_id: str) -> Path:
+    """
+    Write the JSON export of a project's call graph (for debugging) and return its path
+
+    Raises:
+        FileNotFoundError: If the project has no call graph
+        ValueError: If the graph file can't be read
+    """
+    path = json_path(project_id)
+    _write_json(path, _open(project_id).to_dict())
+    return path
@@ -1,96 +1,73 @@
 """
 Impact Service - analyzes potential impact of changing a symbol using call graph
 """
-import json
 import logging
-from pathlib import Path
-from typing import Dict, List, Set, Any
+from collections import deque
+from typing import Dict, List, Optional, Set, Any, Tuple
 
+import numpy as np
 from fastapi import HTTPException
 
-from config import BACKEND_DIR
+from services import diff_parser, graph_format, graph_store, metrics, serialization, symbol_intervals
 from services.llm_service import generate_response
 
 logger = logging.getLogger(__name__)
 
-GRAPH_DATA_DIR = BACKEND_DIR / "data" / "graph"
-GRAPH_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-
-def _load_graph(project_id: str) -> Dict[str, Any]:
-    """Load call graph for a project"""
-    graph_path = GRAPH_DATA_DIR / f"{project_id}.json"
-    
-    if not graph_path.exists():
-        logger.debug(f"Graph file not found for project {project_id}")
-        raise FileNotFoundError(f"Call graph not found for project {project_id}. Please index the project first.")
-    
-    try:
-        with open(graph_path, "r") as f:
-            graph_data = json.load(f)
-        return graph_data
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing graph JSON for project {project_id}: {str(e)}")
-        raise ValueError(f"Invalid graph data for project {project_id}")
-    except Exception as e:
-        logger.error(f"Error loading graph for project {project_id}: {str(e)}")
-        raise
+def _load_graph(project_id: str) -> graph_format.MappedGraph:
+    """Memory-mapped call graph of a project"""
+    return graph_store.open_graph(project_id)
 
 
-def _find_symbol(symbols: List[Dict], symbol_name: str, file_path: str) -> Dict:
-    """Find a symbol by name and file_path"""
-    for symbol in symbols:
-        if symbol.get("name") == symbol_name and symbol.get("file_path") == file_path:
-            return symbol
-    raise ValueError(f"Symbol '{symbol_name}' not found in file '{file_path}'")
+def _find_symbol(graph: graph_format.MappedGraph, symbol_name: str, file_path: str) -> int:
+    """Row of a symbol by name and file_path"""
+    row = graph.find(symbol_name, file_path)
+    if row is None:
+        raise ValueError(f"Symbol '{symbol_name}' not found in file '{file_path}'")
+    return row
 
 
-def _get_transitive_callers(edges: List[Dict], target_id: int) -> Set[int]:
+def _get_transitive_callers_multi(graph: graph_format.MappedGraph, target_rows: List[int]) -> Dict[int, int]:
     """
-    Get all symbols that call the target symbol (transitive closure)
+    Get the transitive callers of several targets in one traversal
+    
+    Every target is assigned one bit; bits flow from each symbol to its callers,
+    and a symbol is only revisited when it gains new bits, so each symbol is
+    expanded at most once per target instead of once per traversal.
     
     Args:
-        edges: List of edges in the call graph
-        target_id: ID of the target symbol
+        graph: Mapped call graph (callers are read from its reverse CSR arrays)
+        target_rows: Rows of the target symbols; target_rows[i] is bit i
     
     Returns:
-        Set of symbol IDs that call the target (directly or indirectly)
+        Mapping of caller row -> bitmask of the targets it calls (directly or indirectly)
     """
-    callers = set()
-    to_visit = {target_id}
-    
-    # Build reverse adjacency list (who calls whom)
-    reverse_edges: Dict[int, List[int]] = {}
-    for edge in edges:
-        from_id = edge["from"]
-        to_id = edge["to"]
-        if to_id not in reverse_edges:
-            reverse_edges[to_id] = []
-        reverse_edges[to_id].append(from_id)
-    
-    # BFS to find all transitive callers
-    visited = set()
-    while to_visit:
-        current = to_visit.pop()
-        if current in visited:
-            continue
-        visited.add(current)
-        
-        # Add direct callers
-        if current in reverse_edges:
-            for caller_id in reverse_edges[current]:
-                if caller_id not in visited:
-                    callers.add(caller_id)
-                    to_visit.add(caller_id)
-    
-    return callers
+    reached: Dict[int, int] = {}
+    queue = deque((target_row, 1 << bit) for bit, target_row in enumerate(target_rows))
+    while queue:
+        current, bits = queue.popleft()
+        for caller_row in graph.callers(current).tolist():
+            new_bits = bits & ~reached.get(caller_row, 0)
+            if new_bits:
+                reached[caller_row] = reached.get(caller_row, 0) | new_bits
+                queue.append((caller_row, new_bits))
+    # A target never counts as its own caller (call cycles)
+    for bit, target_row in enumerate(target_rows):
+        if target_row in reached:
+            reached[target_row] &= ~(1 << bit)
+            if not reached[target_row]:
+                del reached[target_row]
+    return reached
 
 
 async def analyze_impact(
     project_id: str,
     symbol_name: str,
     file_path: str,
-    change_description: str = ""
+    change_description: str = "",
+    fields: Optional[List[str]] = None,
+    affected_page: serialization.Page = serialization.Page(),
+    dependencies_page: serialization.Page = serialization.Page()
 ) -> Dict[str, Any]:
     """
     Analyze the potential impact of changing a symbol
@@ -100,32 +77,34 @@ async def analyze_impact(
         symbol_name: Name of the symbol to analyze
         file_path: Relative file path where the symbol is defined
         change_description: Optional description of the proposed change
+        fields: Symbol fields to return in affected_symbols/dependencies (all if None)
+        affected_page: Page of affected_symbols to return
+        dependencies_page: Page of dependencies to return
     
     Returns:
-        Dictionary with impact analysis including affected symbols and AI-generated analysis
+        Dictionary with impact analysis including affected symbols and AI-generated analysis;
+        the counts are always the unpaginated totals
     
     Raises:
         FileNotFoundError: If graph file doesn't exist
         ValueError: If symbol not found
     """
     # Load call graph
-    graph_data = _load_graph(project_id)
-    symbols = graph_data.get("symbols", [])
-    edges = graph_data.get("edges", [])
+    graph = _load_graph(project_id)
     
     # Find target symbol
-    target_symbol = _find_symbol(symbols, symbol_name, file_path)
-    target_id = target_symbol["id"]
+    target_row = _find_symbol(graph, symbol_name, file_path)
+    target_symbol = graph.symbol(target_row)
     
     # Find all symbols that call this one (transitive closure)
-    affected_symbol_ids = _get_transitive_callers(edges, target_id)
+    with metrics.GRAPH_TRAVERSAL_SECONDS.labels(project_id, "impact").time():
+        affected_rows = sorted(_get_transitive_callers_multi(graph, [target_row]))
     
-    # Get details of affected symbols
-    affected_symbols = [s for s in symbols if s.get("id") in affected_symbol_ids]
+    # Symbols are decoded only as far as the context and the requested page need them
+    affected_symbols = graph.symbol_list(affected_rows)
     
     # Also get what this symbol calls (dependencies)
-    dependencies = [edge["to"] for edge in edges if edge["from"] == target_id]
-    dependency_symbols = [s for s in symbols if s.get("id") in dependencies]
+    dependency_symbols = graph.symbol_list(np.unique(graph.callees(target_row)))
     
     # Build context for LLM
     context = _build_impact_context(
@@ -158,15 +137,281 @@ async def analyze_impact(
     
     return {
         "symbol": target_symbol,
-        "affected_symbols": affected_symbols,
+        "affected_symbols": serialization.project(serialization.paginate(affected_symbols, *affected_page), fields),
         "affected_count": len(affected_symbols),
-        "dependencies": dependency_symbols,
+        "dependencies": serialization.project(serialization.paginate(dependency_symbols, *dependencies_page), fields),
         "dependency_count": len(dependency_symbols),
         "analysis": analysis,
         "risk_level": _assess_risk_level(len(affected_symbols), len(dependency_symbols))
     }
 
 
+async def analyze_impact_batch(
+    project_id: str,
+    targets: List[Tuple[str, str]],
+    change_description: str = "",
+    fields: Optional[List[str]] = None,
+    affected_page: serialization.Page = serialization.Page(),
+    dependencies_page: serialization.Page = serialization.Page()
+) -> Dict[str, Any]:
+    """
+    Analyze the combined impact of changing several symbols (e.g. everything a PR touches)
+    
+    Loads the graph once, finds every target's transitive callers in one
+    multi-source traversal and asks the LLM for one consolidated analysis.
+    
+    Args:
+        project_id: Project identifier
+        targets: (symbol_name, file_path) pairs of the changed symbols
+        change_description: Optional description of the change set
+        fields: Symbol fields to return in the symbol lists (all if None)
+        affected_page: Page of affected_symbols to return
+        dependencies_page: Page of dependencies to return
+    
+    Returns:
+        Dictionary with per-target counts, the union of affected symbols and
+        dependencies (counts are the unpaginated totals), unresolved targets and
+        the AI-generated analysis
+    
+    Raises:
+        FileNotFoundError: If graph file doesn't exist
+        ValueError: If none of the targets is found
+    """
+    graph = _load_graph(project_id)
+    
+    # Duplicates collapse to one target
+    target_rows: List[int] = []
+    seen_rows: Set[int] = set()
+    unresolved = []
+    for symbol_name, file_path in targets:
+        row = graph.find(symbol_name, file_path)
+        if row is None:
+            unresolved.append({"symbol_name": symbol_name, "file_path": file_path})
+        elif row not in seen_rows:
+            seen_rows.add(row)
+            target_rows.append(row)
+    if not target_rows:
+        raise ValueError("None of the target symbols were found")
+    
+    result = await _analyze_target_set(
+        project_id, graph, target_rows, change_description, fields, affected_page, dependencies_page, "impact_batch"
+    )
+    result["unresolved"] = unresolved
+    return result
+
+
+async def _analyze_target_set(
+    project_id: str,
+    graph: graph_format.MappedGraph,
+    target_rows: List[int],
+    change_description: str,
+    fields: Optional[List[str]],
+    affected_page: serialization.Page,
+    dependencies_page: serialization.Page,
+    query: str
+) -> Dict[str, Any]:
+    """Combined impact of distinct target symbols: one multi-source traversal and one LLM analysis"""
+    with metrics.GRAPH_TRAVERSAL_SECONDS.labels(project_id, query).time():
+        reached = _get_transitive_callers_multi(graph, target_rows)
+        callees = {target_row: np.unique(graph.callees(target_row)) for target_row in target_rows}
+    
+    affected_counts = [0] * len(target_rows)
+    for bits in reached.values():
+        for bit in range(len(target_rows)):
+            if bits >> bit & 1:
+                affected_counts[bit] += 1
+    dependency_rows = np.unique(np.concatenate(list(callees.values())))
+    
+    affected_symbols = graph.symbol_list(sorted(reached))
+    dependency_symbols = graph.symbol_list(dependency_rows)
+    per_target = [
+        {
+            "symbol": graph.symbol(target_row),
+            "affected_count": affected_counts[bit],
+            "dependency_count": len(callees[target_row]),
+            "risk_level": _assess_risk_level(affected_counts[bit], len(callees[target_row])),
+        }
+        for bit, target_row in enumerate(target_rows)
+    ]
+    
+    system_prompt = (
+        "You are a code architecture analyst. Analyze the combined impact of a change set that modifies "
+        "several code symbols at once. Consider breaking changes, compatibility issues, test requirements, "
+        "and refactoring needs, and point out which changed symbols carry the most risk. "
+        "Be concise but thorough. Structure your response with clear sections."
+    )
+    user_prompt = _build_batch_impact_context(per_target, affected_symbols, dependency_symbols, change_description)
+    
+    try:
+        analysis = await generate_response(system_prompt, user_prompt)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating batch impact analysis: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating impact analysis: {str(e)}"
+        )
+    
+    return {
+        "targets": [
+            {**entry, "symbol": serialization.project([entry["symbol"]], fields)[0]} for entry in per_target
+        ],
+        "affected_symbols": serialization.project(serialization.paginate(affected_symbols, *affected_page), fields),
+        "affected_count": len(affected_symbols),
+        "dependencies": serialization.project(serialization.paginate(dependency_symbols, *dependencies_page), fields),
+        "dependency_count": len(dependency_symbols),
+        "analysis": analysis,
+        "risk_level": _assess_risk_level(len(affected_symbols), len(dependency_symbols))
+    }
+
+
+async def analyze_diff_impact(
+    project_id: str,
+    diff_text: str,
+    side: str = "old",
+    change_description: str = "",
+    fields: Optional[List[str]] = None,
+    affected_page: serialization.Page = serialization.Page(),
+    dependencies_page: serialization.Page = serialization.Page()
+) -> Dict[str, Any]:
+    """
+    Analyze the impact of a unified diff by mapping its changed lines to symbols
+    
+    Changed lines are resolved to their innermost enclosing symbols through
+    per-file interval indexes over the symbol line ranges recorded at index
+    time, then analyzed like a batch of targets.
+    
+    Args:
+        project_id: Project identifier
+        diff_text: Unified diff (e.g. `git diff` output)
+        side: Which side of the diff the index matches: "old" if the project was
+            indexed before the change (the default), "new" if after
+        change_description: Optional description of the change
+        fields: Symbol fields to return in the symbol lists (all if None)
+        affected_page: Page of affected_symbols to return
+        dependencies_page: Page of dependencies to return
+    
+    Returns:
+        Dictionary like analyze_impact_batch, plus "files" describing how each
+        file's changed lines were mapped; without changed symbols there is no LLM call
+    
+    Raises:
+        FileNotFoundError: If graph file doesn't exist
+        ValueError: If side is invalid or the diff has no file changes
+    """
+    if side not in ("old", "new"):
+        raise ValueError("side must be 'old' or 'new'")
+    file_diffs = diff_parser.parse_unified_diff(diff_text)
+    
+    graph = _load_graph(project_id)
+    # Only the symbols of the diffed files are decoded; their rows are kept for the traversal
+    rows_by_id: Dict[int, int] = {}
+    file_symbols: List[Dict] = []
+    for path in {f.old_path if side == "old" else f.new_path for f in file_diffs} - {None}:
+        rows = graph.file_rows(path)
+        for row, symbol in zip(rows.tolist(), graph.symbols(rows)):
+            rows_by_id[symbol["id"]] = row
+            file_symbols.append(symbol)
+    indexes = symbol_intervals.build_file_indexes(file_symbols)
+    
+    target_rows: List[int] = []
+    seen_ids: Set[int] = set()
+    files = []
+    for file_diff in file_diffs:
+        path = file_diff.old_path if side == "old" else file_diff.new_path
+        # Added/deleted files only have lines on the other side
+        ranges = file_diff.ranges(side if path is not None else ("new" if side == "old" else "old"))
+        changed_lines = sum(end - start + 1 for start, end in ranges)
+        entry = {"file_path": file_diff.path, "changed_lines": changed_lines, "symbols": [], "unmapped_lines": 0}
+        index = indexes.get(path) if path is not None else None
+        if path is None:
+            # Added file (side "old") or deleted file (side "new"): nothing indexed to map to
+            entry["status"] = "added" if side == "old" else "deleted"
+        elif index is None:
+            entry["status"] = "not_indexed"
+        else:
+            entry["status"] = "mapped"
+            covered = 0
+            for start, end in ranges:
+                covered += index.covered_lines(start, end)
+                for symbol in index.symbols_in_range(start, end):
+                    if symbol["id"] not in seen_ids:
+                        seen_ids.add(symbol["id"])
+                        target_rows.append(rows_by_id[symbol["id"]])
+                    if symbol["name"] not in entry["symbols"]:
+                        entry["symbols"].append(symbol["name"])
+            entry["unmapped_lines"] = changed_lines - covered
+        files.append(entry)
+    
+    if not target_rows:
+        unranged = any(f["status"] == "mapped" for f in files) and not graph.has_line_ranges()
+        return {
+            "targets": [],
+            "unresolved": [],
+            "files": files,
+            "affected_symbols": [],
+            "affected_count": 0,
+            "dependencies": [],
+            "dependency_count": 0,
+            "analysis": (
+                "The call graph has no symbol line ranges; re-index the project to map diffs to symbols."
+                if unranged else "The diff doesn't change any indexed symbol."
+            ),
+            "risk_level": "low",
+        }
+    
+    result = await _analyze_target_set(
+        project_id, graph, target_rows, change_description, fields, affected_page, dependencies_page, "impact_diff"
+    )
+    result["unresolved"] = []
+    result["files"] = files
+    return result
+
+
+def _build_batch_impact_context(
+    per_target: List[Dict],
+    affected_symbols: List[Dict],
+    dependencies: List[Dict],
+    change_description: str
+) -> str:
+    """Build context string for a consolidated LLM impact analysis of several symbols"""
+    context = f"Analyze the combined impact of changing the following {len(per_target)} symbols:\n\n"
+    # Riskiest targets first, so the truncated list shows the ones that matter
+    ranked = sorted(per_target, key=lambda entry: entry["affected_count"], reverse=True)
+    for entry in ranked[:25]:
+        symbol = entry["symbol"]
+        context += (
+            f"  - {symbol.get('name')} ({symbol.get('type')}) in {symbol.get('file_path')}: "
+            f"{entry['affected_count']} affected, {entry['dependency_count']} dependencies\n"
+        )
+    if len(ranked) > 25:
+        context += f"  ... and {len(ranked) - 25} more\n"
+    
+    if change_description:
+        context += f"\nProposed change: {change_description}\n"
+    
+    context += f"\nDirect dependencies of the changed symbols: {len(dependencies)}\n"
+    for dep in dependencies[:10]:
+        context += f"  - {dep.get('name')} ({dep.get('file_path')})\n"
+    if len(dependencies) > 10:
+        context += f"  ... and {len(dependencies) - 10} more\n"
+    
+    context += f"\nAffected code (symbols that call any changed symbol, directly or transitively): {len(affected_symbols)}\n"
+    for sym in affected_symbols[:20]:
+        context += f"  - {sym.get('name')} ({sym.get('type')}) in {sym.get('file_path')}\n"
+    if len(affected_symbols) > 20:
+        context += f"  ... and {len(affected_symbols) - 20} more\n"
+    
+    context += "\nProvide an analysis of:\n"
+    context += "1. Potential breaking changes across the change set\n"
+    context += "2. Test coverage needs\n"
+    context += "3. Refactoring recommendations\n"
+    context += "4. Risk assessment, naming the riskiest changes"
+    
+    return context
+
+
 def _build_impact_context(
     target_symbol: Dict,
     affected_symbols: List[Dict],
@@ -1,32 +1,64 @@
 """
 Indexing service - handles AST parsing, symbol extraction, and embedding generation
 """
-import json
+import asyncio
 import logging
+import time
 from typing import Dict, List, Optional
 import os
 from pathlib import Path
+from services import artifact_cache, graph_analytics, graph_store, metrics, outline_service
 from services.ast_parser import ASTParser
-from services.embedding_service import get_embedding, add_embeddings
-from config import BACKEND_DIR
+from services.blob_store import digest_bytes
+from services.chunking import build_file_chunks
+from services.embedding_service import get_embeddings, add_embeddings, replace_embeddings, reset_embeddings
 
 logger = logging.getLogger(__name__)
 
 _ast_parser = ASTParser()
-GRAPH_DATA_DIR = BACKEND_DIR / "data" / "graph"
-GRAPH_DATA_DIR.mkdir(parents=True, exist_ok=True)
+INDEXED_EXTENSIONS = ('.py', '.js')
 
 
 class IndexingService:
     async def index_project(self, project_id: int, project_path: str) -> Dict:
         """Index a project: parse AST, extract symbols, generate embeddings"""
         project_id_str = str(project_id)
+        
+        # Parsing, embedding and graph analytics are CPU-bound: run them in a worker thread
+        # so the event loop keeps serving other requests during an upload
+        files_indexed, total_symbols, graph, all_vectors, all_metadata, embedding_stats = await asyncio.to_thread(
+            self._index_tree, project_id, project_path
+        )
+        
+        # Replace any previous index, then add all embeddings to FAISS index in batch
+        await reset_embeddings(project_id_str)
+        if all_vectors:
+            await add_embeddings(project_id_str, all_vectors, all_metadata)
+        
+        return {
+            "file_count": len(files_indexed),
+            "symbols_extracted": total_symbols,
+            "files": files_indexed,
+            "graph_symbols": len(graph["symbols"]),
+            "graph_edges": len(graph["edges"]),
+            "embedding": embedding_stats
+        }
+    
+    def _index_tree(self, project_id: int, project_path: str) -> tuple:
+        """
+        Parse and embed every indexed file of a source tree, then build and save the call graph
+        
+        Returns:
+            (files indexed, symbol count, graph, vectors, vector metadata, embedding stats)
+        """
+        project_id_str = str(project_id)
         files_indexed = []
         total_symbols = 0
         
         # Collect all symbols and their embeddings
         all_vectors = []
         all_metadata = []
+        embedding_stats = self._new_embedding_stats()
         
         # For call graph: collect all symbols with their calls
         all_symbols_with_calls = []
@@ -41,9 +73,11 @@ class IndexingService:
                 rel_path = os.path.relpath(file_path, project_path)
                 
                 # Only process Python and JavaScript files for now
-                if file.endswith(('.py', '.js')):
+                if file.endswith(INDEXED_EXTENSIONS):
                     try:
-                        symbols = self._index_file(project_id, file_path, rel_path, all_vectors, all_metadata)
+                        symbols = self._index_file(
+                            project_id, file_path, rel_path, all_vectors, all_metadata, embedding_stats
+                        )
                         
                         # Store symbols with their calls for graph building
                         for symbol in symbols:
@@ -51,7 +85,9 @@ class IndexingService:
                                 "name": symbol.get("name", ""),
                                 "file_path": rel_path,
                                 "type": symbol.get("type", ""),
-                                "calls": symbol.get("calls", [])
+                                "calls": symbol.get("calls", []),
+                                "line_start": symbol.get("line_start"),
+                                "line_end": symbol.get("line_end"),
                             })
                         
                         files_indexed.append({
@@ -66,64 +102,166 @@ class IndexingService:
         graph = self._build_call_graph(all_symbols_with_calls)
         
         # Save call graph to file
-        graph_path = GRAPH_DATA_DIR / f"{project_id_str}.json"
         try:
-            with open(graph_path, "w") as f:
-                json.dump(graph, f, indent=2)
+            graph_store.save_graph(project_id_str, graph)
+            outline_service.save_outlines(project_id_str, graph)
             logger.info(f"Saved call graph for project {project_id} with {len(graph['symbols'])} symbols and {len(graph['edges'])} edges")
         except Exception as e:
             logger.error(f"Error saving call graph for project {project_id}: {e}")
+        else:
+            # Stats describe the saved graph, so they are only written along with it
+            self._save_graph_stats(project_id_str, graph)
+        return files_indexed, total_symbols, graph, all_vectors, all_metadata, embedding_stats
+    
+    async def reindex_file(self, project_id: int, project_path: str, rel_path: str) -> Dict:
+        """
+        Re-index a single file after it changed on disk
         
-        # Add all embeddings to FAISS index in batch
-        if all_vectors:
-            await add_embeddings(project_id_str, all_vectors, all_metadata)
+        Replaces the file's vectors in the FAISS index and patches its symbols
+        and edges in the call graph, leaving the rest of the project untouched.
+        Callers hold graph_store.write_lock(project_id) across this and the
+        manifest update, so concurrent re-indexes of one project don't interleave.
         
+        Args:
+            project_id: Project identifier
+            project_path: Root of the project's source tree
+            rel_path: File path relative to project_path
+        
+        Returns:
+            Dictionary with symbol/chunk counts, graph size and elapsed seconds
+        """
+        started = time.perf_counter()
+        project_id_str = str(project_id)
+        file_path = os.path.join(project_path, rel_path)
+        
+        vectors = []
+        metadata = []
+        embedding_stats = self._new_embedding_stats()
+        symbols = []
+        # Parsing, embedding and the graph update are CPU-bound: like a full index, they run in a
+        # worker thread so the event loop keeps serving other requests
+        if rel_path.endswith(INDEXED_EXTENSIONS) and os.path.exists(file_path):
+            symbols = await asyncio.to_thread(
+                self._index_file, project_id, file_path, rel_path, vectors, metadata, embedding_stats
+            )
+        
+        vector_changes = await replace_embeddings(project_id_str, vectors, metadata, file_paths=[rel_path])
+        graph = await asyncio.to_thread(self._patch_graph, project_id_str, rel_path, symbols)
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"Re-indexed {rel_path} for project {project_id} in {elapsed:.3f}s")
         return {
-            "file_count": len(files_indexed),
-            "symbols_extracted": total_symbols,
-            "files": files_indexed,
+            "file_path": rel_path,
+            "symbols_extracted": len(symbols),
+            "vectors_removed": vector_changes["removed"],
+            "vectors_added": vector_changes["added"],
             "graph_symbols": len(graph["symbols"]),
-            "graph_edges": len(graph["edges"])
+            "graph_edges": len(graph["edges"]),
+            "embedding": embedding_stats,
+            "seconds": round(elapsed, 4)
         }
     
+    def _patch_graph(self, project_id: str, rel_path: str, symbols: List[Dict]) -> Dict:
+        """
+        Replace one file's symbols in the call graph and save the graph, outlines and stats
+
+        The graph is decoded to dicts, patched and re-encoded whole instead of
+        being patched through its CSR arrays: the string pool is sorted and both
+        edge directions are indexed by row, so any change rewrites every array
+        anyway, and the outlines and graph stats are built from the decoded
+        graph. Decoding is about a quarter of this step on large graphs (timed
+        as reindex_graph by benchmarks.suite).
+        """
+        try:
+            graph = graph_store.load_graph(project_id)
+        except FileNotFoundError:
+            graph = {"symbols": [], "edges": []}
+        graph_store.patch_file(graph, rel_path, [
+            {
+                "name": s.get("name", ""),
+                "type": s.get("type", ""),
+                "calls": s.get("calls", []),
+                "line_start": s.get("line_start"),
+                "line_end": s.get("line_end"),
+            }
+            for s in symbols
+        ])
+        graph_store.save_graph(project_id, graph)
+        outline_service.save_outlines(project_id, graph)
+        self._save_graph_stats(project_id, graph)
+        return graph
+    
     def _index_file(
         self, 
         project_id: int, 
         file_path: str, 
         rel_path: str,
         all_vectors: List,
-        all_metadata: List
+        all_metadata: List,
+        embedding_stats: Dict
     ) -> List[Dict]:
         """Index a single file and add embeddings to the batch"""
         language = "python" if file_path.endswith('.py') else "javascript"
         
-        # Parse AST and extract symbols
-        symbols = _ast_parser.parse_file(file_path, language)
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        
+        # Parse AST and extract symbols, reusing the parse result of identical content
+        digest = digest_bytes(raw)
+        symbols = artifact_cache.get_symbols(digest, language)
+        if symbols is not None:
+            embedding_stats["parse_cache_hits"] += 1
+            metrics.PARSE_CACHE_HITS.labels(project_id).inc()
+        else:
+            try:
+                content = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                logger.warning(f"Skipping non-UTF-8 file {rel_path}")
+                return []
+            with metrics.PARSE_FILE_SECONDS.labels(project_id, language).time():
+                symbols = _ast_parser.parse_source(content, file_path, language)
+            artifact_cache.put_symbols(digest, language, symbols)
+        
+        if not symbols:
+            return symbols
         
-        # Generate embeddings for each symbol
         for symbol in symbols:
             symbol["project_id"] = project_id
             symbol["file_path"] = rel_path
-            
-            # Build text representation for embedding
-            text_repr = (
-                f"File: {rel_path}\n"
-                f"Symbol: {symbol.get('name', 'unknown')}\n"
-                f"Type: {symbol.get('type', 'unknown')}\n"
-                f"Code:\n{symbol.get('code', '')}"
-            )
-            
-            # Generate embedding
-            embedding = get_embedding(text_repr)
-            
+        
+        # Split symbols into embedding chunks (reused for an identical file at the same path)
+        # and embed them in one batch
+        file_chunks = artifact_cache.get_chunks(digest, language, rel_path)
+        if file_chunks is None:
+            file_chunks = build_file_chunks(symbols, rel_path)
+            artifact_cache.put_chunks(digest, language, rel_path, file_chunks)
+        chunked = [(symbols[chunk["symbol"]], chunk) for chunk in file_chunks["chunks"]]
+        
+        texts = [chunk["text"] for _, chunk in chunked]
+        embedding_stats["chunks"] += len(texts)
+        
+        # Reuse the vectors of an identical file (same content and path) from any project
+        vectors_key = artifact_cache.texts_key(texts)
+        embeddings = artifact_cache.get_vectors(vectors_key)
+        if embeddings is not None and len(embeddings) == len(texts):
+            embedding_stats["embedding_cache_hits"] += 1
+        else:
+            embeddings = get_embeddings(texts)
+            # Both sides are counted as the encoder sees them: headers included, truncated at its max length
+            embedding_stats["tokens"] += file_chunks["tokens"]
+            embedding_stats["tokens_without_chunking"] += file_chunks["tokens_without_chunking"]
+            artifact_cache.put_vectors(vectors_key, embeddings)
+        
+        for (symbol, chunk), embedding in zip(chunked, embeddings):
             # Prepare metadata (store what we need for retrieval)
             metadata = {
                 "file_path": rel_path,
                 "name": symbol.get("name", ""),
                 "type": symbol.get("type", ""),
-                "line_start": symbol.get("line_start", 0),
-                "line_end": symbol.get("line_end", 0),
-                "code": symbol.get("code", ""),
+                "line_start": chunk["line_start"],
+                "line_end": chunk["line_end"],
+                "code": chunk["code"],
+                "chunk_index": chunk["chunk_index"],
             }
             
             # Add to batch
@@ -132,6 +270,27 @@ class IndexingService:
         
         return symbols
     
+    def _new_embedding_stats(self) -> Dict:
+        """Counters reported for an indexing run (tokens are only counted for texts actually encoded)"""
+        return {
+            "chunks": 0,
+            "tokens": 0,
+            "tokens_without_chunking": 0,
+            "parse_cache_hits": 0,
+            "embedding_cache_hits": 0,
+        }
+    
+    def _save_graph_stats(self, project_id: str, graph: Dict):
+        """Compute the graph analytics; a failure only leaves the stats stale, never fails indexing"""
+        try:
+            stats = graph_analytics.save_stats(project_id, graph)
+            logger.info(
+                f"Computed graph stats for project {project_id} in {stats['computed_seconds']:.3f}s: "
+                f"{stats['summary'].get('cycles', 0)} cycles, {stats['unreferenced_total']} unreferenced symbols"
+            )
+        except Exception as e:
+            logger.error(f"Error computing graph stats for project {project_id}: {e}")
+    
     def _build_call_graph(self, symbols_with_calls: List[Dict]) -> Dict:
         """
         Build a call graph from symbols and their calls
@@ -142,54 +301,4 @@ class IndexingService:
         Returns:
             Dictionary with "symbols" and "edges" keys
         """
-        # Assign IDs to symbols
-        symbols = []
-        symbol_map = {}  # (name, file_path) -> id
-        
-        for idx, sym in enumerate(symbols_with_calls):
-            symbol_id = idx + 1
-            key = (sym["name"], sym["file_path"])
-            symbol_map[key] = symbol_id
-            
-            symbols.append({
-                "id": symbol_id,
-                "name": sym["name"],
-                "file_path": sym["file_path"],
-                "type": sym["type"]
-            })
-        
-        # Build edges based on calls
-        edges = []
-        
-        for sym in symbols_with_calls:
-            symbol_key = (sym["name"], sym["file_path"])
-            from_id = symbol_map.get(symbol_key)
-            
-            if from_id is None:
-                continue
-            
-            # For each call, try to find matching symbols
-            for call_name in sym.get("calls", []):
-                # Try to find symbols with matching name
-                # Match by name only (since we don't know the exact file for external calls)
-                for target_sym in symbols_with_calls:
-                    target_key = (target_sym["name"], target_sym["file_path"])
-                    target_id = symbol_map.get(target_key)
-                    
-                    # Match if the call name matches the symbol name
-                    # This handles both direct matches and method matches (e.g., "create_user" matches "Service.create_user")
-                    if target_id and target_id != from_id:
-                        # Exact match or method name match
-                        if call_name == target_sym["name"] or target_sym["name"].endswith(f".{call_name}"):
-                            edges.append({
-                                "from": from_id,
-                                "to": target_id
-                            })
-                            # Only add the first match to avoid duplicates
-                            break
-        
-        return {
-            "symbols": symbols,
-            "edges": edges
-        }
-
+        return graph_store.build_graph(symbols_with_calls)
@@ -0,0 +1,247 @@
+"""
+Ingest filter - decides which zip entries are extracted into a project
+
+Entries are checked before they are written, in order: ignored directories
+(VCS metadata, dependencies, build outputs), .gitignore files found in the zip,
+the project's exclude/include globs, binary extensions, the size limit and
+generated-file names. Entries that pass are then checked once by content (NUL
+bytes, minified code, "generated" markers). Every skip is counted by reason.
+
+Glob rules use .gitignore syntax: a pattern without a slash matches a name at
+any depth, a pattern containing a slash is anchored to the root (of the zip, or
+of the directory holding the .gitignore), "**" spans directories, a trailing
+slash matches directories only and "!" re-includes.
+"""
+import posixpath
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from config import INGEST_MAX_FILE_BYTES
+from services.manifest_service import IGNORED_DIRS
+
+# Directories never extracted: VCS metadata, dependencies, virtualenvs, caches and build outputs
+DEFAULT_IGNORED_DIRS = IGNORED_DIRS | {
+    ".hg", ".svn", "bower_components", "venv", ".tox", ".nox", ".mypy_cache", ".ruff_cache",
+    ".idea", ".vscode", "dist", "build", "target", ".next", ".nuxt", "coverage", "htmlcov",
+    ".eggs", "site-packages",
+}
+
+BINARY_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tiff", ".psd",
+    ".mp3", ".mp4", ".wav", ".ogg", ".avi", ".mov", ".webm",
+    ".zip", ".tar", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war", ".whl", ".egg",
+    ".pyc", ".pyo", ".so", ".dll", ".dylib", ".exe", ".bin", ".o", ".a", ".class", ".wasm",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot",
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+    ".sqlite", ".sqlite3", ".db", ".npy", ".npz", ".pkl", ".pt", ".onnx", ".h5",
+}
+
+# Generated files recognizable by name: minified bundles, source maps, lockfiles, protobuf output
+GENERATED_NAMES = [
+    "*.min.js", "*.min.css", "*.map", "*.bundle.js", "*.chunk.js",
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock", "Cargo.lock",
+    "*_pb2.py", "*_pb2_grpc.py", "*.pb.go",
+]
+
+# Content checks look at the start of a file only
+_SNIFF_BYTES = 8192
+_GENERATED_MARKERS = (b"@generated", b"DO NOT EDIT", b"Code generated by", b"autogenerated", b"auto-generated")
+# Text whose lines average longer than this is treated as minified
+_MINIFIED_LINE_LENGTH = 500
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Regex for one .gitignore-style glob (without anchoring or negation)"""
+    parts = []
+    position = 0
+    while position < len(glob):
+        char = glob[position]
+        if glob.startswith("**/", position):
+            parts.append("(?:.*/)?")
+            position += 3
+            continue
+        if glob.startswith("**", position):
+            parts.append(".*")
+            position += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = glob.find("]", position + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = glob[position + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                position = end
+        else:
+            parts.append(re.escape(char))
+        position += 1
+    return "".join(parts)
+
+
+@dataclass
+class _Rule:
+    regex: Pattern
+    negate: bool
+    directory_only: bool
+    source: str  # "gitignore", "exclude" or "include"
+
+
+def _compile(pattern: str, base: str = "", source: str = "exclude") -> Optional[_Rule]:
+    """Compile one .gitignore-style pattern relative to base (a directory path, "" for the root)"""
+    pattern = pattern.rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    if pattern.startswith("\\"):  # escaped leading "#" or "!"
+        pattern = pattern[1:]
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # Any slash left (leading or in the middle) anchors the pattern to base
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    prefix = re.escape(base + "/") if base else ""
+    if not anchored:
+        prefix += "(?:.*/)?"
+    return _Rule(re.compile(f"^{prefix}{_glob_to_regex(pattern)}$"), negate, directory_only, source)
+
+
+def _last_match(rules: List[_Rule], path: str, is_dir: bool) -> Optional[_Rule]:
+    """Last rule matching path, which decides it (like .gitignore)"""
+    decision = None
+    for rule in rules:
+        if rule.directory_only and not is_dir:
+            continue
+        if rule.regex.match(path):
+            decision = rule
+    return decision
+
+
+@dataclass
+class IngestRules:
+    """Per-project ingest settings (stored in the project registry)"""
+    include: List[str] = field(default_factory=list)
+    exclude: List[str] = field(default_factory=list)
+    max_file_bytes: Optional[int] = None  # defaults to INGEST_MAX_FILE_BYTES
+    use_gitignore: bool = True
+    skip_generated: bool = True
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "IngestRules":
+        data = data or {}
+        return cls(**{key: value for key, value in data.items() if key in cls.__dataclass_fields__})
+
+
+class IngestFilter:
+    def __init__(self, rules: Optional[IngestRules] = None, gitignores: Iterable[Tuple[str, str]] = ()):
+        """
+        Args:
+            rules: Project ingest rules (defaults apply when None)
+            gitignores: (zip path of a .gitignore file, its text) pairs; ignored unless rules.use_gitignore
+        """
+        self.rules = rules or IngestRules()
+        self.max_file_bytes = self.rules.max_file_bytes or INGEST_MAX_FILE_BYTES
+        self._exclude: List[_Rule] = []
+        if self.rules.use_gitignore:
+            # Shallow .gitignore files first, so deeper ones override them like in git
+            for path, text in sorted(gitignores, key=lambda item: item[0].count("/")):
+                base = posixpath.dirname(path)
+                self._exclude.extend(
+                    rule for rule in (_compile(line, base, "gitignore") for line in text.splitlines()) if rule
+                )
+        self._exclude.extend(rule for rule in (_compile(glob) for glob in self.rules.exclude) if rule)
+        self._include = [rule for rule in (_compile(glob, source="include") for glob in self.rules.include) if rule]
+        self._generated = [rule for rule in (_compile(glob, source="generated") for glob in GENERATED_NAMES) if rule]
+
+    def check_entry(self, path: str, size: int) -> Optional[str]:
+        """
+        Reason to skip a zip entry by its path and size, or None to extract it
+
+        Reasons: ignored_dir, gitignore, excluded, not_included, binary, too_large, generated
+        """
+        parts = path.split("/")
+        if any(part in DEFAULT_IGNORED_DIRS for part in parts[:-1]):
+            return "ignored_dir"
+
+        # A file inside an excluded directory can't be re-included (like git)
+        for depth in range(1, len(parts)):
+            rule = _last_match(self._exclude, "/".join(parts[:depth]), is_dir=True)
+            if rule is not None and not rule.negate:
+                return "gitignore" if rule.source == "gitignore" else "excluded"
+        rule = _last_match(self._exclude, path, is_dir=False)
+        if rule is not None and not rule.negate:
+            return "gitignore" if rule.source == "gitignore" else "excluded"
+        if self._include and not self._included(parts):
+            return "not_included"
+
+        if posixpath.splitext(path)[1].lower() in BINARY_EXTENSIONS:
+            return "binary"
+        if size > self.max_file_bytes:
+            return "too_large"
+        if self.rules.skip_generated and _last_match(self._generated, path, is_dir=False) is not None:
+            return "generated"
+        return None
+
+    def _included(self, parts: List[str]) -> bool:
+        """True if the file or one of its directories matches an include glob"""
+        rule = _last_match(self._include, "/".join(parts), is_dir=False)
+        if rule is not None:
+            return not rule.negate
+        return any(
+            _last_match(self._include, "/".join(parts[:depth]), is_dir=True) is not None
+            for depth in range(1, len(parts))
+        )
+
+    def check_content(self, path: str, data: bytes) -> Optional[str]:
+        """Reason to skip an entry by its content (binary, generated), or None to extract it"""
+        head = data[:_SNIFF_BYTES]
+        if b"\0" in head:
+            return "binary"
+        if not self.rules.skip_generated:
+            return None
+        if any(marker in head[:1024] for marker in _GENERATED_MARKERS):
+            return "generated"
+        lines = head.count(b"\n") + 1
+        if len(head) >= 2 * _MINIFIED_LINE_LENGTH and len(head) / lines > _MINIFIED_LINE_LENGTH:
+            return "generated"
+        return None
+
+
+class SkipStats:
+    """Extracted/skipped entry and byte counts, by skip reason"""
+
+    _SAMPLES = 20
+
+    def __init__(self):
+        self.entries = 0
+        self.skipped = 0
+        self.skipped_bytes = 0
+        self.by_reason: Dict[str, Dict[str, int]] = {}
+        self.samples: List[Dict] = []
+
+    def skip(self, path: str, size: int, reason: str):
+        self.skipped += 1
+        self.skipped_bytes += size
+        counts = self.by_reason.setdefault(reason, {"entries": 0, "bytes": 0})
+        counts["entries"] += 1
+        counts["bytes"] += size
+        if len(self.samples) < self._SAMPLES:
+            self.samples.append({"path": path, "reason": reason, "size": size})
+
+    def to_dict(self) -> Dict:
+        return {
+            "entries": self.entries,
+            "extracted": self.entries - self.skipped,
+            "skipped": self.skipped,
+            "skipped_bytes": self.skipped_bytes,
+            "by_reason": self.by_reason,
+            "samples": self.samples,
+        }
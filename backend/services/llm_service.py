@@ -2,21 +2,27 @@
 LLM Service - handles LLM API calls with OpenAI
 """
 import logging
-import openai
+import time
 from fastapi import HTTPException
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from config import OPENAI_API_KEY, OPENAI_MODEL
+from services import metrics
+
+if TYPE_CHECKING:
+    import openai
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-_client: Optional[openai.AsyncOpenAI] = None
+# OpenAI client (and the openai package itself) is loaded on first use
+_client: Optional["openai.AsyncOpenAI"] = None
 
 
-def _get_client() -> openai.AsyncOpenAI:
+def _get_client() -> "openai.AsyncOpenAI":
     """Get or initialize OpenAI client"""
     global _client
     if _client is None:
+        import openai
+
         if not OPENAI_API_KEY:
             error_msg = "OPENAI_API_KEY environment variable is not set. Please set it to use LLM features."
             logger.error(error_msg)
@@ -54,7 +60,11 @@ async def generate_response(
         model = OPENAI_MODEL
     
     client = _get_client()
+    import openai
     
+    endpoint = metrics.current_endpoint()
+    started = time.perf_counter()
+    outcome = "error"
     try:
         response = await client.chat.completions.create(
             model=model,
@@ -64,6 +74,8 @@ async def generate_response(
             ],
             temperature=temperature,
         )
+        outcome = "ok"
+        _record_usage(endpoint, model, response)
         
         if not response.choices or not response.choices[0].message.content:
             logger.warning("LLM returned empty response")
@@ -95,4 +107,15 @@ async def generate_response(
             status_code=500,
             detail=f"Unexpected error in LLM service: {str(e)}"
         )
+    finally:
+        metrics.LLM_REQUEST_SECONDS.labels(endpoint, model, outcome).observe(time.perf_counter() - started)
+
+
+def _record_usage(endpoint: str, model: str, response) -> None:
+    """Count the prompt and completion tokens reported with a completion"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    metrics.LLM_TOKENS.labels(endpoint, model, "prompt").inc(usage.prompt_tokens or 0)
+    metrics.LLM_TOKENS.labels(endpoint, model, "completion").inc(usage.completion_tokens or 0)
 
@@ -0,0 +1,207 @@
+"""
+Manifest service - per-project file tree manifest built at ingest
+
+The manifest records every source file with its size, content digest, language
+and symbol count. It is written next to the project's source tree, loaded once
+and kept resident with a directory index, so listings never walk the filesystem.
+"""
+import json
+import logging
+import os
+import posixpath
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from services.blob_store import digest_bytes
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+# Directories never shown in listings or indexed
+IGNORED_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', '.pytest_cache'}
+
+LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".json": "json",
+    ".md": "markdown",
+    ".html": "html",
+    ".css": "css",
+    ".yml": "yaml",
+    ".yaml": "yaml",
+    ".toml": "toml",
+    ".txt": "text",
+}
+
+
+def detect_language(path: str) -> Optional[str]:
+    """Language of a file from its extension (None if unknown)"""
+    return LANGUAGES.get(posixpath.splitext(path)[1].lower())
+
+
+def is_ignored(rel_path: str) -> bool:
+    """True if any directory component of rel_path is ignored"""
+    return any(part in IGNORED_DIRS for part in rel_path.split("/")[:-1])
+
+
+class Manifest:
+    """Resident file-tree manifest with a per-directory index"""
+
+    def __init__(self, files: List[Dict]):
+        self.files = sorted(files, key=lambda entry: entry["path"])
+        self.by_path: Dict[str, Dict] = {entry["path"]: entry for entry in self.files}
+        self._build_directory_index()
+
+    def _build_directory_index(self):
+        # dir path ("" for root) -> child dir names, files, recursive file count
+        self.dirs: Dict[str, Dict] = {"": {"dirs": set(), "files": [], "file_count": 0}}
+        for entry in self.files:
+            parent = posixpath.dirname(entry["path"])
+            self.dirs.setdefault(parent, {"dirs": set(), "files": [], "file_count": 0})["files"].append(entry)
+            # Register every ancestor directory and count the file in each
+            current = parent
+            while True:
+                node = self.dirs.setdefault(current, {"dirs": set(), "files": [], "file_count": 0})
+                node["file_count"] += 1
+                if current == "":
+                    break
+                ancestor = posixpath.dirname(current)
+                self.dirs.setdefault(ancestor, {"dirs": set(), "files": [], "file_count": 0})["dirs"].add(
+                    posixpath.basename(current)
+                )
+                current = ancestor
+        for node in self.dirs.values():
+            node["dirs"] = sorted(node["dirs"])
+
+    def to_dict(self) -> Dict:
+        return {"files": self.files}
+
+    def upsert(self, entry: Dict):
+        """Add or replace the entry for one file"""
+        existing = self.by_path.get(entry["path"])
+        if existing is not None:
+            # Entries are shared with the directory index, so update in place
+            existing.update(entry)
+            return
+        self.by_path[entry["path"]] = entry
+        self.files = sorted(self.by_path.values(), key=lambda e: e["path"])
+        self._build_directory_index()
+
+    def list_directory(self, path: str = "", offset: int = 0, limit: int = 200) -> Dict:
+        """
+        List one directory: subdirectories first, then files, paginated
+
+        Raises:
+            FileNotFoundError: If the directory is not in the manifest
+        """
+        path = path.strip("/")
+        node = self.dirs.get(path)
+        if node is None:
+            raise FileNotFoundError(f"Directory not found: {path}")
+
+        children = [
+            {
+                "type": "dir",
+                "name": name,
+                "path": posixpath.join(path, name) if path else name,
+                "file_count": self.dirs[posixpath.join(path, name) if path else name]["file_count"],
+            }
+            for name in node["dirs"]
+        ]
+        children += [
+            {
+                "type": "file",
+                "name": posixpath.basename(entry["path"]),
+                "path": entry["path"],
+                "size": entry["size"],
+                "language": entry["language"],
+                "symbols": entry["symbols"],
+            }
+            for entry in node["files"]
+        ]
+        return {
+            "path": path,
+            "entries": children[offset:offset + limit],
+            "total": len(children),
+            "offset": offset,
+            "limit": limit,
+        }
+
+
+# Loaded manifests: project_id -> (manifest file mtime, Manifest)
+_manifests: Dict[int, tuple] = {}
+
+
+def make_entry(rel_path: str, size: int, digest: str, symbols: int = 0) -> Dict:
+    """Build a manifest entry for one file"""
+    return {
+        "path": rel_path,
+        "size": size,
+        "digest": digest,
+        "language": detect_language(rel_path),
+        "symbols": symbols,
+    }
+
+
+def build_from_tree(source_path: Path) -> List[Dict]:
+    """Build manifest entries by walking a source tree (used when no manifest was written at ingest)"""
+    entries = []
+    for root, dirs, filenames in os.walk(source_path):
+        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+        for filename in filenames:
+            full_path = Path(root) / filename
+            rel_path = os.path.relpath(full_path, source_path).replace("\\", "/")
+            with open(full_path, "rb") as f:
+                data = f.read()
+            entries.append(make_entry(rel_path, len(data), digest_bytes(data)))
+    return entries
+
+
+def save_manifest(project_id: int, project_dir: Path, entries: List[Dict]) -> Manifest:
+    """Write a project's manifest and make it the resident copy"""
+    return _write_manifest(project_id, project_dir, Manifest(entries))
+
+
+def _write_manifest(project_id: int, project_dir: Path, manifest: Manifest) -> Manifest:
+    path = Path(project_dir) / MANIFEST_FILE
+    tmp_path = path.with_name(f".{MANIFEST_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest.to_dict(), f)
+    os.replace(tmp_path, path)
+    _manifests[project_id] = (path.stat().st_mtime, manifest)
+    return manifest
+
+
+def get_manifest(project_id: int, project_dir: Path) -> Manifest:
+    """
+    Return a project's manifest, loading it from disk on first use
+
+    Projects ingested before manifests existed get one built from their source tree.
+    """
+    path = Path(project_dir) / MANIFEST_FILE
+    cached = _manifests.get(project_id)
+
+    if path.exists():
+        mtime = path.stat().st_mtime
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path, "r") as f:
+            manifest = Manifest(json.load(f)["files"])
+        _manifests[project_id] = (mtime, manifest)
+        return manifest
+
+    source_path = Path(project_dir) / "source"
+    entries = build_from_tree(source_path) if source_path.exists() else []
+    logger.info(f"Built manifest for project {project_id} from its source tree ({len(entries)} files)")
+    return save_manifest(project_id, project_dir, entries)
+
+
+def update_file(project_id: int, project_dir: Path, entry: Dict) -> Manifest:
+    """Replace one file's entry in a project's manifest"""
+    manifest = get_manifest(project_id, project_dir)
+    manifest.upsert(entry)
+    return _write_manifest(project_id, project_dir, manifest)
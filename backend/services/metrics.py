@@ -0,0 +1,241 @@
+"""
+Metrics - in-process counters and latency histograms in Prometheus text format
+
+Hot paths record into module-level metrics (an observation is a lock, a bisect
+and two additions), and GET /metrics renders them. The API follows
+prometheus_client (metric.labels(...).observe(...)), so the exposition format
+is the standard one. Each worker process keeps its own metrics; Prometheus
+aggregates across workers when it scrapes them.
+"""
+import contextvars
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import METRICS_ENABLED
+
+_PREFIX = "intelliforge_"
+
+# Latency buckets in seconds: sub-millisecond graph lookups up to minute-long LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# ASGI scope of the request being handled (set by MetricsMiddleware), for the endpoint label
+_request_scope: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("request_scope", default=None)
+
+# Route endpoint function -> path template, filled lazily
+_route_paths: Dict = {}
+
+
+def endpoint_name(scope: Dict) -> str:
+    """Route template of a request ("GET /api/projects/{project_id}/usage"), bounded for use as a label"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return f"{scope['method']} (unmatched)"
+    if endpoint not in _route_paths:
+        routes = getattr(scope.get("app"), "routes", [])
+        _route_paths.update({route.endpoint: route.path for route in routes if hasattr(route, "endpoint")})
+    return f"{scope['method']} {_route_paths.get(endpoint, endpoint.__name__)}"
+
+
+def set_request_scope(scope: Dict) -> contextvars.Token:
+    return _request_scope.set(scope)
+
+
+def reset_request_scope(token: contextvars.Token):
+    _request_scope.reset(token)
+
+
+def current_endpoint() -> str:
+    """Endpoint of the request being handled ("background" outside of a request)"""
+    scope = _request_scope.get()
+    return endpoint_name(scope) if scope is not None else "background"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = _PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def labels(self, *values):
+        """Child metric for one combination of label values (str() of each value)"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A new child metric for one combination of label values"""
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines of every child (called with the lock held)"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} {child.value:g}"
+            for key, child in sorted(self._children.items())
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Per-bucket (not cumulative) counts; the last one is +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        if not METRICS_ENABLED:
+            return
+        position = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of the with block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in sorted(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+_registry: List[_Metric] = []
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# Requests
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to handle a request", ("endpoint", "status"))
+
+# Ingestion and indexing
+ZIP_EXTRACT_SECONDS = Histogram(
+    "zip_extract_seconds", "Time to extract an uploaded zip into the blob store", ("project",))
+PARSE_FILE_SECONDS = Histogram(
+    "parse_file_seconds", "Time to parse one file (parse cache misses only)", ("project", "language"))
+PARSE_CACHE_HITS = Counter(
+    "parse_cache_hits", "Files whose parse result was reused from the artifact cache", ("project",))
+EMBEDDING_BATCH_SECONDS = Histogram(
+    "embedding_batch_seconds", "Time to encode one batch of texts", ("backend",))
+EMBEDDED_TEXTS = Counter(
+    "embedded_texts", "Texts encoded by the embedding backend", ("backend",))
+INDEX_UPDATE_SECONDS = Histogram(
+    "index_update_seconds", "Time to remove and add vectors in a FAISS index", ("project",))
+INDEX_WRITE_SECONDS = Histogram(
+    "index_write_seconds", "Time to write and publish a FAISS index and its metadata", ("project",))
+
+# Queries
+SEARCH_STAGE_SECONDS = Histogram(
+    "search_stage_seconds", "Vector search time by stage (load, encode, faiss, metadata)", ("project", "stage"))
+GRAPH_LOAD_SECONDS = Histogram(
+    "graph_load_seconds", "Time to load a call graph from disk", ("project",))
+ADMISSION_REQUESTS = Counter(
+    "admission_requests",
+    "Requests to limited endpoints by outcome (admitted, queued then admitted, rejected)",
+    ("endpoint_class", "outcome"),
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds",
+    "Time admitted requests waited for a slot",
+    ("endpoint_class",),
+)
+GRAPH_ANALYTICS_SECONDS = Histogram(
+    "graph_analytics_seconds", "Time to compute call graph stats (degrees, SCCs, centrality)", ("project",))
+GRAPH_TRAVERSAL_SECONDS = Histogram(
+    "graph_traversal_seconds", "Time to walk a call graph for one query", ("project", "query"))
+CHAT_CACHE_REQUESTS = Counter(
+    "chat_cache_requests", "Chat answer cache lookups by outcome (hit, miss, refresh)", ("project", "outcome"))
+
+# LLM
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds", "Latency of LLM completions", ("endpoint", "model", "outcome"))
+LLM_TOKENS = Counter(
+    "llm_tokens", "Tokens used by LLM completions", ("endpoint", "model", "kind"))
@@ -0,0 +1,170 @@
+"""
+Outline service - per-file symbol outlines and cursor-to-symbol lookups
+
+Outlines are computed from the call graph whenever it is saved (index or
+single-file re-index) and written next to it as <project_id>.outline.json.
+Readers keep them resident with an interval index per file, reloading only
+when the outline file changes, so editor lookups on cursor move never touch
+the whole-project graph.
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import GRAPH_DATA_DIR
+from services import graph_store
+from services.symbol_intervals import SymbolIntervalIndex
+
+logger = logging.getLogger(__name__)
+
+_OUTLINE_FIELDS = ("id", "name", "type", "line_start", "line_end")
+
+
+class FileOutline:
+    """Symbols of one file as a nested tree plus an interval index for line lookups"""
+
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+        self.by_id = {entry["id"]: entry for entry in entries}
+        self.index = SymbolIntervalIndex(entries)
+
+    def tree(self) -> List[Dict]:
+        """Symbols nested under their enclosing symbols (children in line order)"""
+        nodes = {entry["id"]: {**entry, "children": []} for entry in self.entries}
+        roots = []
+        for entry in self.entries:
+            parent = nodes.get(entry.get("parent"))
+            (parent["children"] if parent else roots).append(nodes[entry["id"]])
+        return roots
+
+    def enclosing(self, symbol: Dict) -> List[Dict]:
+        """Chain of symbols from the outermost down to symbol"""
+        chain = [symbol]
+        while chain[-1].get("parent") in self.by_id:
+            chain.append(self.by_id[chain[-1]["parent"]])
+        return list(reversed(chain))
+
+
+# Resident outlines: project_id -> (outline file identity, file_path -> FileOutline)
+_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, FileOutline]]] = {}
+_cache_lock = threading.Lock()
+
+
+def outline_path(project_id: str) -> Path:
+    """Get the outline file path for a project"""
+    return GRAPH_DATA_DIR / f"{project_id}.outline.json"
+
+
+def build_outlines(graph: Dict) -> Dict[str, List[Dict]]:
+    """
+    Compute the outline entries of every file of a call graph
+
+    Returns:
+        Mapping of file_path -> entries in line order, each with the outline
+        fields, its parent symbol ID (or None) and distinct calls/called_by counts
+    """
+    calls: Dict[int, set] = {}
+    called_by: Dict[int, set] = {}
+    for edge in graph.get("edges", []):
+        calls.setdefault(edge["from"], set()).add(edge["to"])
+        called_by.setdefault(edge["to"], set()).add(edge["from"])
+
+    by_file: Dict[str, List[Dict]] = {}
+    for symbol in graph.get("symbols", []):
+        if symbol.get("line_start") is None:
+            continue
+        entry = {field: symbol.get(field) for field in _OUTLINE_FIELDS}
+        entry["calls"] = len(calls.get(symbol["id"], ()))
+        entry["called_by"] = len(called_by.get(symbol["id"], ()))
+        by_file.setdefault(symbol["file_path"], []).append(entry)
+
+    for entries in by_file.values():
+        # Outer symbols first at equal start lines, so a stack of open ranges gives each entry its parent
+        entries.sort(key=lambda e: (e["line_start"], -e["line_end"]))
+        open_ranges: List[Dict] = []
+        for entry in entries:
+            while open_ranges and open_ranges[-1]["line_end"] < entry["line_start"]:
+                open_ranges.pop()
+            entry["parent"] = open_ranges[-1]["id"] if open_ranges else None
+            open_ranges.append(entry)
+    return by_file
+
+
+def save_outlines(project_id: str, graph: Dict):
+    """Compute and persist a project's outlines (call after saving its graph)"""
+    outlines = build_outlines(graph)
+    path = outline_path(project_id)
+    tmp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        json.dump(outlines, f)
+    os.replace(tmp_path, path)
+
+
+def _load(project_id: str) -> Dict[str, FileOutline]:
+    """
+    Resident outlines of a project, (re)loaded when the outline file changed
+
+    Raises:
+        FileNotFoundError: If the project has no call graph
+    """
+    path = outline_path(project_id)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        # Indexed before outlines existed: derive them from the graph once
+        save_outlines(project_id, graph_store.load_graph(project_id))
+        stat = path.stat()
+    identity = (stat.st_ino, stat.st_mtime_ns)
+
+    cached = _cache.get(project_id)
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+    with _cache_lock:
+        cached = _cache.get(project_id)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        with open(path, "r") as f:
+            outlines = {file_path: FileOutline(entries) for file_path, entries in json.load(f).items()}
+        _cache[project_id] = (identity, outlines)
+        logger.debug(f"Loaded outlines of {len(outlines)} files for project {project_id}")
+        return outlines
+
+
+def get_outline(project_id: str, file_path: str) -> List[Dict]:
+    """
+    Outline of one file: its symbols nested under their enclosing symbols
+
+    Returns:
+        Tree of symbols (empty for files without indexed symbols)
+
+    Raises:
+        FileNotFoundError: If the project has no call graph
+    """
+    outline = _load(project_id).get(file_path)
+    return outline.tree() if outline else []
+
+
+def symbol_at(project_id: str, file_path: str, line: int) -> Optional[Dict]:
+    """
+    Innermost symbol enclosing a line, with its usage counts
+
+    Returns:
+        {"symbol": entry, "enclosing": [outermost .. innermost names]}, or None
+        if the line is outside every symbol
+
+    Raises:
+        FileNotFoundError: If the project has no call graph
+    """
+    outline = _load(project_id).get(file_path)
+    if outline is None:
+        return None
+    symbol = outline.index.symbol_at(line)
+    if symbol is None:
+        return None
+    return {
+        "symbol": symbol,
+        "enclosing": [entry["name"] for entry in outline.enclosing(symbol)],
+    }
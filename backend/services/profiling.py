@@ -0,0 +1,178 @@
+"""
+Profiling service - profiles single requests on demand and stores the results
+
+Two profilers are available:
+
+- "sample": a background thread records the stacks of every thread every
+  PROFILE_SAMPLE_INTERVAL_MS and writes them as collapsed stacks
+  ("frame;frame;frame count", the input of flamegraph.pl and speedscope).
+  It sees threadpool work such as encoding and sync endpoints, at low overhead.
+- "cprofile": deterministic cProfile of the event loop thread, written as a
+  pstats file (python -m pstats, snakeviz). Exact call counts, but it misses
+  work done in other threads and slows the request down.
+
+Both see everything else the process does meanwhile, so profile on a quiet
+worker. Only one request is profiled at a time.
+"""
+import cProfile
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_SAMPLE_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile")
+_EXTENSIONS = {"sample": ".collapsed", "cprofile": ".prof"}
+
+_active = threading.Lock()
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads (except its own) from a background thread"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)).replace(";", ":"))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path):
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfile:
+    """A running profile of one request; finish() saves it"""
+
+    def __init__(self, mode: str):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.mode = mode
+        self._started = time.perf_counter()
+        if mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            self._profiler.start()
+
+    def finish(self, endpoint: str, status: int):
+        """Stop profiling, write the profile and its description, and prune old profiles"""
+        try:
+            if self.mode == "cprofile":
+                self._profiler.disable()
+            else:
+                self._profiler.stop()
+            seconds = time.perf_counter() - self._started
+
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            if self.mode == "cprofile":
+                self._profiler.dump_stats(str(PROFILE_DIR / f"{self.id}.prof"))
+            else:
+                self._profiler.write(PROFILE_DIR / f"{self.id}.collapsed")
+            info = {
+                "id": self.id,
+                "mode": self.mode,
+                "endpoint": endpoint,
+                "status": status,
+                "seconds": round(seconds, 4),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            (PROFILE_DIR / f"{self.id}.json").write_text(json.dumps(info))
+            logger.info(f"Saved {self.mode} profile {self.id} of {endpoint} ({seconds:.3f}s)")
+            _prune()
+        except Exception as e:
+            logger.error(f"Error saving profile {self.id}: {str(e)}", exc_info=True)
+        finally:
+            _active.release()
+
+
+def start(mode: str) -> Optional[RequestProfile]:
+    """
+    Start profiling a request
+
+    Returns:
+        The running profile, or None if another request is being profiled
+
+    Raises:
+        ValueError: If mode is not one of MODES
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode '{mode}' (expected one of {', '.join(MODES)})")
+    if not _active.acquire(blocking=False):
+        return None
+    try:
+        return RequestProfile(mode)
+    except BaseException:
+        _active.release()
+        raise
+
+
+def _prune():
+    infos = sorted(PROFILE_DIR.glob("*.json"))
+    for info_path in infos[:max(len(infos) - PROFILE_MAX_FILES, 0)]:
+        for path in PROFILE_DIR.glob(f"{info_path.stem}.*"):
+            path.unlink(missing_ok=True)
+
+
+def list_profiles() -> List[Dict]:
+    """Descriptions of the stored profiles, newest first"""
+    if not PROFILE_DIR.exists():
+        return []
+    profiles = []
+    for info_path in sorted(PROFILE_DIR.glob("*.json"), reverse=True):
+        try:
+            profiles.append(json.loads(info_path.read_text()))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return profiles
+
+
+def profile_path(profile_id: str) -> Path:
+    """
+    Path of a stored profile file
+
+    Raises:
+        FileNotFoundError: If no profile with this ID exists
+    """
+    # IDs are generated by RequestProfile; anything else can't name a profile
+    if "/" in profile_id or "\\" in profile_id or profile_id.startswith("."):
+        raise FileNotFoundError(f"Profile '{profile_id}' not found")
+    for extension in _EXTENSIONS.values():
+        path = PROFILE_DIR / f"{profile_id}{extension}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"Profile '{profile_id}' not found")
@@ -1,66 +1,146 @@
 """
 Project service - handles project creation and indexing
 """
+import asyncio
 import logging
+import re
+from dataclasses import asdict
 from models.project import ProjectCreate, ProjectResponse
-from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import zipfile
-import tempfile
-import os
 from pathlib import Path
+from db.project_registry import ProjectRegistry
+from services import artifact_cache, blob_store, file_content_service, graph_store, manifest_service, metrics, summary_service
+from services.ingest_filter import IngestFilter, IngestRules, SkipStats
 from services.indexing_service import IndexingService
-from config import BACKEND_DIR
+from config import BACKEND_DIR, INDEXING_LEASE_SECONDS, REGISTRY_DB_PATH, REGISTRY_POOL_SIZE, SUMMARIES_AFTER_INDEX
 
 logger = logging.getLogger(__name__)
 
-# In-memory storage for MVP (will be replaced with SQLite later)
-_projects_db = {}
-_next_id = 1
+# Durable project registry (SQLite); projects survive restarts with their indexes
+_registry = ProjectRegistry(REGISTRY_DB_PATH, pool_size=REGISTRY_POOL_SIZE)
 _indexing_service = IndexingService()
 PROJECTS_DATA_DIR = BACKEND_DIR / "data" / "projects"
 PROJECTS_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _inspect_project_dir(project_id: int, project_dir: Path) -> Tuple[bool, int]:
+    """(indexed, file_count) of a project directory found on disk, from its existing artifacts"""
+    manifest_path = project_dir / manifest_service.MANIFEST_FILE
+    indexed = graph_store.graph_exists(str(project_id)) and manifest_path.exists()
+    if not indexed:
+        return False, 0
+    return True, len(manifest_service.get_manifest(project_id, project_dir).files)
+
+
+def reattach_projects() -> dict:
+    """
+    Reattach the registry to the artifacts on disk at startup
+    
+    Nothing is re-indexed: registered projects keep their FAISS indexes, graphs and
+    manifests, indexing runs whose worker died are marked failed, and project directories
+    from before the registry existed are adopted.
+    """
+    result = _registry.reattach(PROJECTS_DATA_DIR, _inspect_project_dir, INDEXING_LEASE_SECONDS)
+    logger.info(
+        f"Project registry: {result['registered']} projects "
+        f"({result['adopted']} adopted from disk, {result['interrupted']} interrupted)"
+    )
+    return result
+
+
 class ProjectService:
     def create_project(self, project: ProjectCreate) -> ProjectResponse:
         """Create a new project"""
-        global _next_id
-        project_id = _next_id
-        _next_id += 1
+        project_data = _registry.create(project.name, project.description, PROJECTS_DATA_DIR)
         
         # Create project directory
-        project_dir = PROJECTS_DATA_DIR / str(project_id)
-        project_dir.mkdir(parents=True, exist_ok=True)
-        
-        project_data = {
-            "id": project_id,
-            "name": project.name,
-            "description": project.description,
-            "created_at": datetime.now(),
-            "file_count": 0,
-            "project_path": str(project_dir),
-        }
-        _projects_db[project_id] = project_data
+        Path(project_data["project_path"]).mkdir(parents=True, exist_ok=True)
         return ProjectResponse(**project_data)
     
     def get_project(self, project_id: int) -> Optional[ProjectResponse]:
         """Get project by ID"""
-        project_data = _projects_db.get(project_id)
+        project_data = _registry.get(project_id)
         if project_data:
             return ProjectResponse(**project_data)
         return None
     
     def list_projects(self) -> List[ProjectResponse]:
         """List all projects"""
-        return [ProjectResponse(**proj) for proj in _projects_db.values()]
+        return [ProjectResponse(**proj) for proj in _registry.list()]
+    
+    def _require_project(self, project_id: int) -> dict:
+        """Registry row of a project; raises ValueError if it doesn't exist"""
+        project_data = _registry.get(project_id)
+        if project_data is None:
+            raise ValueError(f"Project {project_id} not found")
+        return project_data
     
     async def upload_and_index(self, project_id: int, file) -> dict:
         """Upload zip file, extract, and index the project"""
-        if project_id not in _projects_db:
-            raise ValueError(f"Project {project_id} not found")
+        project_dir = Path(self._require_project(project_id)["project_path"])
+        _registry.mark_indexing(project_id)
+        heartbeat = asyncio.create_task(self._heartbeat(project_id))
+        write_lock = graph_store.write_lock(str(project_id))
+        await write_lock.acquire_async()
+        try:
+            result = await self._extract_and_index(project_id, project_dir, file)
+        except Exception as e:
+            _registry.mark_failed(project_id, str(e))
+            raise
+        finally:
+            write_lock.release()
+            heartbeat.cancel()
+        result["index_generation"] = _registry.mark_ready(project_id, result.get("file_count", 0))
+        self._start_summaries_after_index(project_id, project_dir)
+        return result
+    
+    async def _heartbeat(self, project_id: int):
+        """Renew this worker's lease on a running index until cancelled"""
+        while True:
+            await asyncio.sleep(INDEXING_LEASE_SECONDS / 3)
+            _registry.heartbeat(project_id)
+    
+    def get_ingest_rules(self, project_id: int) -> IngestRules:
+        """Ingest rules of a project (defaults when none were set); raises ValueError if it doesn't exist"""
+        self._require_project(project_id)
+        return IngestRules.from_dict(_registry.get_ingest_rules(project_id))
+    
+    def set_ingest_rules(self, project_id: int, rules: IngestRules) -> IngestRules:
+        """
+        Store the ingest rules applied to the project's next uploads
         
-        project_dir = Path(_projects_db[project_id]["project_path"])
+        Raises:
+            ValueError: If the project doesn't exist or a glob is invalid
+        """
+        self._require_project(project_id)
+        try:
+            IngestFilter(rules)
+        except re.error as e:
+            raise ValueError(f"Invalid glob in ingest rules: {e}")
+        _registry.set_ingest_rules(project_id, asdict(rules))
+        return rules
+    
+    def start_summaries(self, project_id: int) -> dict:
+        """
+        Start (or report) the background summary job of a project
+        
+        Raises:
+            ValueError: If the project doesn't exist or the LLM is not configured
+        """
+        project_dir = Path(self._require_project(project_id)["project_path"])
+        return summary_service.start(project_id, project_dir)
+    
+    def _start_summaries_after_index(self, project_id: int, project_dir: Path):
+        """Restart the summary job after the index changed, if enabled (only new code is summarized)"""
+        if not SUMMARIES_AFTER_INDEX:
+            return
+        try:
+            summary_service.start(project_id, project_dir, restart=True)
+        except ValueError as e:
+            logger.warning(f"Not starting summary job for project {project_id}: {e}")
+    
+    async def _extract_and_index(self, project_id: int, project_dir: Path, file) -> dict:
         
         # Clear existing project files
         if project_dir.exists():
@@ -68,71 +148,191 @@ class ProjectService:
             shutil.rmtree(project_dir)
         project_dir.mkdir(parents=True, exist_ok=True)
         
-        # Save uploaded zip file
-        zip_path = project_dir / "project.zip"
-        with open(zip_path, "wb") as f:
-            content = file.file.read()
-            f.write(content)
-        
-        # Extract zip to project directory
+        # Extract the zip into the blob store and link each file into the project's source tree
         extract_path = project_dir / "source"
         extract_path.mkdir(parents=True, exist_ok=True)
         
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_path)
+        # Extraction runs in a worker thread so other requests are served meanwhile
+        rules = IngestRules.from_dict(_registry.get_ingest_rules(project_id))
+        with metrics.ZIP_EXTRACT_SECONDS.labels(project_id).time():
+            dedup, manifest_entries, skipped = await asyncio.to_thread(
+                self._extract_zip, file.file, extract_path, rules
+            )
+        logger.info(
+            f"Extracted {dedup['files']} files for project {project_id}: "
+            f"{dedup['bytes_saved']} of {dedup['bytes_total']} bytes deduplicated, "
+            f"{skipped.skipped} entries ({skipped.skipped_bytes} bytes) skipped"
+        )
         
         # Index the project
         result = await _indexing_service.index_project(project_id, str(extract_path))
         
-        # Update project file count
-        _projects_db[project_id]["file_count"] = result.get("file_count", 0)
+        # Record the file tree (with symbol counts) once, so listings never walk the tree
+        symbol_counts = {f["path"].replace("\\", "/"): f["symbols"] for f in result.get("files", [])}
+        for entry in manifest_entries:
+            entry["symbols"] = symbol_counts.get(entry["path"], 0)
+        manifest_service.save_manifest(project_id, project_dir, manifest_entries)
         
+        # The old tree is gone, so blobs only it used are unreferenced now
+        result["reclaimed"] = await asyncio.to_thread(self._reclaim_storage)
+        result["dedup"] = dedup
+        result["ingest"] = skipped.to_dict()
         return result
     
+    def _reclaim_storage(self) -> dict:
+        """Remove unreferenced blobs and prune the artifact caches to their size bound"""
+        return {"blobs": blob_store.sweep(), "cache": artifact_cache.prune()}
+    
+    def _extract_zip(self, zip_file, extract_path: Path, rules: IngestRules) -> tuple:
+        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            return self._extract_to_blob_store(zip_ref, extract_path, rules)
+    
+    def _extract_to_blob_store(self, zip_ref: zipfile.ZipFile, extract_path: Path, rules: IngestRules) -> tuple:
+        """
+        Store the zip entries that pass the ingest filter in the blob store and link them under extract_path
+        
+        Returns:
+            (dedup statistics, manifest entries, SkipStats) - statistics cover files, new blobs, total bytes,
+            bytes actually stored, bytes saved by hard links to existing blobs, bytes copied (where hard
+            links failed) and the dedup ratio
+        """
+        root = extract_path.resolve()
+        stats = {"files": 0, "new_blobs": 0, "bytes_total": 0, "bytes_stored": 0, "bytes_saved": 0, "bytes_copied": 0}
+        manifest_entries = []
+        skipped = SkipStats()
+        
+        # Security: skip entries that would escape the source directory (zip slip)
+        entries = []
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            dest = (extract_path / info.filename).resolve()
+            try:
+                entries.append((info, dest, dest.relative_to(root).as_posix()))
+            except ValueError:
+                logger.warning(f"Skipping zip entry outside the project: {info.filename}")
+        
+        # .gitignore files are read up front so their rules apply to every entry
+        gitignores = [
+            (rel_path, zip_ref.read(info).decode("utf-8", errors="replace"))
+            for info, _, rel_path in entries
+            if rel_path.rsplit("/", 1)[-1] == ".gitignore" and info.file_size <= 1024 * 1024
+        ] if rules.use_gitignore else []
+        ingest_filter = IngestFilter(rules, gitignores)
+        
+        for info, dest, rel_path in entries:
+            skipped.entries += 1
+            reason = ingest_filter.check_entry(rel_path, info.file_size)
+            if reason is None:
+                data = zip_ref.read(info)
+                reason = ingest_filter.check_content(rel_path, data)
+            if reason is not None:
+                skipped.skip(rel_path, info.file_size, reason)
+                continue
+            
+            digest, created, linked = blob_store.put_file(data, dest)
+            if not manifest_service.is_ignored(rel_path):
+                manifest_entries.append(manifest_service.make_entry(rel_path, len(data), digest))
+            stats["files"] += 1
+            stats["bytes_total"] += len(data)
+            if created:
+                stats["new_blobs"] += 1
+                stats["bytes_stored"] += len(data)
+            if not linked:
+                # A copy takes space of its own, whether or not the blob already existed
+                stats["bytes_copied"] += len(data)
+            elif not created:
+                stats["bytes_saved"] += len(data)
+        
+        used = stats["bytes_total"] - stats["bytes_saved"]
+        stats["dedup_ratio"] = round(stats["bytes_total"] / used, 3) if used else None
+        return stats, manifest_entries, skipped
+    
     async def list_files(self, project_id: int) -> List[str]:
         """List all files in a project"""
-        if project_id not in _projects_db:
-            raise ValueError(f"Project {project_id} not found")
+        manifest = self._get_manifest(project_id)
+        return [entry["path"] for entry in manifest.files]
+    
+    async def list_directory(self, project_id: int, path: str = "", offset: int = 0, limit: int = 200) -> dict:
+        """List one directory of a project (subdirectories first, then files), paginated"""
+        return self._get_manifest(project_id).list_directory(path, offset, limit)
+    
+    def _get_manifest(self, project_id: int) -> manifest_service.Manifest:
+        """Resident file-tree manifest of a project; raises ValueError if the project doesn't exist"""
+        project_data = self._require_project(project_id)
+        return manifest_service.get_manifest(project_id, Path(project_data["project_path"]))
+    
+    def resolve_file(self, project_id: int, file_path: str) -> Tuple[Path, str]:
+        """
+        Resolve a project file to its path on disk and its content digest
         
-        project_path = Path(_projects_db[project_id]["project_path"]) / "source"
+        Returns:
+            (full path, SHA-256 digest of the content)
         
-        if not project_path.exists():
-            return []
+        Raises:
+            ValueError: If the project doesn't exist or the path escapes the project
+            FileNotFoundError: If the file doesn't exist
+        """
+        project_path = Path(self._require_project(project_id)["project_path"]) / "source"
+        full_path = project_path / file_path
         
-        files = []
-        for root, dirs, filenames in os.walk(project_path):
-            # Skip common ignore directories
-            dirs[:] = [d for d in dirs if d not in {'.git', '__pycache__', 'node_modules', '.venv', '.pytest_cache'}]
-            
-            for filename in filenames:
-                file_path = Path(root) / filename
-                rel_path = os.path.relpath(file_path, project_path)
-                files.append(rel_path.replace("\\", "/"))  # Normalize path separators
+        # Security: ensure the file is within the project directory
+        try:
+            rel_path = full_path.resolve().relative_to(project_path.resolve())
+        except ValueError:
+            raise ValueError(f"Invalid file path: {file_path}")
+        
+        if not full_path.is_file():
+            raise FileNotFoundError(f"File not found: {file_path}")
         
-        return sorted(files)
+        entry = self._get_manifest(project_id).by_path.get(rel_path.as_posix())
+        if entry is not None and entry.get("digest") and entry.get("size") == full_path.stat().st_size:
+            return full_path, entry["digest"]
+        with open(full_path, 'rb') as f:
+            return full_path, blob_store.digest_bytes(f.read())
     
     async def get_file_content(self, project_id: int, file_path: str) -> str:
         """Get the content of a file in a project"""
-        if project_id not in _projects_db:
-            raise ValueError(f"Project {project_id} not found")
+        full_path, _ = self.resolve_file(project_id, file_path)
         
-        project_path = Path(_projects_db[project_id]["project_path"]) / "source"
+        # Read once and decode the bytes (UTF-8, falling back to latin-1)
+        with open(full_path, 'rb') as f:
+            return file_content_service.decode(f.read())
+    
+    async def update_file(self, project_id: int, file_path: str, content: str) -> dict:
+        """Write a file in a project and re-index only that file"""
+        project_dir = Path(self._require_project(project_id)["project_path"])
+        project_path = project_dir / "source"
         full_path = project_path / file_path
         
         # Security: ensure the file is within the project directory
         try:
-            full_path.resolve().relative_to(project_path.resolve())
+            rel_path = full_path.resolve().relative_to(project_path.resolve())
         except ValueError:
             raise ValueError(f"Invalid file path: {file_path}")
         
-        if not full_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
-        
+        # The file, its vectors, the graph and the manifest are updated under one cross-process
+        # lock, so concurrent saves to the same project apply one after the other
+        write_lock = graph_store.write_lock(str(project_id))
+        await write_lock.acquire_async()
         try:
-            with open(full_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            with open(full_path, 'r', encoding='latin-1') as f:
-                return f.read()
-
+            # Files are hard links into the read-only blob store, so replace rather than overwrite
+            data = content.encode('utf-8')
+            previous = self._get_manifest(project_id).by_path.get(rel_path.as_posix())
+            digest, _, _ = blob_store.put_file(data, full_path)
+            if previous is not None and previous.get("digest") not in (None, digest):
+                blob_store.release(previous["digest"])
+            
+            result = await _indexing_service.reindex_file(project_id, str(project_path), rel_path.as_posix())
+            
+            manifest_service.update_file(
+                project_id,
+                project_dir,
+                manifest_service.make_entry(rel_path.as_posix(), len(data), digest, result["symbols_extracted"]),
+            )
+            result["index_generation"] = _registry.mark_ready(project_id)
+        finally:
+            write_lock.release()
+        await asyncio.to_thread(artifact_cache.maybe_prune)
+        self._start_summaries_after_index(project_id, project_dir)
+        return result
@@ -0,0 +1,91 @@
+"""
+Serialization helpers - fast JSON responses, field projection, pagination and timing
+
+FastJSONResponse renders with orjson and reports how long rendering took in a
+Server-Timing header; ServerTimingMiddleware aggregates those timings per
+endpoint. Routers with large payloads return FastJSONResponse directly, which
+also skips FastAPI's jsonable_encoder pass over the content.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson response that records its render time"""
+
+    serialize_seconds = 0.0
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = orjson.dumps(content, option=_ORJSON_OPTIONS)
+        self.serialize_seconds = time.perf_counter() - started
+        return body
+
+    def init_headers(self, headers=None) -> None:
+        super().init_headers(headers)
+        self.raw_headers.append(
+            (b"server-timing", f"serialize;dur={self.serialize_seconds * 1000:.3f}".encode("latin-1"))
+        )
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated field list ("id,name,file_path"); None means all fields"""
+    if not fields:
+        return None
+    parsed = [field.strip() for field in fields.split(",") if field.strip()]
+    return parsed or None
+
+
+def project(items: Iterable[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Keep only the given fields of each item (all fields when fields is None)"""
+    if not fields:
+        return list(items)
+    return [{field: item[field] for field in fields if field in item} for item in items]
+
+
+class Page(NamedTuple):
+    """Offset and limit of one paginated list; responses with several lists take one Page per list"""
+    offset: int = 0
+    limit: Optional[int] = None
+
+
+def paginate(items: List, offset: int = 0, limit: Optional[int] = None) -> List:
+    """Slice a list for one page (everything from offset when limit is None)"""
+    if limit is None:
+        return items[offset:]
+    return items[offset:offset + limit]
+
+
+# Per-endpoint serialization stats: endpoint -> {count, total_ms, max_ms, total_bytes}
+_timings: Dict[str, Dict[str, float]] = {}
+_timings_lock = threading.Lock()
+
+
+def record_timing(endpoint: str, serialize_ms: float, body_bytes: int):
+    """Add one response's serialization time and size to an endpoint's stats"""
+    with _timings_lock:
+        stats = _timings.setdefault(endpoint, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "total_bytes": 0})
+        stats["count"] += 1
+        stats["total_ms"] += serialize_ms
+        stats["max_ms"] = max(stats["max_ms"], serialize_ms)
+        stats["total_bytes"] += body_bytes
+
+
+def get_timings() -> Dict[str, Dict[str, float]]:
+    """Serialization stats per endpoint, with averages"""
+    with _timings_lock:
+        return {
+            endpoint: {
+                "count": int(stats["count"]),
+                "avg_ms": round(stats["total_ms"] / stats["count"], 3),
+                "max_ms": round(stats["max_ms"], 3),
+                "avg_bytes": int(stats["total_bytes"] / stats["count"]),
+            }
+            for endpoint, stats in sorted(_timings.items())
+        }
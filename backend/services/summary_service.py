@@ -0,0 +1,381 @@
+"""
+Summary service - background LLM summaries of every function, method and class
+
+A summary job takes the parsed symbols of each file in a project's manifest
+from the parse cache and asks the LLM for a short summary of every symbol that
+has none yet, with bounded concurrency. Summaries are stored in the artifact
+cache by the hash of the symbol's normalized code, so a restarted job (or
+another project with the same code) only pays for what is missing. Job
+progress and the project's symbol -> summary key map are written to
+<project_id>.summaries.json; explain and chat look summaries up through it.
+
+A job runs in one worker process at a time: the worker that starts or resumes
+it holds a lock on <project_id>.summaries.lock until the job ends. A restart
+requested in another worker is handed over through <project_id>.summaries.restart
+and picked up at the job's next progress write.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import GRAPH_DATA_DIR, OPENAI_API_KEY, SUMMARY_CONCURRENCY, SUMMARY_MAX_CODE_CHARS
+from services import artifact_cache, manifest_service, metrics
+from services.ast_parser import ASTParser
+from services.file_lock import FileLock
+from services.llm_service import generate_response
+
+logger = logging.getLogger(__name__)
+
+_SUMMARY_TYPES = {"function", "async_function", "method", "async_method", "class"}
+# Progress is written to disk after this many symbols
+_PROGRESS_EVERY = 20
+
+_SYSTEM_PROMPT = (
+    "You summarize code for developers navigating a repository. "
+    "Describe what the given symbol does and how, in at most three sentences. "
+    "End with one line 'Complexity: low', 'Complexity: medium' or 'Complexity: high'."
+)
+
+_ast_parser = ASTParser()
+
+# Running jobs and their live progress: project_id -> task / progress dict
+_jobs: Dict[str, asyncio.Task] = {}
+_progress: Dict[str, Dict] = {}
+# Jobs claimed by this process: project_id -> lock held while the job runs here
+_claims: Dict[str, FileLock] = {}
+
+# Loaded symbol maps: project_id -> (state file mtime, "file_path::name" -> key, set of keys)
+_maps: Dict[str, Tuple[int, Dict[str, str], set]] = {}
+
+
+def summaries_path(project_id: str) -> Path:
+    """Get the summary job state file path for a project"""
+    return GRAPH_DATA_DIR / f"{project_id}.summaries.json"
+
+
+def _claim_path(project_id: str) -> Path:
+    return GRAPH_DATA_DIR / f"{project_id}.summaries.lock"
+
+
+def _restart_path(project_id: str) -> Path:
+    return GRAPH_DATA_DIR / f"{project_id}.summaries.restart"
+
+
+def _claim(project_id: str) -> bool:
+    """Claim a project's summary job for this process; False if another worker runs it"""
+    if project_id in _claims:
+        return True
+    lock = FileLock(_claim_path(project_id))
+    if not lock.try_acquire():
+        return False
+    _claims[project_id] = lock
+    return True
+
+
+def _release_claim(project_id: str):
+    lock = _claims.pop(project_id, None)
+    if lock is not None:
+        lock.release()
+
+
+def _runs_elsewhere(project_id: str) -> bool:
+    """True if another worker process holds the project's job claim"""
+    if project_id in _claims:
+        return False
+    lock = FileLock(_claim_path(project_id))
+    if not lock.try_acquire():
+        return True
+    lock.release()
+    return False
+
+
+def _take_restart(project_id: str) -> bool:
+    """Consume a restart requested by another worker"""
+    try:
+        _restart_path(project_id).unlink()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def symbol_ref(file_path: str, name: str) -> str:
+    """Key of a symbol in a project's summary map"""
+    return f"{file_path}::{name}"
+
+
+def parse_complexity(text: str) -> str:
+    """Complexity level stated in an LLM answer (medium if none is stated)"""
+    lowered = text.lower()
+    if "complexity: low" in lowered or "low complexity" in lowered:
+        return "low"
+    if "complexity: high" in lowered or "high complexity" in lowered:
+        return "high"
+    return "medium"
+
+
+def _collect_symbols(project_id: int, project_dir: Path) -> List[Dict]:
+    """Functions, methods and classes of a project, from the parse cache (files it lacks are parsed)"""
+    manifest = manifest_service.get_manifest(project_id, project_dir)
+    collected = []
+    for entry in manifest.files:
+        if entry.get("language") != "python":
+            continue
+        symbols = artifact_cache.get_symbols(entry["digest"], "python")
+        if symbols is None:
+            try:
+                with open(Path(project_dir) / "source" / entry["path"], "r", encoding="utf-8") as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"Skipping {entry['path']} in summary job: {e}")
+                continue
+            symbols = _ast_parser.parse_source(content, entry["path"], "python")
+            artifact_cache.put_symbols(entry["digest"], "python", symbols)
+        for symbol in symbols:
+            if symbol.get("type") in _SUMMARY_TYPES and symbol.get("code"):
+                collected.append({
+                    "ref": symbol_ref(entry["path"], symbol["name"]),
+                    "name": symbol["name"],
+                    "type": symbol["type"],
+                    "file_path": entry["path"],
+                    "code": symbol["code"],
+                    "key": artifact_cache.summary_key(symbol["code"]),
+                })
+    return collected
+
+
+async def _summarize(symbol: Dict):
+    """Generate and store the summary of one symbol"""
+    code = symbol["code"]
+    if len(code) > SUMMARY_MAX_CODE_CHARS:
+        code = code[:SUMMARY_MAX_CODE_CHARS] + "\n# ... (truncated)"
+    user_prompt = (
+        f"File: {symbol['file_path']}\n"
+        f"Symbol: {symbol['type']} {symbol['name']}\n\n"
+        f"```\n{code}\n```"
+    )
+    text = await generate_response(_SYSTEM_PROMPT, user_prompt, temperature=0.2)
+    # The complexity line is stored as its own field
+    summary = "\n".join(line for line in text.strip().splitlines() if not line.lower().startswith("complexity:"))
+    artifact_cache.put_summary(symbol["key"], {
+        "summary": summary.strip(),
+        "complexity": parse_complexity(text),
+        "name": symbol["name"],
+    })
+
+
+def _write_state(project_id: str, progress: Dict, refs: Optional[Dict[str, str]] = None):
+    """Persist job progress (and the symbol map when given, else the stored one is kept)"""
+    path = summaries_path(project_id)
+    if refs is None:
+        refs = _read_state(project_id).get("symbols", {})
+    tmp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        json.dump({**progress, "symbols": refs}, f)
+    os.replace(tmp_path, path)
+
+
+def _read_state(project_id: str) -> Dict:
+    try:
+        with open(summaries_path(project_id), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+async def _run(project_id: int, project_dir: Path):
+    project_id_str = str(project_id)
+    progress = _progress[project_id_str]
+    # LLM metrics of the job are labelled "background", not with the request that started it
+    metrics.set_request_scope(None)
+    started = time.perf_counter()
+    try:
+        while True:
+            symbols = await asyncio.to_thread(_collect_symbols, project_id, project_dir)
+            refs = {symbol["ref"]: symbol["key"] for symbol in symbols}
+            unique = {symbol["key"]: symbol for symbol in symbols}
+            pending = [symbol for key, symbol in unique.items() if not artifact_cache.has_summary(key)]
+            progress.update(symbols=len(refs), pending=len(pending), cached=len(unique) - len(pending))
+            await asyncio.to_thread(_write_state, project_id_str, dict(progress), refs)
+            logger.info(
+                f"Summary job for project {project_id}: {len(pending)} of {len(unique)} distinct symbols to summarize"
+            )
+
+            remaining = iter(pending)
+            restart = False
+
+            async def worker():
+                nonlocal restart
+                # Workers share one iterator, so each symbol is summarized once
+                for symbol in remaining:
+                    try:
+                        await _summarize(symbol)
+                        progress["summarized"] += 1
+                    except Exception as e:
+                        progress["failed"] += 1
+                        logger.warning(f"Could not summarize {symbol['ref']} for project {project_id}: {e}")
+                    progress["pending"] -= 1
+                    if (progress["summarized"] + progress["failed"]) % _PROGRESS_EVERY == 0:
+                        await asyncio.to_thread(_write_state, project_id_str, dict(progress))
+                        restart = restart or _take_restart(project_id_str)
+                    if restart:
+                        return
+
+            await asyncio.gather(*(worker() for _ in range(max(1, min(SUMMARY_CONCURRENCY, len(pending))))))
+            if not (restart or _take_restart(project_id_str)):
+                break
+            # Another worker re-indexed the project: start over on its new symbols
+            logger.info(f"Restarting summary job for project {project_id} on request of another worker")
+        progress["state"] = "done"
+    except asyncio.CancelledError:
+        progress["state"] = "cancelled"
+        raise
+    except Exception as e:
+        progress["state"] = "failed"
+        progress["error"] = str(e)
+        logger.error(f"Summary job for project {project_id} failed: {str(e)}", exc_info=True)
+    finally:
+        progress["seconds"] = round(time.perf_counter() - started, 3)
+        if progress["state"] != "cancelled":
+            # A cancelled job stays "running" on disk, so it is resumed at the next startup
+            await asyncio.to_thread(_write_state, project_id_str, dict(progress))
+        # A restart in this process hands the claim over to the new task
+        if _jobs.get(project_id_str) is asyncio.current_task():
+            _release_claim(project_id_str)
+        logger.info(
+            f"Summary job for project {project_id} {progress['state']}: "
+            f"{progress['summarized']} summarized, {progress['failed']} failed in {progress['seconds']:.1f}s"
+        )
+
+
+def start(project_id: int, project_dir: Path, restart: bool = False) -> Dict:
+    """
+    Start a project's summary job in the background
+
+    Args:
+        project_id: Project identifier
+        project_dir: Project directory (holding the manifest and source tree)
+        restart: Cancel a running job and start over (after a re-index); otherwise a
+            running job is left alone. A job running in another worker is asked to
+            restart instead.
+
+    Returns:
+        Job progress
+
+    Raises:
+        ValueError: If the LLM is not configured
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("Summaries need the LLM: OPENAI_API_KEY is not set")
+    project_id_str = str(project_id)
+    running = _jobs.get(project_id_str)
+    if running is not None and not running.done():
+        if not restart:
+            return get_status(project_id_str)
+        running.cancel()
+    elif not _claim(project_id_str):
+        # The job runs in another worker process
+        if restart:
+            _restart_path(project_id_str).touch()
+        return get_status(project_id_str)
+    _restart_path(project_id_str).unlink(missing_ok=True)
+
+    _progress[project_id_str] = {
+        "project_id": project_id,
+        "project_dir": str(project_dir),
+        "state": "running",
+        "symbols": None,
+        "pending": None,
+        "cached": None,
+        "summarized": 0,
+        "failed": 0,
+        "started_at": time.time(),
+    }
+    _jobs[project_id_str] = asyncio.create_task(_run(project_id, Path(project_dir)))
+    return get_status(project_id_str)
+
+
+def get_status(project_id: str) -> Dict:
+    """
+    Progress of a project's current or last summary job
+
+    Raises:
+        FileNotFoundError: If no summary job ever ran for the project
+    """
+    running = _jobs.get(project_id)
+    progress = _progress.get(project_id) if running is not None and not running.done() else None
+    if progress is None:
+        # Not running here: the state file also reflects jobs of other workers
+        state = _read_state(project_id)
+        if not state:
+            progress = _progress.get(project_id)
+            if progress is None:
+                raise FileNotFoundError(f"No summaries for project {project_id}. Start a summary job first.")
+        else:
+            progress = {**state, "symbols": len(state.get("symbols", {}))}
+            if progress.get("state") == "running" and not _runs_elsewhere(project_id):
+                progress["state"] = "interrupted"
+    return {key: value for key, value in progress.items() if key != "project_dir"}
+
+
+def resume_interrupted() -> List[str]:
+    """
+    Restart the jobs that were running when the process stopped (call from the event loop)
+
+    Each job is resumed by one worker only: the first to claim it.
+    """
+    resumed = []
+    for path in GRAPH_DATA_DIR.glob("*.summaries.json"):
+        project_id = path.name.split(".", 1)[0]
+        state = _read_state(project_id)
+        if state.get("state") == "running" and state.get("project_dir") and Path(state["project_dir"]).exists():
+            try:
+                start(int(project_id), Path(state["project_dir"]))
+                # Skipped when another worker claimed the job first
+                if project_id in _claims:
+                    resumed.append(project_id)
+            except ValueError as e:
+                logger.warning(f"Not resuming summary job for project {project_id}: {e}")
+    if resumed:
+        logger.info(f"Resumed summary jobs for projects {', '.join(resumed)}")
+    return resumed
+
+
+def cancel_all():
+    """Cancel running jobs (at shutdown); they are resumed at the next startup"""
+    for task in _jobs.values():
+        if not task.done():
+            task.cancel()
+
+
+def _symbol_map(project_id: str) -> Tuple[Dict[str, str], set]:
+    """A project's "file_path::name" -> summary key map, reloaded when the state file changed"""
+    try:
+        mtime = summaries_path(project_id).stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}, set()
+    cached = _maps.get(project_id)
+    if cached is None or cached[0] != mtime:
+        refs = _read_state(project_id).get("symbols", {})
+        cached = (mtime, refs, set(refs.values()))
+        _maps[project_id] = cached
+    return cached[1], cached[2]
+
+
+def find_by_code(project_id: str, code: str) -> Optional[Dict]:
+    """Stored summary of the project symbol whose code matches code (ignoring indentation), or None"""
+    _, keys = _symbol_map(project_id)
+    if not keys:
+        return None
+    key = artifact_cache.summary_key(code)
+    return artifact_cache.get_summary(key) if key in keys else None
+
+
+def find_by_symbol(project_id: str, file_path: str, name: str) -> Optional[Dict]:
+    """Stored summary of a project symbol, or None"""
+    refs, _ = _symbol_map(project_id)
+    key = refs.get(symbol_ref(file_path, name))
+    return artifact_cache.get_summary(key) if key else None
@@ -0,0 +1,78 @@
+"""
+Symbol interval index - the innermost symbol enclosing any line of a file
+
+Symbol line ranges nest (methods inside classes, closures inside functions).
+The index cuts a file into segments at every range boundary and stores the
+innermost symbol of each segment, so a line or a line range is resolved with
+one binary search plus the segments it spans.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+
+class SymbolIntervalIndex:
+    def __init__(self, symbols: Iterable[Dict]):
+        """
+        Args:
+            symbols: Symbols of one file with line_start and line_end (inclusive);
+                symbols without a line range are ignored
+        """
+        ranged = sorted(
+            (s for s in symbols if s.get("line_start") is not None),
+            key=lambda s: (s["line_start"], -s.get("line_end", s["line_start"]))
+        )
+        boundaries = sorted({s["line_start"] for s in ranged} | {s["line_end"] + 1 for s in ranged})
+
+        # Segment i covers lines starts[i] .. starts[i + 1] - 1 and belongs to owners[i] (None between symbols)
+        self._starts: List[int] = []
+        self._owners: List[Optional[Dict]] = []
+        active: List[Dict] = []
+        next_symbol = 0
+        for boundary in boundaries:
+            active = [s for s in active if s["line_end"] >= boundary]
+            while next_symbol < len(ranged) and ranged[next_symbol]["line_start"] == boundary:
+                active.append(ranged[next_symbol])
+                next_symbol += 1
+            # Innermost: latest start, then earliest end
+            owner = max(active, key=lambda s: (s["line_start"], -s["line_end"]), default=None)
+            self._starts.append(boundary)
+            self._owners.append(owner)
+
+    def symbol_at(self, line: int) -> Optional[Dict]:
+        """Innermost symbol containing line, or None for lines outside every symbol"""
+        position = bisect_right(self._starts, line) - 1
+        return self._owners[position] if position >= 0 else None
+
+    def symbols_in_range(self, start: int, end: int) -> List[Dict]:
+        """Innermost symbols of every line in start..end (inclusive), in line order without duplicates"""
+        found: List[Dict] = []
+        seen = set()
+        position = max(bisect_right(self._starts, start) - 1, 0)
+        while position < len(self._starts) and self._starts[position] <= end:
+            owner = self._owners[position]
+            next_start = self._starts[position + 1] if position + 1 < len(self._starts) else None
+            overlaps = next_start is None or next_start > start
+            if owner is not None and overlaps and id(owner) not in seen:
+                seen.add(id(owner))
+                found.append(owner)
+            position += 1
+        return found
+
+    def covered_lines(self, start: int, end: int) -> int:
+        """How many lines of start..end lie inside some symbol"""
+        covered = 0
+        position = max(bisect_right(self._starts, start) - 1, 0)
+        while position < len(self._starts) and self._starts[position] <= end:
+            if self._owners[position] is not None:
+                segment_end = self._starts[position + 1] - 1 if position + 1 < len(self._starts) else end
+                covered += max(0, min(segment_end, end) - max(self._starts[position], start) + 1)
+            position += 1
+        return covered
+
+
+def build_file_indexes(symbols: Iterable[Dict]) -> Dict[str, SymbolIntervalIndex]:
+    """One SymbolIntervalIndex per file_path of the given (graph) symbols"""
+    by_file: Dict[str, List[Dict]] = {}
+    for symbol in symbols:
+        by_file.setdefault(symbol.get("file_path"), []).append(symbol)
+    return {file_path: SymbolIntervalIndex(file_symbols) for file_path, file_symbols in by_file.items()}
@@ -1,19 +1,25 @@
 """
 Usage Service - handles call graph queries for symbol usage
 """
-import json
 import logging
-from pathlib import Path
+import time
 from typing import Dict, List, Optional
-from config import BACKEND_DIR
 
-logger = logging.getLogger(__name__)
+import numpy as np
+
+from services import graph_store, metrics, serialization
 
-GRAPH_DATA_DIR = BACKEND_DIR / "data" / "graph"
-GRAPH_DATA_DIR.mkdir(parents=True, exist_ok=True)
+logger = logging.getLogger(__name__)
 
 
-def get_usage(project_id: str, symbol_name: str, file_path: str) -> Dict:
+def get_usage(
+    project_id: str,
+    symbol_name: str,
+    file_path: str,
+    fields: Optional[List[str]] = None,
+    calls_page: serialization.Page = serialization.Page(),
+    called_by_page: serialization.Page = serialization.Page()
+) -> Dict:
     """
     Get usage information for a symbol (what it calls and what calls it)
     
@@ -21,59 +27,38 @@ def get_usage(project_id: str, symbol_name: str, file_path: str) -> Dict:
         project_id: Project identifier
         symbol_name: Name of the symbol (function/method name)
         file_path: Relative file path where the symbol is defined
+        fields: Symbol fields to return in calls/called_by (all fields if None)
+        calls_page: Page of calls to return
+        called_by_page: Page of called_by to return
     
     Returns:
-        Dictionary with symbol, calls (outgoing edges), and called_by (incoming edges)
+        Dictionary with symbol, calls (outgoing edges), called_by (incoming edges)
+        and the unpaginated totals calls_total and called_by_total
     
     Raises:
         FileNotFoundError: If graph file doesn't exist
         ValueError: If symbol not found
     """
-    graph_path = GRAPH_DATA_DIR / f"{project_id}.json"
-    
-    # Handle missing graph file gracefully
-    if not graph_path.exists():
-        logger.debug(f"Graph file not found for project {project_id}")
-        raise FileNotFoundError(f"Call graph not found for project {project_id}. Please index the project first.")
-    
-    try:
-        with open(graph_path, "r") as f:
-            graph_data = json.load(f)
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing graph JSON for project {project_id}: {str(e)}")
-        raise ValueError(f"Invalid graph data for project {project_id}")
-    except Exception as e:
-        logger.error(f"Error loading graph for project {project_id}: {str(e)}")
-        raise
+    graph = graph_store.open_graph(project_id)
     
-    symbols = graph_data.get("symbols", [])
-    edges = graph_data.get("edges", [])
+    traversal_started = time.perf_counter()
     
     # Find the symbol by name and file_path
-    symbol = None
-    symbol_id = None
-    
-    for s in symbols:
-        if s.get("name") == symbol_name and s.get("file_path") == file_path:
-            symbol = s
-            symbol_id = s.get("id")
-            break
-    
-    if symbol is None:
+    row = graph.find(symbol_name, file_path)
+    if row is None:
         logger.debug(f"Symbol '{symbol_name}' not found in file '{file_path}' for project {project_id}")
         raise ValueError(f"Symbol '{symbol_name}' not found in file '{file_path}'")
     
-    # Find what this symbol calls (outgoing edges)
-    calls_symbol_ids = [edge["to"] for edge in edges if edge["from"] == symbol_id]
-    calls = [s for s in symbols if s.get("id") in calls_symbol_ids]
-    
-    # Find what calls this symbol (incoming edges)
-    called_by_symbol_ids = [edge["from"] for edge in edges if edge["to"] == symbol_id]
-    called_by = [s for s in symbols if s.get("id") in called_by_symbol_ids]
+    # What this symbol calls (outgoing edges) and what calls it (incoming edges), in symbol
+    # order; only the requested page is decoded, so hub symbols stay cheap
+    calls = np.unique(graph.callees(row))
+    called_by = np.unique(graph.callers(row))
+    metrics.GRAPH_TRAVERSAL_SECONDS.labels(project_id, "usage").observe(time.perf_counter() - traversal_started)
     
     return {
-        "symbol": symbol,
-        "calls": calls,
-        "called_by": called_by
+        "symbol": graph.symbol(row),
+        "calls": serialization.project(graph.symbols(serialization.paginate(calls, *calls_page)), fields),
+        "called_by": serialization.project(graph.symbols(serialization.paginate(called_by, *called_by_page)), fields),
+        "calls_total": len(calls),
+        "called_by_total": len(called_by)
     }
-
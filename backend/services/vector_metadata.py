@@ -0,0 +1,235 @@
+"""
+Vector metadata store - per-vector metadata files that readers memory-map
+
+Metadata is written as JSON lines plus an offsets table (rows: vector IDs sorted
+ascending, line starts, line ends). Readers memory-map both files read-only and decode only the
+entries a search returns, so every worker process shares one page-cache copy
+instead of holding its own parsed dictionary.
+
+For filtered searches the offsets table also holds facet codes per vector
+(file path, symbol type, language), indexing into small vocabularies stored in
+a facets file. A filter is resolved to the matching vector IDs with array
+operations on the mapped table, without decoding any entry.
+
+Small updates (one file re-indexed) append their entries to the JSON lines in
+place and only rewrite the offsets table and vocabularies; lines of removed
+entries stay behind as dead bytes until the store is rewritten in full.
+"""
+import json
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from services.manifest_service import detect_language
+
+# Offsets table rows: vector ID, line start, line end, then one code per facet
+_FACETS = ("file_path", "type", "language")
+_FACET_ROW = 3
+
+
+def _facet_value(entry: Dict, facet: str) -> str:
+    if facet == "language":
+        return detect_language(entry.get("file_path", "")) or ""
+    return entry.get(facet) or ""
+
+
+@dataclass(frozen=True)
+class VectorFilter:
+    """Restricts a search to vectors under a path prefix, of some symbol types and/or of one language"""
+    path_prefix: Optional[str] = None
+    types: Optional[Tuple[str, ...]] = None
+    language: Optional[str] = None
+
+    @classmethod
+    def create(
+        cls,
+        path_prefix: Optional[str] = None,
+        types: Optional[Iterable[str]] = None,
+        language: Optional[str] = None,
+    ) -> "VectorFilter":
+        """Normalized filter ("./pkg/", "/pkg" and "pkg/" all mean "pkg"; empty values mean no filter)"""
+        if path_prefix:
+            path_prefix = path_prefix.replace("\\", "/").lstrip("/")
+            while path_prefix.startswith("./"):
+                path_prefix = path_prefix[2:]
+            path_prefix = path_prefix.rstrip("/")
+        return cls(path_prefix or None, tuple(sorted(set(types))) if types else None, language or None)
+
+    def __bool__(self) -> bool:
+        return bool(self.path_prefix or self.types or self.language)
+
+    def accepts(self, facet: str, value: str) -> bool:
+        if facet == "file_path":
+            # Whole path components only: "pkg" matches "pkg/a.py" and "pkg", not "pkg2/a.py"
+            return self.path_prefix is None or value == self.path_prefix or value.startswith(self.path_prefix + "/")
+        if facet == "type":
+            return self.types is None or value in self.types
+        return self.language is None or value == self.language
+
+    def matches(self, entry: Dict) -> bool:
+        return all(self.accepts(facet, _facet_value(entry, facet)) for facet in _FACETS)
+
+
+def write(metadata: Dict[int, Dict], data_path: Path, offsets_path: Path, facets_path: Path):
+    """
+    Write metadata (vector ID -> entry) as JSON lines, an offsets table and the facet vocabularies
+
+    Callers write to temporary paths and rename them into place.
+    """
+    ids = sorted(metadata)
+    values = {facet: [_facet_value(metadata[vector_id], facet) for vector_id in ids] for facet in _FACETS}
+    vocabularies = {facet: sorted(set(facet_values)) for facet, facet_values in values.items()}
+
+    # Row-major rows keep the IDs contiguous for binary search on the mapped file
+    offsets = np.zeros((_FACET_ROW + len(_FACETS), len(ids)), dtype=np.int64)
+    for row, facet in enumerate(_FACETS, _FACET_ROW):
+        codes = {value: code for code, value in enumerate(vocabularies[facet])}
+        offsets[row] = [codes[value] for value in values[facet]]
+    position = 0
+    with open(data_path, "wb") as f:
+        for row, vector_id in enumerate(ids):
+            line = json.dumps(dict(metadata[vector_id], id=vector_id)).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets[:3, row] = (vector_id, position, position + len(line))
+            position += len(line)
+    with open(offsets_path, "wb") as f:
+        np.save(f, offsets)
+    with open(facets_path, "w") as f:
+        json.dump(vocabularies, f)
+
+
+def append(
+    store: "MappedMetadata",
+    data_path: Path,
+    removed_ids: np.ndarray,
+    added: Dict[int, Dict],
+    offsets_path: Path,
+    facets_path: Path,
+):
+    """
+    Drop entries from a store and append new ones (IDs above every stored ID)
+
+    The new lines are appended to the data file in place; existing bytes never
+    change, so readers that mapped the file keep a consistent view. The new
+    offsets table and vocabularies (extended, never reordered) are written to
+    offsets_path and facets_path, which callers rename into place.
+    """
+    keep = ~np.isin(store._ids, removed_ids)
+    vocabularies = {facet: list(values) for facet, values in store._vocabularies.items()}
+    codes = {facet: {value: code for code, value in enumerate(values)} for facet, values in vocabularies.items()}
+
+    added_ids = sorted(added)
+    rows = np.zeros((_FACET_ROW + len(_FACETS), len(added_ids)), dtype=np.int64)
+    position = os.path.getsize(data_path)
+    with open(data_path, "ab") as f:
+        for column, vector_id in enumerate(added_ids):
+            entry = added[vector_id]
+            line = json.dumps(dict(entry, id=vector_id)).encode("utf-8") + b"\n"
+            f.write(line)
+            rows[:3, column] = (vector_id, position, position + len(line))
+            position += len(line)
+            for row, facet in enumerate(_FACETS, _FACET_ROW):
+                value = _facet_value(entry, facet)
+                if value not in codes[facet]:
+                    codes[facet][value] = len(vocabularies[facet])
+                    vocabularies[facet].append(value)
+                rows[row, column] = codes[facet][value]
+
+    # New IDs are above every stored one, so the IDs stay sorted
+    offsets = np.concatenate([np.asarray(store._offsets[:, keep]), rows], axis=1)
+    with open(offsets_path, "wb") as f:
+        np.save(f, offsets)
+    with open(facets_path, "w") as f:
+        json.dump(vocabularies, f)
+
+
+def read_all(data_path: Path, offsets_path: Path) -> Dict[int, Dict]:
+    """
+    Decode every current entry (used by writers, which rewrite the whole store)
+
+    Lines are located through the offsets table, so dead lines left behind by
+    appends are skipped.
+    """
+    return dict(MappedMetadata(data_path, offsets_path).items())
+
+
+class MappedMetadata:
+    """Read-only, memory-mapped view of a metadata store with dict-style lookups by vector ID"""
+
+    def __init__(self, data_path: Path, offsets_path: Path, facets_path: Optional[Path] = None):
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+        self._ids = self._offsets[0]
+        # Stores written before facets existed have only the first three rows
+        self._vocabularies: Optional[Dict[str, List[str]]] = None
+        if facets_path is not None and self._offsets.shape[0] > _FACET_ROW and facets_path.exists():
+            with open(facets_path, "r") as f:
+                self._vocabularies = json.load(f)
+        self._data = b""
+        if os.path.getsize(data_path):
+            with open(data_path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def appendable(self) -> bool:
+        """True if the store has facet codes (older stores are rewritten in full instead)"""
+        return self._vocabularies is not None
+
+    def max_id(self) -> int:
+        return int(self._ids[-1]) if len(self._ids) else -1
+
+    def live_bytes(self) -> int:
+        """Bytes of the data file used by current entries"""
+        return int((self._offsets[2] - self._offsets[1]).sum())
+
+    def items(self) -> Iterable[Tuple[int, Dict]]:
+        """(vector ID, decoded entry) pairs"""
+        return ((vector_id, self.get(vector_id)) for vector_id in self._ids.tolist())
+
+    def select_files(self, file_paths: Iterable[str]) -> np.ndarray:
+        """IDs of the vectors of the given files (stores with facet codes only)"""
+        file_paths = set(file_paths)
+        row = _FACET_ROW + _FACETS.index("file_path")
+        codes = [code for code, value in enumerate(self._vocabularies["file_path"]) if value in file_paths]
+        if not codes:
+            return np.zeros(0, dtype=np.int64)
+        return np.asarray(self._ids[np.isin(self._offsets[row], codes)], dtype=np.int64)
+
+    def get(self, vector_id: int, default: Optional[Dict] = None) -> Optional[Dict]:
+        """Decoded entry for a vector ID (a new dict on every call)"""
+        row = int(np.searchsorted(self._ids, vector_id))
+        if row >= len(self._ids) or int(self._ids[row]) != vector_id:
+            return default
+        start, end = int(self._offsets[1, row]), int(self._offsets[2, row])
+        return json.loads(self._data[start:end])
+
+    def select(self, vector_filter: VectorFilter) -> np.ndarray:
+        """IDs of the vectors matching a filter, from the facet codes (decoding entries for old stores)"""
+        if self._vocabularies is None:
+            return np.array(
+                [vector_id for vector_id in self._ids.tolist() if vector_filter.matches(self.get(vector_id))],
+                dtype=np.int64,
+            )
+        mask = np.ones(len(self._ids), dtype=bool)
+        for row, facet in enumerate(_FACETS, _FACET_ROW):
+            vocabulary = self._vocabularies[facet]
+            allowed = np.fromiter((vector_filter.accepts(facet, value) for value in vocabulary), dtype=bool,
+                                  count=len(vocabulary))
+            if not allowed.all():
+                mask &= allowed[self._offsets[row]]
+        return np.asarray(self._ids[mask], dtype=np.int64)
+
+
+def select_ids(metadata: Union[MappedMetadata, Dict[int, Dict]], vector_filter: VectorFilter) -> np.ndarray:
+    """IDs of the vectors of a metadata store (mapped, or a legacy dict) matching a filter"""
+    if isinstance(metadata, MappedMetadata):
+        return metadata.select(vector_filter)
+    return np.array(
+        [vector_id for vector_id, entry in metadata.items() if vector_filter.matches(entry)], dtype=np.int64
+    )
@@ -0,0 +1,92 @@
+"""
+Warmup service - prewarms the embedding model and hot project indexes after startup
+and records how long imports and warmup took
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from config import PREWARM_MODEL, PREWARM_PROJECTS
+from services import embedding_service
+
+logger = logging.getLogger(__name__)
+
+_timings: Dict = {
+    "import_seconds": None,
+    "warmup": {
+        "state": "pending",
+        "model_seconds": None,
+        "index_seconds": {},
+        "total_seconds": None,
+    },
+}
+
+
+def record_import_time(seconds: float) -> None:
+    """Record how long importing the application (routers, services) took"""
+    _timings["import_seconds"] = round(seconds, 4)
+    logger.info(f"Application imports took {seconds:.3f}s")
+
+
+def get_timings() -> Dict:
+    """Return import and warmup timings"""
+    return _timings
+
+
+def _projects_to_prewarm() -> List[str]:
+    """Resolve PREWARM_PROJECTS into a list of project IDs"""
+    value = PREWARM_PROJECTS.strip()
+    if not value:
+        return []
+    if value == "*":
+        return embedding_service.list_indexed_projects()
+    return [project_id.strip() for project_id in value.split(",") if project_id.strip()]
+
+
+async def prewarm(model: Optional[bool] = None, project_ids: Optional[List[str]] = None) -> None:
+    """
+    Load the embedding model and the configured project indexes in worker threads
+
+    Args:
+        model: Whether to load the embedding model (defaults to PREWARM_MODEL)
+        project_ids: Projects whose indexes should be loaded (defaults to PREWARM_PROJECTS)
+    """
+    if model is None:
+        model = PREWARM_MODEL
+    if project_ids is None:
+        project_ids = _projects_to_prewarm()
+
+    warmup = _timings["warmup"]
+    if not model and not project_ids:
+        warmup["state"] = "disabled"
+        return
+
+    warmup["state"] = "running"
+    started = time.perf_counter()
+
+    try:
+        if model:
+            step_started = time.perf_counter()
+            await asyncio.to_thread(embedding_service.warm_model)
+            warmup["model_seconds"] = round(time.perf_counter() - step_started, 4)
+            logger.info(f"Embedding model prewarmed in {warmup['model_seconds']:.3f}s")
+
+        for project_id in project_ids:
+            step_started = time.perf_counter()
+            loaded = await asyncio.to_thread(embedding_service.warm_index, project_id)
+            if loaded:
+                warmup["index_seconds"][project_id] = round(time.perf_counter() - step_started, 4)
+        if project_ids:
+            logger.info(f"Prewarmed {len(warmup['index_seconds'])} project indexes")
+
+        warmup["state"] = "done"
+    except asyncio.CancelledError:
+        warmup["state"] = "cancelled"
+        raise
+    except Exception as e:
+        # Prewarm is best-effort: requests will load what they need on demand
+        warmup["state"] = "failed"
+        logger.error(f"Error during startup prewarm: {str(e)}", exc_info=True)
+    finally:
+        warmup["total_seconds"] = round(time.perf_counter() - started, 4)
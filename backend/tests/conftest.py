@@ -0,0 +1,18 @@
+"""
+Test configuration - keeps the data directories config.py creates out of the source tree
+
+Run from the backend directory: python -m pytest -q
+"""
+import os
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="intelliforge-tests-")
+for name, subdir in (
+    ("FAISS_DATA_DIR", "faiss"),
+    ("GRAPH_DATA_DIR", "graph"),
+    ("BLOB_DATA_DIR", "blobs"),
+    ("INDEX_CACHE_DIR", "cache"),
+    ("PROFILE_DIR", "profiles"),
+    ("REGISTRY_DB_PATH", "registry.sqlite3"),
+):
+    os.environ.setdefault(name, os.path.join(_data_dir, subdir))
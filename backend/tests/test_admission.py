@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from services.admission import Gate, Rejected
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_acquire_without_waiting_while_slots_are_free():
+    async def scenario():
+        gate = Gate(limit=2, max_queue=1)
+        assert await gate.acquire(timeout=1) is False
+        assert await gate.acquire(timeout=1) is False
+        assert gate.active == 2 and gate.queued == 0
+        gate.release()
+        gate.release()
+        assert gate.active == 0 and gate.idle
+
+    _run(scenario())
+
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        gate = Gate(limit=1, max_queue=1)
+        await gate.acquire(timeout=1)
+        waiter = asyncio.create_task(gate.acquire(timeout=5))
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+
+        with pytest.raises(Rejected) as rejected:
+            await gate.acquire(timeout=5)
+        assert rejected.value.reason == "queue full"
+        assert rejected.value.retry_after >= 1
+
+        # The rejected request left no trace; the waiter gets the slot when it is released
+        gate.release()
+        assert await waiter is True
+        assert gate.active == 1 and gate.queued == 0
+        gate.release()
+        assert gate.idle
+
+    _run(scenario())
+
+
+def test_wait_longer_than_timeout_is_rejected():
+    async def scenario():
+        gate = Gate(limit=1, max_queue=4)
+        await gate.acquire(timeout=1)
+
+        with pytest.raises(Rejected) as rejected:
+            await gate.acquire(timeout=0.01)
+        assert rejected.value.reason == "queue timeout"
+        assert gate.queued == 0
+
+        gate.release()
+        assert gate.active == 0 and gate.idle
+
+    _run(scenario())
+
+
+def test_waiters_are_served_in_arrival_order_and_counters_return_to_zero():
+    async def scenario():
+        gate = Gate(limit=2, max_queue=8)
+        order = []
+
+        async def request(number: int):
+            await gate.acquire(timeout=5)
+            try:
+                order.append(number)
+                await asyncio.sleep(0.001)
+            finally:
+                gate.release(service_seconds=0.001)
+
+        await asyncio.gather(*(request(number) for number in range(10)))
+        assert order == list(range(10))
+        assert gate.active == 0 and gate.queued == 0 and gate.idle
+
+    _run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        gate = Gate(limit=1, max_queue=2)
+        await gate.acquire(timeout=1)
+        waiter = asyncio.create_task(gate.acquire(timeout=5))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert gate.queued == 0
+
+        gate.release()
+        assert gate.active == 0 and gate.idle
+
+    _run(scenario())
+
+
+def test_file_saves_are_classified():
+    from middleware.admission import classify
+
+    assert classify("PUT", "/api/projects/7/file") == ("save", "7")
+    assert classify("GET", "/api/projects/7/file") == (None, None)
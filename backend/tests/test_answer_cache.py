@@ -0,0 +1,81 @@
+import numpy as np
+
+from services import answer_cache
+from services.answer_cache import ProjectAnswers
+
+
+def _vector(*components):
+    vector = np.zeros(8, dtype=np.float32)
+    vector[:len(components)] = components
+    return vector
+
+
+def test_exact_and_similar_questions_hit_within_their_scope():
+    answers = ProjectAnswers(generation=1)
+    answers.put("How is the config loaded?", _vector(1, 0), "all", "from env", [])
+    answers.put("Where are users created?", _vector(0, 1), "all", "in the service", [])
+
+    assert answers.find_text("how is the  config loaded", "all").answer == "from env"
+    assert answers.find_text("how is the config loaded", "other scope") is None
+    assert answers.find_similar(_vector(0.05, 1), "all").answer == "in the service"
+    assert answers.find_similar(_vector(1, 1), "all") is None
+    assert answers.find_similar(_vector(0, 1), "other scope") is None
+
+
+def test_hits_keep_the_matrix_and_update_lru_order(monkeypatch):
+    monkeypatch.setattr(answer_cache, "CHAT_CACHE_MAX_ENTRIES", 3)
+    answers = ProjectAnswers(generation=1)
+    for position, question in enumerate(["a", "b", "c"]):
+        answers.put(question, _vector(*([0] * position + [1])), "all", question.upper(), [])
+    matrix = answers._matrix
+
+    assert answers.find_similar(_vector(1), "all").answer == "A"
+    assert answers.find_text("b", "all").answer == "B"
+    assert answers._matrix is matrix
+
+    # "c" is now the least recently used entry
+    answers.put("d", _vector(0, 0, 0, 1), "all", "D", [])
+    assert answers.find_text("c", "all") is None
+    assert [answers.find_similar(_vector(*([0] * position + [1])), "all").answer
+            for position in (0, 1, 3)] == ["A", "B", "D"]
+    assert answers.find_similar(_vector(0, 0, 1), "all") is None
+    assert answers._matrix is matrix
+
+
+def test_put_supersedes_near_identical_questions_in_the_same_scope():
+    answers = ProjectAnswers(generation=1)
+    answers.put("first", _vector(1, 0), "all", "old", [])
+    answers.put("kept", _vector(0, 1), "all", "kept", [])
+    answers.put("first, reworded", _vector(1, 0.01), "all", "new", [])
+    answers.put("first", _vector(1, 0), "other scope", "scoped", [])
+
+    assert len(answers) == 3
+    assert answers.find_text("first", "all") is None
+    assert answers.find_similar(_vector(1, 0), "all").answer == "new"
+    assert answers.find_similar(_vector(0, 1), "all").answer == "kept"
+    assert answers.find_text("first", "other scope").answer == "scoped"
+
+
+def test_matrix_grows_past_its_initial_rows():
+    answers = ProjectAnswers(generation=1)
+    count = ProjectAnswers._INITIAL_ROWS + 3
+    for position in range(count):
+        vector = np.zeros(count, dtype=np.float32)
+        vector[position] = 1
+        answers.put(f"q{position}", vector, "all", f"a{position}", [])
+    for position in range(count):
+        vector = np.zeros(count, dtype=np.float32)
+        vector[position] = 1
+        assert answers.find_similar(vector, "all").answer == f"a{position}"
+
+
+def test_projects_are_bounded_and_reset_on_a_new_generation(monkeypatch):
+    monkeypatch.setattr(answer_cache, "CHAT_CACHE_MAX_PROJECTS", 2)
+    answer_cache.for_project("p1", 1).put("q", _vector(1), "all", "a", [])
+    answer_cache.for_project("p2", 1)
+    answer_cache.for_project("p1", 1)  # most recently used again
+    answer_cache.for_project("p3", 1)
+
+    assert list(answer_cache._projects) == ["p1", "p3"]
+    assert len(answer_cache.for_project("p1", 1)) == 1
+    assert len(answer_cache.for_project("p1", 2)) == 0
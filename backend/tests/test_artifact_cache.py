@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+
+from services import artifact_cache
+
+
+def _age(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - int(seconds * 1e9)))
+
+
+def test_prune_removes_least_recently_used_entries_first():
+    keys = [artifact_cache.texts_key([f"text {i}"]) for i in range(4)]
+    for key in keys:
+        artifact_cache.put_vectors(key, np.ones((1, 256), dtype=np.float32))
+    paths = [artifact_cache._fanout(artifact_cache._VECTORS_DIR, key, ".npy") for key in keys]
+    for position, path in enumerate(paths):
+        _age(path, 1000 * (len(paths) - position))
+    # Reading the oldest entry makes it the most recently used
+    assert artifact_cache.get_vectors(keys[0]) is not None
+
+    size = os.path.getsize(paths[0])
+    total = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(artifact_cache.INDEX_CACHE_DIR) for name in names
+    )
+    removed = artifact_cache.prune(max_bytes=total - size)
+    assert removed["files"] >= 1
+    assert paths[0].exists()
+    assert not paths[1].exists()
+
+
+def test_prune_is_off_when_unbounded():
+    key = artifact_cache.texts_key(["unbounded"])
+    artifact_cache.put_vectors(key, np.ones((1, 4), dtype=np.float32))
+    assert artifact_cache.prune(max_bytes=0) == {"files": 0, "bytes": 0}
+    assert artifact_cache.get_vectors(key) is not None
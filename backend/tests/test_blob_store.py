@@ -0,0 +1,50 @@
+import os
+
+from services import blob_store
+
+
+def test_replaced_file_releases_its_old_blob(tmp_path):
+    dest = tmp_path / "source" / "main.py"
+    old_digest, created, linked = blob_store.put_file(b"old = 1\n", dest)
+    assert created and linked
+    copy = tmp_path / "other" / "main.py"
+    blob_store.link_into(old_digest, copy)
+
+    new_digest, _, _ = blob_store.put_file(b"new = 2\n", dest)
+    # Still linked from the other tree
+    assert not blob_store.release(old_digest)
+    os.unlink(copy)
+    assert blob_store.release(old_digest)
+    assert not blob_store.blob_path(old_digest).exists()
+    assert blob_store.blob_path(new_digest).exists()
+    assert dest.read_bytes() == b"new = 2\n"
+
+
+def test_sweep_removes_only_unreferenced_blobs(tmp_path):
+    kept, _, _ = blob_store.put_file(b"kept = True\n", tmp_path / "kept.py")
+    dropped, _, _ = blob_store.put_file(b"dropped = True\n", tmp_path / "dropped.py")
+    os.unlink(tmp_path / "dropped.py")
+
+    removed = blob_store.sweep()
+    assert removed["blobs"] >= 1 and removed["bytes"] >= len(b"dropped = True\n")
+    assert blob_store.blob_path(kept).exists()
+    assert not blob_store.blob_path(dropped).exists()
+    assert (tmp_path / "kept.py").read_bytes() == b"kept = True\n"
+
+
+def test_put_file_stores_again_when_the_blob_was_swept_before_linking(tmp_path, monkeypatch):
+    original_put_bytes = blob_store.put_bytes
+    calls = []
+
+    def put_bytes_then_sweep(data):
+        digest, created = original_put_bytes(data)
+        if not calls:
+            blob_store.blob_path(digest).unlink()
+        calls.append(digest)
+        return digest, created
+
+    monkeypatch.setattr(blob_store, "put_bytes", put_bytes_then_sweep)
+    digest, _, _ = blob_store.put_file(b"raced = True\n", tmp_path / "raced.py")
+    assert len(calls) == 2
+    assert (tmp_path / "raced.py").read_bytes() == b"raced = True\n"
+    assert blob_store.blob_path(digest).exists()
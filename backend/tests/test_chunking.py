@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from embeddings.base import EmbeddingBackend
+from services import chunking, embedding_service
+
+
+class _WordBackend(EmbeddingBackend):
+    """One token per whitespace-separated word plus two special tokens"""
+
+    name = "words"
+    dimension = 4
+    max_seq_length = 40
+
+    def __init__(self):
+        self.token_calls = 0
+
+    def encode(self, texts, batch_size=32):
+        return np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+    def token_lengths(self, texts):
+        self.token_calls += 1
+        return [len(text.split()) + 2 for text in texts]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = _WordBackend()
+    monkeypatch.setattr(embedding_service, "_backend", backend)
+    return backend
+
+
+def _function(name, line_start, body_lines):
+    lines = [f"def {name}():"] + [f"    value_{i} = compute(value_{i - 1})" for i in range(body_lines)]
+    return {
+        "name": name, "type": "function", "signature": f"def {name}()", "code": "\n".join(lines),
+        "line_start": line_start, "line_end": line_start + len(lines) - 1,
+    }
+
+
+def test_a_file_is_tokenized_in_at_most_two_calls(backend):
+    symbols = [
+        {"name": "Service", "type": "class", "signature": "class Service", "docstring": "Does things",
+         "members": ["run"], "code": "class Service:\n    def run(self): pass", "line_start": 1, "line_end": 2},
+        _function("short", 10, 1),
+        _function("long_one", 20, 30),
+        _function("long_two", 60, 30),
+    ]
+    result = chunking.build_file_chunks(symbols, "pkg/mod.py")
+    assert backend.token_calls == 2
+
+    by_symbol = {}
+    for chunk in result["chunks"]:
+        by_symbol.setdefault(chunk["symbol"], []).append(chunk)
+    assert list(by_symbol) == [0, 1, 2, 3]
+    assert by_symbol[0][0]["code"].startswith("class Service")
+    assert len(by_symbol[1]) == 1 and by_symbol[1][0]["text"] == chunking.full_text(symbols[1], "pkg/mod.py")
+
+    for index in (2, 3):
+        windows = by_symbol[index]
+        assert len(windows) > 1
+        assert [chunk["chunk_index"] for chunk in windows] == list(range(len(windows)))
+        assert windows[0]["line_start"] == symbols[index]["line_start"]
+        assert windows[-1]["line_end"] == symbols[index]["line_end"]
+        for chunk in windows:
+            assert chunk["text"].startswith(f"File: pkg/mod.py\nSymbol: {symbols[index]['name']}")
+            assert backend.token_lengths([chunk["text"]])[0] <= backend.max_seq_length
+
+    assert 0 < result["tokens"]
+    assert result["tokens_without_chunking"] == sum(
+        min(length, backend.max_seq_length)
+        for length in backend.token_lengths([chunking.full_text(s, "pkg/mod.py") for s in symbols])
+    )
+
+
+def test_short_symbols_only_need_one_call(backend):
+    result = chunking.build_file_chunks([_function("a", 1, 1), _function("b", 5, 2)], "a.py")
+    assert backend.token_calls == 1
+    assert [chunk["symbol"] for chunk in result["chunks"]] == [0, 1]
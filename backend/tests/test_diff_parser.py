@@ -0,0 +1,112 @@
+import pytest
+
+from services.diff_parser import parse_unified_diff
+
+MULTI_HUNK = """\
+diff --git a/pkg/mod.py b/pkg/mod.py
+index 1111111..2222222 100644
+--- a/pkg/mod.py
++++ b/pkg/mod.py
+@@ -2,4 +2,4 @@ def f():
+ a
+-b
++B
+ c
+ d
+@@ -20,3 +20,4 @@ def g():
+ x
++y
+ z
+ w
+"""
+
+
+def test_multiple_hunks_give_ranges_on_both_sides():
+    (file_diff,) = parse_unified_diff(MULTI_HUNK)
+    assert file_diff.old_path == file_diff.new_path == file_diff.path == "pkg/mod.py"
+    # The insertion of "y" marks the old line it follows ("x", line 20)
+    assert file_diff.ranges("old") == [(3, 3), (20, 20)]
+    assert file_diff.ranges("new") == [(3, 3), (21, 21)]
+
+
+def test_pure_insertion_marks_the_preceding_old_line():
+    diff = """\
+--- a/m.py
++++ b/m.py
+@@ -3,0 +4,2 @@
++inserted_one
++inserted_two
+"""
+    (file_diff,) = parse_unified_diff(diff)
+    assert file_diff.ranges("new") == [(4, 5)]
+    assert file_diff.ranges("old") == [(3, 3)]
+
+
+def test_pure_deletion_marks_the_preceding_new_line():
+    diff = """\
+--- a/m.py
++++ b/m.py
+@@ -5,2 +4,0 @@
+-removed_one
+-removed_two
+"""
+    (file_diff,) = parse_unified_diff(diff)
+    assert file_diff.ranges("old") == [(5, 6)]
+    assert file_diff.ranges("new") == [(4, 4)]
+
+
+def test_adjacent_changed_lines_merge_into_one_range():
+    diff = """\
+--- a/m.py
++++ b/m.py
+@@ -10,5 +10,5 @@
+ keep
+-one
+-two
+-three
++ONE
++TWO
++THREE
+ keep
+"""
+    (file_diff,) = parse_unified_diff(diff)
+    assert file_diff.ranges("old") == [(11, 13)]
+    assert file_diff.ranges("new") == [(11, 13)]
+
+
+def test_added_and_deleted_files():
+    diff = """\
+--- /dev/null
++++ b/new.py
+@@ -0,0 +1,2 @@
++def new():
++    pass
+--- a/old.py
++++ /dev/null
+@@ -1,1 +0,0 @@
+-gone = True
+"""
+    added, deleted = parse_unified_diff(diff)
+    assert (added.old_path, added.new_path, added.path) == (None, "new.py", "new.py")
+    assert added.ranges("new") == [(1, 2)]
+    assert (deleted.old_path, deleted.new_path, deleted.path) == ("old.py", None, "old.py")
+    assert deleted.ranges("old") == [(1, 1)]
+
+
+def test_removed_line_starting_with_dashes_is_not_a_file_header():
+    diff = """\
+--- a/notes.txt
++++ b/notes.txt
+@@ -1,2 +1,1 @@
+---- not a header
++++ not a header either
+\\ No newline at end of file
+"""
+    (file_diff,) = parse_unified_diff(diff)
+    assert file_diff.ranges("old") == [(1, 1)]
+    assert file_diff.ranges("new") == [(1, 1)]
+
+
+def test_diff_without_hunks_is_rejected():
+    with pytest.raises(ValueError):
+        parse_unified_diff("--- a/m.py\n+++ b/m.py\n")
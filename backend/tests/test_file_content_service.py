@@ -0,0 +1,43 @@
+import os
+
+from services import file_content_service
+
+
+def _replace(path, text, mtime_ns):
+    """Replace a file like a save does (project files are links into the blob store)"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(text)
+    os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+    os.replace(tmp_path, path)
+
+
+def test_read_lines_returns_the_requested_range(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("one\ntwo\nthree\n")
+    assert file_content_service.read_lines(path, 2) == ("two\nthree\n", 3, 3)
+    assert file_content_service.read_lines(path, 1, 1) == ("one\n", 1, 3)
+
+
+def test_index_replaced_during_a_read_stays_open_until_the_read_ends(tmp_path):
+    path = tmp_path / "a.py"
+    _replace(path, "one\ntwo\n", 1_000_000_000)
+    with file_content_service._line_index(path) as index:
+        # A save changes the file while the first read is still slicing its index
+        _replace(path, "uno\ndos\ntres\n", 2_000_000_000)
+        assert file_content_service.read_lines(path, 3) == ("tres\n", 3, 3)
+        assert index.retired
+        assert index.slice(1, 2) == b"one\ntwo\n"
+    assert index.data.closed
+
+
+def test_evicted_index_stays_open_until_the_read_ends(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_content_service, "LINE_INDEX_CACHE_SIZE", 1)
+    first, second = tmp_path / "first.py", tmp_path / "second.py"
+    first.write_text("first\n")
+    second.write_text("second\n")
+    with file_content_service._line_index(first) as index:
+        assert file_content_service.read_lines(second, 1) == ("second\n", 1, 1)
+        assert index.retired
+        assert index.slice(1, 1) == b"first\n"
+    assert index.data.closed
+    assert file_content_service.read_lines(first, 1) == ("first\n", 1, 1)
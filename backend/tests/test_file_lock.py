@@ -0,0 +1,52 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from services.file_lock import FileLock
+
+
+def test_async_waiters_leave_the_thread_pool_free(tmp_path):
+    path = tmp_path / "project.write.lock"
+
+    async def waiter(order):
+        lock = FileLock(path)
+        await lock.acquire_async()
+        try:
+            order.append(await asyncio.to_thread(lambda: len(order)))
+        finally:
+            lock.release()
+
+    async def scenario():
+        # One pool thread: a waiter blocked in flock would take it from the holder
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        holder = FileLock(path)
+        holder.acquire()
+        order = []
+        waiters = [asyncio.create_task(waiter(order)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        # The holder can still use the pool while the waiters wait
+        assert await asyncio.wait_for(asyncio.to_thread(lambda: "done"), 1) == "done"
+        assert order == []
+        holder.release()
+        await asyncio.wait_for(asyncio.gather(*waiters), 5)
+        return order
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+
+
+def test_cancelled_async_waiter_holds_nothing(tmp_path):
+    path = tmp_path / "project.write.lock"
+
+    async def scenario():
+        holder = FileLock(path)
+        holder.acquire()
+        waiter = FileLock(path)
+        task = asyncio.create_task(waiter.acquire_async())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        holder.release()
+        free = FileLock(path)
+        assert free.try_acquire()
+        free.release()
+
+    asyncio.run(scenario())
@@ -0,0 +1,73 @@
+from services import graph_format
+
+GRAPH = {
+    "symbols": [
+        {"id": 1, "name": "Service", "file_path": "app/service.py", "type": "class", "calls": [],
+         "line_start": 1, "line_end": 20},
+        {"id": 2, "name": "Service.créer", "file_path": "app/service.py", "type": "method",
+         "calls": ["validar_usuário", "日志"], "line_start": 2, "line_end": 10},
+        {"id": 5, "name": "validar_usuário", "file_path": "app/ユーティリティ.py", "type": "function",
+         "calls": ["日志"], "line_start": 1, "line_end": 4},
+        {"id": 7, "name": "日志", "file_path": "app/ユーティリティ.py", "type": "function", "calls": []},
+    ],
+    "edges": [
+        {"from": 2, "to": 5},
+        {"from": 2, "to": 7},
+        {"from": 5, "to": 7},
+    ],
+}
+
+
+def _round_trip(graph, tmp_path):
+    path = tmp_path / "project.graph"
+    graph_format.write(graph, path)
+    mapped = graph_format.MappedGraph(path)
+    try:
+        return mapped.to_dict()
+    finally:
+        mapped.close()
+
+
+def test_round_trip_keeps_symbols_edges_and_unicode_names(tmp_path):
+    assert _round_trip(GRAPH, tmp_path) == GRAPH
+
+
+def test_round_trip_without_edges(tmp_path):
+    graph = {"symbols": GRAPH["symbols"], "edges": []}
+    assert _round_trip(graph, tmp_path) == graph
+
+
+def test_round_trip_of_an_empty_graph(tmp_path):
+    graph = {"symbols": [], "edges": []}
+    assert _round_trip(graph, tmp_path) == graph
+
+
+def test_edges_to_unknown_ids_are_dropped(tmp_path):
+    graph = {"symbols": GRAPH["symbols"], "edges": GRAPH["edges"] + [{"from": 2, "to": 99}]}
+    assert _round_trip(graph, tmp_path)["edges"] == GRAPH["edges"]
+
+
+def test_queries_on_the_mapped_graph(tmp_path):
+    path = tmp_path / "project.graph"
+    graph_format.write(GRAPH, path)
+    mapped = graph_format.MappedGraph(path)
+    row = mapped.find("Service.créer", "app/service.py")
+    assert mapped.symbol(row) == GRAPH["symbols"][1]
+    target = mapped.find("日志", "app/ユーティリティ.py")
+    assert sorted(mapped.ids[mapped.callers(target)].tolist()) == [2, 5]
+    assert mapped.ids[mapped.callees(row)].tolist() == [5, 7]
+    assert mapped.find("日志", "app/service.py") is None
+    assert mapped.string_index("missing") is None
+    assert mapped.file_rows("app/ユーティリティ.py").tolist() == [2, 3]
+    assert list(mapped.symbol_list([3, 0])) == [GRAPH["symbols"][3], GRAPH["symbols"][0]]
+    mapped.close()
+
+
+def test_close_tolerates_views_still_in_use(tmp_path):
+    path = tmp_path / "project.graph"
+    graph_format.write(GRAPH, path)
+    mapped = graph_format.MappedGraph(path)
+    callees = mapped.callees(1)
+    mapped.close()
+    # The view keeps the mapping alive
+    assert callees.tolist() == [2, 3]
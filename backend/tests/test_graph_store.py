@@ -0,0 +1,44 @@
+from services import graph_store
+
+GRAPH = {
+    "symbols": [
+        {"id": 1, "name": "main", "file_path": "main.py", "type": "function", "calls": ["helper"]},
+        {"id": 2, "name": "helper", "file_path": "main.py", "type": "function", "calls": []},
+    ],
+    "edges": [{"from": 1, "to": 2}],
+}
+
+
+def test_resident_graphs_are_bounded_and_evicted_ones_unmapped(monkeypatch):
+    monkeypatch.setattr(graph_store, "GRAPH_RESIDENT_PROJECTS", 2)
+    for project_id in ("bound-1", "bound-2", "bound-3"):
+        graph_store.save_graph(project_id, GRAPH)
+
+    graph_store.open_graph("bound-1")
+    evicted_buffer = graph_store.open_graph("bound-2")._buffer
+    graph_store.open_graph("bound-1")  # most recently used again
+    graph_store.open_graph("bound-3")
+
+    assert list(graph_store._cache)[-2:] == ["bound-1", "bound-3"]
+    assert "bound-2" not in graph_store._cache
+    assert evicted_buffer.closed
+    assert all(not graph._buffer.closed for _, graph in graph_store._cache.values())
+    assert graph_store.open_graph("bound-2").to_dict() == GRAPH
+
+
+def test_replaced_graph_is_unmapped_once_no_query_holds_it():
+    graph_store.save_graph("replaced", GRAPH)
+    in_use = graph_store.open_graph("replaced")
+
+    graph_store.save_graph("replaced", {"symbols": GRAPH["symbols"][:1], "edges": []})
+    current = graph_store.open_graph("replaced")
+    assert len(current) == 1
+    # Still usable by the query holding it
+    assert not in_use._buffer.closed
+    assert in_use.to_dict() == GRAPH
+
+    buffer = in_use._buffer
+    del in_use
+    graph_store.save_graph("other", GRAPH)
+    graph_store.open_graph("other")  # the next mapping closes retired graphs
+    assert buffer.closed
@@ -0,0 +1,83 @@
+from services.ingest_filter import IngestFilter, IngestRules
+
+
+def test_gitignore_negation_re_includes_files():
+    ingest = IngestFilter(gitignores=[(".gitignore", "*.log\n!keep.log\n")])
+    assert ingest.check_entry("debug.log", 10) == "gitignore"
+    assert ingest.check_entry("a/b/debug.log", 10) == "gitignore"
+    assert ingest.check_entry("keep.log", 10) is None
+    assert ingest.check_entry("a/keep.log", 10) is None
+
+
+def test_files_in_an_ignored_directory_cannot_be_re_included():
+    ingest = IngestFilter(gitignores=[(".gitignore", "logs/\n!logs/keep.py\n")])
+    assert ingest.check_entry("logs/keep.py", 10) == "gitignore"
+
+
+def test_directory_patterns_match_directories_only():
+    ingest = IngestFilter(gitignores=[(".gitignore", "out/\n")])
+    assert ingest.check_entry("out/main.py", 10) == "gitignore"
+    assert ingest.check_entry("pkg/out/main.py", 10) == "gitignore"
+    # A file named like the directory is kept
+    assert ingest.check_entry("pkg/out", 10) is None
+
+
+def test_slash_anchors_pattern_to_the_gitignore_directory():
+    ingest = IngestFilter(gitignores=[(".gitignore", "/top.py\n"), ("sub/.gitignore", "/local.py\n")])
+    assert ingest.check_entry("top.py", 10) == "gitignore"
+    assert ingest.check_entry("pkg/top.py", 10) is None
+    assert ingest.check_entry("sub/local.py", 10) == "gitignore"
+    assert ingest.check_entry("local.py", 10) is None
+    assert ingest.check_entry("sub/deeper/local.py", 10) is None
+
+
+def test_deeper_gitignore_overrides_shallower_one():
+    ingest = IngestFilter(gitignores=[("sub/.gitignore", "!*.log\n"), (".gitignore", "*.log\n")])
+    assert ingest.check_entry("sub/a.log", 10) is None
+    assert ingest.check_entry("other/a.log", 10) == "gitignore"
+
+
+def test_gitignore_files_are_skipped_when_disabled():
+    ingest = IngestFilter(IngestRules(use_gitignore=False), gitignores=[(".gitignore", "*.py\n")])
+    assert ingest.check_entry("main.py", 10) is None
+
+
+def test_exclude_and_include_globs():
+    ingest = IngestFilter(IngestRules(exclude=["docs/**", "*.md"], include=["src/", "*.cfg"]))
+    assert ingest.check_entry("docs/api/index.rst", 10) == "excluded"
+    assert ingest.check_entry("src/README.md", 10) == "excluded"
+    assert ingest.check_entry("src/pkg/main.py", 10) is None
+    assert ingest.check_entry("setup.cfg", 10) is None
+    assert ingest.check_entry("lib/main.py", 10) == "not_included"
+
+
+def test_default_ignored_directories():
+    ingest = IngestFilter()
+    assert ingest.check_entry("node_modules/left-pad/index.js", 10) == "ignored_dir"
+    assert ingest.check_entry("app/.git/config", 10) == "ignored_dir"
+    assert ingest.check_entry("app/build.py", 10) is None
+
+
+def test_binary_extension_size_and_generated_name_checks():
+    ingest = IngestFilter(IngestRules(max_file_bytes=100))
+    assert ingest.check_entry("img/logo.PNG", 10) == "binary"
+    assert ingest.check_entry("main.py", 100) is None
+    assert ingest.check_entry("main.py", 101) == "too_large"
+    assert ingest.check_entry("static/app.min.js", 10) == "generated"
+    assert ingest.check_entry("proto/service_pb2.py", 10) == "generated"
+    assert ingest.check_entry("package-lock.json", 10) == "generated"
+
+    keep_generated = IngestFilter(IngestRules(skip_generated=False))
+    assert keep_generated.check_entry("static/app.min.js", 10) is None
+
+
+def test_content_checks():
+    ingest = IngestFilter()
+    assert ingest.check_content("main.py", b"def f():\n    return 1\n") is None
+    assert ingest.check_content("data.txt", b"header\0body") == "binary"
+    assert ingest.check_content("api.py", b"# @generated by protoc\nx = 1\n") == "generated"
+    assert ingest.check_content("bundle.js", b"var a=1;" * 250) == "generated"
+
+    keep_generated = IngestFilter(IngestRules(skip_generated=False))
+    assert keep_generated.check_content("api.py", b"# @generated by protoc\nx = 1\n") is None
+    assert keep_generated.check_content("data.txt", b"header\0body") == "binary"
@@ -0,0 +1,59 @@
+from services.symbol_intervals import SymbolIntervalIndex, build_file_indexes
+
+
+def _symbol(name, start, end, file_path="m.py"):
+    return {"name": name, "file_path": file_path, "line_start": start, "line_end": end}
+
+
+CLASS = _symbol("C", 1, 20)
+METHOD = _symbol("C.m", 2, 10)
+CLOSURE = _symbol("C.m.inner", 4, 6)
+OTHER_METHOD = _symbol("C.n", 12, 18)
+FUNCTION = _symbol("f", 25, 30)
+
+
+def _index():
+    # Unordered input with a symbol that has no line range
+    return SymbolIntervalIndex([FUNCTION, CLOSURE, CLASS, {"name": "no_range"}, OTHER_METHOD, METHOD])
+
+
+def test_symbol_at_returns_the_innermost_enclosing_symbol():
+    index = _index()
+    expected = {
+        0: None, 1: CLASS, 2: METHOD, 3: METHOD, 4: CLOSURE, 6: CLOSURE, 7: METHOD, 10: METHOD,
+        11: CLASS, 12: OTHER_METHOD, 18: OTHER_METHOD, 19: CLASS, 20: CLASS, 21: None, 25: FUNCTION, 31: None,
+    }
+    for line, symbol in expected.items():
+        assert index.symbol_at(line) is symbol, line
+
+
+def test_symbols_in_range_lists_each_innermost_symbol_once_in_line_order():
+    index = _index()
+    assert index.symbols_in_range(5, 12) == [CLOSURE, METHOD, CLASS, OTHER_METHOD]
+    assert index.symbols_in_range(3, 8) == [METHOD, CLOSURE]
+    assert index.symbols_in_range(21, 24) == []
+    assert index.symbols_in_range(19, 40) == [CLASS, FUNCTION]
+
+
+def test_covered_lines_skips_lines_between_symbols():
+    index = _index()
+    assert index.covered_lines(18, 26) == 5
+    assert index.covered_lines(21, 24) == 0
+    assert index.covered_lines(1, 30) == 26
+
+
+def test_symbols_starting_on_the_same_line_resolve_to_the_shorter_one():
+    outer = _symbol("outer", 40, 50)
+    inner = _symbol("inner", 40, 45)
+    index = SymbolIntervalIndex([outer, inner])
+    assert index.symbol_at(40) is inner
+    assert index.symbol_at(45) is inner
+    assert index.symbol_at(46) is outer
+
+
+def test_build_file_indexes_groups_symbols_by_file():
+    other = _symbol("g", 1, 3, file_path="other.py")
+    indexes = build_file_indexes([CLASS, METHOD, other])
+    assert set(indexes) == {"m.py", "other.py"}
+    assert indexes["m.py"].symbol_at(2) is METHOD
+    assert indexes["other.py"].symbol_at(2) is other